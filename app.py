@@ -2,67 +2,123 @@
 Platform Engineering Chatbot - Flask Application
 Powered by Rancher API (Excel integration commented out)
 """
-from flask import Flask, request, jsonify, render_template
+import json
+import time
+
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from rancher_utils import rancher_client
-from config import DEBUG, HOST, PORT
+from inventory_utils import inventory
+from intent_utils import registry as intent_registry
+from resource_utils import ResourceTable, rank_utilization
+from record_utils import RECORD_TYPES, sort_nodes, page_nodes
+from cache_utils import AnswerCache, CachedAnswer
+from events_utils import event_bus, publish_changes, sse_format, parse_last_event_id
+from metrics_utils import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics, http_request_seconds, stage, timed_request,
+    client_collector, snapshot_collector, answer_cache_collector,
+)
+from config import (
+    DEBUG, HOST, PORT, INVENTORY_SNAPSHOT_ENABLED, EVENTS_ENABLED, EVENTS_HEARTBEAT_SECONDS,
+    NODES_PAGE_SIZE, NODES_PAGE_MAX, METRICS_ENABLED, SERVER_TIMING_ENABLED,
+    CHAT_ANSWER_CACHE_ENTRIES,
+)
 
 # ── Excel imports commented out ───────────────────────────────────────────────
 # from excel_utils import excel_manager
 # ─────────────────────────────────────────────────────────────────────────────
 
-import re
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes cluster/node records at the response boundary."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, RECORD_TYPES):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__)
+app.json = RecordJSONProvider(app)
 CORS(app)
 
+# Publish node/cluster changes between inventory snapshots to /api/events
+if EVENTS_ENABLED:
+    inventory.add_listener(lambda old, new: publish_changes(event_bus, old, new))
 
-# ── Query Parsing ─────────────────────────────────────────────────────────────
+# Cache, transfer and breaker figures are read when /metrics is scraped
+metrics.add_collector(client_collector(rancher_client))
+metrics.add_collector(snapshot_collector(inventory))
 
-def parse_user_query(query):
-    """Parse user query to determine intent and extract keywords."""
-    q = query.lower().strip()
+# Serialized chat answers for the current snapshot version (see cached_answer)
+answer_cache = AnswerCache(CHAT_ANSWER_CACHE_ENTRIES)
+metrics.add_collector(answer_cache_collector(answer_cache))
 
-    # ── list all clusters ─────────────────────────────────────────────────
-    if re.search(r'\b(list|show|get|all)\b.*\bclusters?\b', q) or q in ('clusters', 'all clusters'):
-        return {'intent': 'list_clusters', 'keyword': ''}
 
-    # ── cluster search by name ────────────────────────────────────────────
-    m = re.search(
-        r'(?:cluster|show me|details?(?:\s+of)?|status(?:\s+of)?)\s+([a-z0-9_\-\.]+)', q
-    )
-    if m:
-        return {'intent': 'cluster_detail', 'keyword': m.group(1)}
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
 
-    # ── node / node status queries ────────────────────────────────────────
-    if re.search(r'\bnodes?\b', q):
-        # specific node name after "node"
-        nm = re.search(r'\bnode\s+([a-z0-9_\-\.]+)', q)
-        if nm:
-            return {'intent': 'node_detail', 'keyword': nm.group(1)}
-        return {'intent': 'list_clusters', 'keyword': ''}   # show all with node info
 
-    # ── CPU / memory queries ──────────────────────────────────────────────
-    if re.search(r'\b(cpu|memory|mem|resources?|utilization|usage)\b', q):
-        cm = re.search(r'(?:cpu|memory|mem|resources?|usage).*?\b([a-z0-9_\-\.]{3,})\b', q)
-        if cm:
-            return {'intent': 'cluster_detail', 'keyword': cm.group(1)}
-        return {'intent': 'list_clusters', 'keyword': ''}
+@app.after_request
+def record_request_latency(response):
+    """Request latency by route; for streamed responses, time to headers."""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_request_seconds.observe(
+            time.perf_counter() - started, request.method, route, str(response.status_code)
+        )
+    return response
+
 
-    # ── generic keyword search ─────────────────────────────────────────────
-    return {'intent': 'search_cluster', 'keyword': query.strip()}
+# ── Query Parsing ─────────────────────────────────────────────────────────────
+
+def parse_user_query(query):
+    """
+    Parse user query to determine intent and extract keywords.
+    Rules live in intent_utils.registry, tried in priority order.
+    """
+    return intent_registry.match(query)
 
 
 # ── Response Formatting ───────────────────────────────────────────────────────
 
-def format_response(results, intent, keyword):
-    """Format Rancher API results into a chat response."""
+def endpoint_note(failed_endpoints):
+    """Message suffix naming federated Rancher endpoints left out of an answer."""
+    if not failed_endpoints:
+        return ''
+    names = ', '.join(f"**{e['name']}**" for e in failed_endpoints)
+    return f" (no answer from Rancher endpoint(s) {names}; their clusters are missing or last known)"
+
+
+def format_response(results, intent, keyword, data_age=None, suggestions=None):
+    """
+    Format Rancher API results into a chat response. With federated Rancher
+    endpoints, ones that failed or timed out are listed in failed_endpoints.
+    """
+    failed_endpoints = rancher_client.failed_endpoints()
     if not results:
-        msg = (
-            f"I couldn't find any cluster matching '**{keyword}**'. "
-            "Try 'list all clusters' to see everything, or check the cluster name."
-        )
-        return {'message': msg, 'results': [], 'count': 0}
+        if suggestions:
+            names = ', '.join(f"**{s['name']}**" for s in suggestions)
+            msg = (
+                f"I couldn't find any cluster matching '**{keyword}**'. "
+                f"Did you mean: {names}?"
+            )
+        else:
+            msg = (
+                f"I couldn't find any cluster matching '**{keyword}**'. "
+                "Try 'list all clusters' to see everything, or check the cluster name."
+            )
+        return {
+            'message': msg + endpoint_note(failed_endpoints),
+            'results': [],
+            'count': 0,
+            'suggestions': suggestions or [],
+            'failed_endpoints': failed_endpoints,
+        }
 
     count = len(results)
 
@@ -72,10 +128,212 @@ def format_response(results, intent, keyword):
         message = f"Found **{count}** cluster(s) matching '**{keyword}**':"
     elif intent == 'search_cluster':
         message = f"Found **{count}** cluster(s) matching '**{keyword}**':"
+    elif intent == 'top_clusters':
+        message = f"Top **{count}** cluster(s) by **{keyword}** requested vs capacity:"
+    elif intent == 'top_nodes':
+        node_count = sum(len(r.nodes) for r in results)
+        message = (
+            f"Top **{node_count}** node(s) by **{keyword}** requested vs allocatable, "
+            f"across **{count}** cluster(s):"
+        )
     else:
         message = f"Found **{count}** result(s):"
 
-    return {'message': message, 'results': results, 'count': count}
+    # ── Clusters whose node listing failed or timed out ───────────────────
+    failed = [
+        {'id': r.id, 'name': r.name, 'error': r.nodes_error}
+        for r in results if r.nodes_error
+    ]
+    if failed:
+        names = ', '.join(f['name'] for f in failed)
+        message += f" (node details unavailable for **{len(failed)}** cluster(s): {names})"
+    message += endpoint_note(failed_endpoints)
+
+    # ── Freshness of the cached Rancher data behind this answer ──────────
+    if data_age is None:
+        ages = [r.data_age_seconds for r in results if r.data_age_seconds is not None]
+        data_age = max(ages) if ages else None
+
+    return {
+        'message': message,
+        'results': results,
+        'count': count,
+        'failed_clusters': failed,
+        'failed_endpoints': failed_endpoints,
+        'data_age_seconds': data_age,
+    }
+
+
+def page_summary(summary, intent, keyword):
+    """
+    What a chat answer carries of a cluster's nodes: top_nodes answers keep
+    their ranked nodes, node searches the first page of matching nodes, and
+    everything else none. The rest is fetched from /api/clusters/<id>/nodes
+    with the summary's ``nodes_next`` cursor, so an answer's size grows with
+    the number of clusters, not nodes.
+    """
+    if intent == 'top_nodes':
+        return summary
+    if intent == 'node_detail':
+        return summary.node_page(NODES_PAGE_SIZE, query=keyword)
+    return summary.node_page(0)
+
+
+# ── Inventory Lookup ──────────────────────────────────────────────────────────
+
+def query_inventory(parsed, snapshot=None):
+    """
+    Resolve a parsed query to cluster summaries (from ``snapshot`` if given,
+    else the current one when the snapshot is enabled).
+    Returns (results, data_age_seconds); data_age is None when the results
+    carry their own per-summary age.
+    """
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    if snapshot is not None or INVENTORY_SNAPSHOT_ENABLED:
+        snapshot = snapshot or inventory.current()
+        if intent in ('top_clusters', 'top_nodes'):
+            results = snapshot.top_utilization(intent, keyword, parsed.get('limit', 10))
+        elif intent == 'list_clusters' or not keyword:
+            results = snapshot.all_clusters()
+        elif intent == 'node_detail':
+            results = snapshot.find_nodes(keyword)
+        else:
+            results = snapshot.find_clusters(keyword)
+        return results, snapshot.age_seconds()
+
+    # ── Direct Rancher lookups ────────────────────────────────────────────
+    if intent in ('top_clusters', 'top_nodes'):
+        summaries = rancher_client.get_cluster_summary()
+        results = rank_utilization(
+            summaries, ResourceTable(summaries), intent, keyword, parsed.get('limit', 10)
+        )
+    elif intent == 'list_clusters':
+        results = rancher_client.get_cluster_summary()
+    elif intent in ('cluster_detail', 'search_cluster'):
+        if keyword:
+            results = rancher_client.get_cluster_summary(cluster_name=keyword)
+        else:
+            results = rancher_client.get_cluster_summary()
+    elif intent == 'node_detail':
+        # Search all clusters and filter nodes by name
+        all_summaries = rancher_client.get_cluster_summary()
+        results = []
+        kw_lower = keyword.lower()
+        for s in all_summaries:
+            matching_nodes = [
+                n for n in s.nodes
+                if kw_lower in n.name.lower()
+            ]
+            if matching_nodes:
+                results.append(s.with_nodes(matching_nodes))
+    else:
+        results = rancher_client.get_cluster_summary(cluster_name=keyword)
+    return results, None
+
+
+def stream_inventory(parsed):
+    """
+    Like query_inventory, but returns (iterator of summaries, data_age) so
+    results can be sent as they arrive. Direct cluster and node lookups fan
+    out per cluster and yield each summary as soon as its nodes are in;
+    snapshot answers and top-N rankings (which need every node) are
+    yielded from the finished list.
+    """
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    if INVENTORY_SNAPSHOT_ENABLED or intent in ('top_clusters', 'top_nodes'):
+        results, data_age = query_inventory(parsed)
+        return iter(results), data_age
+
+    if intent == 'node_detail':
+        kw_lower = keyword.lower()
+
+        def matching_nodes():
+            for s in rancher_client.iter_cluster_summary():
+                nodes = [n for n in s.nodes if kw_lower in n.name.lower()]
+                if nodes:
+                    yield s.with_nodes(nodes)
+        return matching_nodes(), None
+
+    if intent == 'list_clusters' or not keyword:
+        return rancher_client.iter_cluster_summary(), None
+    return rancher_client.iter_cluster_summary(cluster_name=keyword), None
+
+
+def suggest_names(keyword):
+    """Closest cluster/node names for a keyword that matched nothing."""
+    if not INVENTORY_SNAPSHOT_ENABLED or not keyword:
+        return []
+    return inventory.current().suggest(keyword)
+
+
+# ── Cached Answers ────────────────────────────────────────────────────────────
+
+# Stands in for data_age_seconds while an answer is serialized; the real
+# age is spliced in per response
+DATA_AGE_SLOT = '__data_age_seconds__'
+DATA_AGE_NEEDLE = json.dumps(DATA_AGE_SLOT).encode()
+
+
+def render_answer(parsed, snapshot, stream):
+    """Serialize the answer to a query from a snapshot, as JSON or NDJSON."""
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+    results, _ = query_inventory(parsed, snapshot)
+    results = [page_summary(r, intent, keyword) for r in results]
+    suggestions = (snapshot.suggest(keyword) if keyword else []) if not results else None
+    response = format_response(results, intent, keyword, DATA_AGE_SLOT, suggestions)
+    if stream:
+        done = {k: v for k, v in response.items() if k != 'results'}
+        body = ''.join([
+            ndjson_line({'type': 'start', 'intent': intent, 'keyword': keyword}),
+            *(ndjson_line({'type': 'cluster', 'cluster': r}) for r in results),
+            ndjson_line({'type': 'done', **done}),
+        ]).encode()
+    else:
+        body = app.json.dumps(response).encode()
+    # An answer with no results carries no data age
+    head, found, tail = body.partition(DATA_AGE_NEEDLE)
+    return CachedAnswer(head, tail if found else None, snapshot.version)
+
+
+def cached_answer(parsed, stream):
+    """
+    (CachedAnswer, snapshot) for a query answered from the inventory
+    snapshot, rendered once per (format, intent, keyword, limit) and
+    snapshot version; None when answers aren't cached (snapshot or answer
+    cache disabled). A hit skips the lookup, formatting and serialization.
+    Answers also differ by which federated endpoints are failing.
+    """
+    if not (INVENTORY_SNAPSHOT_ENABLED and CHAT_ANSWER_CACHE_ENTRIES > 0):
+        return None
+    snapshot = inventory.current()
+    key = (
+        'ndjson' if stream else 'json', parsed['intent'], parsed['keyword'], parsed.get('limit'),
+        tuple(e['name'] for e in rancher_client.failed_endpoints()),
+    )
+    with stage('cache'):
+        answer = answer_cache.get(snapshot.version, key)
+    if answer is None:
+        with stage('render'):
+            answer = render_answer(parsed, snapshot, stream)
+        answer_cache.put(snapshot.version, key, answer)
+    return answer, snapshot
+
+
+def answer_response(answer, snapshot, stream):
+    """Response for a cached answer, or 304 Not Modified if the client has it."""
+    headers = {'ETag': answer.etag, 'Cache-Control': 'no-cache'}
+    if answer.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    return Response(
+        answer.body(snapshot.age_seconds()),
+        mimetype='application/x-ndjson' if stream else 'application/json',
+        headers=headers,
+    )
 
 
 # ── Routes ────────────────────────────────────────────────────────────────────
@@ -86,46 +344,140 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/chat', methods=['POST'])
+def wants_stream():
+    """True when the client asked for an NDJSON stream (Accept header or ?stream=1)."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+def ndjson_line(obj):
+    return app.json.dumps(obj) + '\n'
+
+
+def stream_chat(parsed):
+    """
+    NDJSON response for a chat query, one JSON object per line:
+    a 'start' line, one 'cluster' line per summary as it arrives, then a
+    'done' line with the message, count, failed clusters and data age
+    (or an 'error' line if Rancher fails part-way through).
+    """
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    def generate():
+        yield ndjson_line({'type': 'start', 'intent': intent, 'keyword': keyword})
+        try:
+            summaries, data_age = stream_inventory(parsed)
+            results = []
+            for summary in summaries:
+                results.append(summary)
+                yield ndjson_line({'type': 'cluster', 'cluster': page_summary(summary, intent, keyword)})
+            suggestions = suggest_names(keyword) if not results else None
+            response = format_response(results, intent, keyword, data_age, suggestions)
+            del response['results']
+            yield ndjson_line({'type': 'done', **response})
+        except RuntimeError as e:
+            yield ndjson_line({'type': 'error', 'error': str(e), 'status': 503})
+        except Exception as e:
+            yield ndjson_line({'type': 'error', 'error': f'An error occurred: {str(e)}', 'status': 500})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/chat', methods=['GET', 'POST'])
 def chat():
-    """Handle chatbot queries via Rancher API."""
+    """
+    Handle chatbot queries via Rancher API.
+    Clients that accept application/x-ndjson (or pass ?stream=1) get the
+    results streamed cluster by cluster; see stream_chat.
+    Answers from the inventory snapshot come from the answer cache with an
+    ETag; GET /api/chat?message=... lets browsers revalidate them.
+    Each stage is timed into /metrics (and the Server-Timing header when
+    SERVER_TIMING_ENABLED).
+    """
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         user_query = data.get('message', '').strip()
 
         if not user_query:
             return jsonify({'error': 'Please enter a message'}), 400
 
-        parsed = parse_user_query(user_query)
-        intent = parsed['intent']
-        keyword = parsed['keyword']
-
-        # ── Dispatch to Rancher ───────────────────────────────────────────
-        if intent == 'list_clusters':
-            results = rancher_client.get_cluster_summary()
-        elif intent in ('cluster_detail', 'search_cluster'):
-            if keyword:
-                results = rancher_client.get_cluster_summary(cluster_name=keyword)
+        with timed_request() as timings:
+            with stage('parse'):
+                parsed = parse_user_query(user_query)
+            intent = parsed['intent']
+            keyword = parsed['keyword']
+            stream = wants_stream()
+
+            cached = cached_answer(parsed, stream)
+            if cached is not None:
+                response = answer_response(*cached, stream)
+            elif stream:
+                return stream_chat(parsed)
             else:
-                results = rancher_client.get_cluster_summary()
-        elif intent == 'node_detail':
-            # Search all clusters and filter nodes by name
-            all_summaries = rancher_client.get_cluster_summary()
-            results = []
-            kw_lower = keyword.lower()
-            for s in all_summaries:
-                matching_nodes = [
-                    n for n in s.get('nodes', [])
-                    if kw_lower in n['name'].lower()
-                ]
-                if matching_nodes:
-                    results.append({**s, 'nodes': matching_nodes})
-        else:
-            results = rancher_client.get_cluster_summary(cluster_name=keyword)
+                with stage('lookup'):
+                    results, data_age = query_inventory(parsed)
+                with stage('format'):
+                    results = [page_summary(r, intent, keyword) for r in results]
+                    suggestions = suggest_names(keyword) if not results else None
+                    response = format_response(results, intent, keyword, data_age, suggestions)
+                with stage('serialize'):
+                    response = jsonify(response)
+        if SERVER_TIMING_ENABLED:
+            response.headers['Server-Timing'] = timings.header()
+        return response
 
-        response = format_response(results, intent, keyword)
-        return jsonify(response)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
+@app.route('/api/clusters/<cluster_id>/nodes', methods=['GET'])
+def cluster_nodes(cluster_id):
+    """
+    One page of a cluster's nodes, sorted by name.
+    Query args: ``cursor`` (a chat answer's ``nodes_next`` or a previous
+    page's ``next_cursor``; omit for the first page), ``limit`` and ``q``
+    (only nodes whose name contains it).
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', NODES_PAGE_SIZE)), 1), NODES_PAGE_MAX)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    query = request.args.get('q', '').strip().lower()
 
+    try:
+        if INVENTORY_SNAPSHOT_ENABLED:
+            snapshot = inventory.current()
+            nodes = snapshot.cluster_nodes(cluster_id)
+            data_age = snapshot.age_seconds()
+        elif any(c.id == cluster_id for c in rancher_client.get_all_clusters()):
+            nodes = sort_nodes(rancher_client.get_cluster_nodes(cluster_id))
+            data_age = None
+        else:
+            nodes = None
+        if nodes is None:
+            return jsonify({'error': f'Unknown cluster: {cluster_id}'}), 404
+
+        if query:
+            nodes = [n for n in nodes if query in n.name.lower()]
+        page, next_cursor = page_nodes(nodes, request.args.get('cursor'), limit)
+        return jsonify({
+            'cluster_id': cluster_id,
+            'nodes': page,
+            'next_cursor': next_cursor,
+            'total': len(nodes),
+            'data_age_seconds': data_age,
+        })
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 503
     except Exception as e:
@@ -134,14 +486,68 @@ def chat():
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    """Return aggregate cluster and node statistics from Rancher."""
+    """
+    Return aggregate cluster and node statistics.
+    Served from the inventory snapshot once it exists; until then (e.g. on
+    first page load) from cluster metadata, while the snapshot builds.
+    """
     try:
-        stats = rancher_client.get_statistics()
+        snapshot = inventory.peek() if INVENTORY_SNAPSHOT_ENABLED else None
+        if snapshot is not None:
+            stats = {
+                **snapshot.stats,
+                'data_age_seconds': snapshot.age_seconds(),
+                'last_refresh': inventory.last_refresh,
+                'failed_endpoints': rancher_client.failed_endpoints(),
+            }
+        else:
+            if INVENTORY_SNAPSHOT_ENABLED:
+                inventory.start()
+            stats = rancher_client.get_statistics()
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': f'Error fetching statistics: {str(e)}'}), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text-format metrics (see metrics_utils)."""
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled (METRICS_ENABLED)'}), 404
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/api/events', methods=['GET'])
+def events():
+    """
+    Server-Sent Events stream of inventory changes (node went NotReady,
+    cluster added, ...), found by diffing consecutive snapshots. Clients
+    reconnecting with Last-Event-ID get the buffered events they missed.
+    """
+    if not (INVENTORY_SNAPSHOT_ENABLED and EVENTS_ENABLED):
+        return jsonify({'error': 'Live events need the inventory snapshot and EVENTS_ENABLED'}), 503
+    inventory.start()
+    last_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    )
+    sub = event_bus.subscribe(last_event_id=last_id)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = sub.get(timeout=EVENTS_HEARTBEAT_SECONDS)
+                yield sse_format(event) if event is not None else ': keep-alive\n\n'
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 # ── Excel add-record endpoint commented out ───────────────────────────────────
 # @app.route('/api/add', methods=['POST'])
 # def add_record():
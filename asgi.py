@@ -0,0 +1,336 @@
+"""
+Platform Engineering Chatbot - ASGI entry point
+Serves /api/chat, /api/stats and /api/events on the event loop with non-blocking Rancher
+I/O (async_rancher_utils), so one worker keeps many requests in flight while
+they wait on Rancher. Every other path (UI, static files) is passed through
+to the Flask app in app.py.
+
+Run with:  uvicorn asgi:application --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from app import (
+    app as flask_app, parse_user_query, format_response, query_inventory, suggest_names,
+    page_summary, cached_answer,
+)
+from async_rancher_utils import async_rancher_client
+from rancher_utils import rancher_client
+from inventory_utils import inventory
+from resource_utils import ResourceTable, rank_utilization
+from events_utils import AsyncSubscription, event_bus, sse_format, parse_last_event_id
+from metrics_utils import http_request_seconds, stage, timed_request
+from config import (
+    INVENTORY_SNAPSHOT_ENABLED, EVENTS_ENABLED, EVENTS_HEARTBEAT_SECONDS, SERVER_TIMING_ENABLED,
+    RANCHER_ENDPOINTS,
+)
+
+wsgi_app = WSGIMiddleware(flask_app)
+# Same as flask_cors' defaults on the Flask routes (preflights go through Flask)
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+
+# ── Inventory Lookup ──────────────────────────────────────────────────────────
+
+async def query_inventory_async(parsed):
+    """
+    Async app.query_inventory. Snapshot answers are in-memory (the first
+    snapshot build runs in a worker thread); direct lookups use the async
+    Rancher client, or with federated endpoints the sync
+    FederatedRancherClient in a worker thread.
+    """
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    if INVENTORY_SNAPSHOT_ENABLED:
+        if inventory.peek() is None:
+            await asyncio.to_thread(inventory.current)
+        return query_inventory(parsed)
+    if RANCHER_ENDPOINTS:
+        return await asyncio.to_thread(query_inventory, parsed)
+
+    if intent in ('top_clusters', 'top_nodes'):
+        summaries = await async_rancher_client.get_cluster_summary()
+        results = rank_utilization(
+            summaries, ResourceTable(summaries), intent, keyword, parsed.get('limit', 10)
+        )
+    elif intent == 'list_clusters' or not keyword:
+        results = await async_rancher_client.get_cluster_summary()
+    elif intent == 'node_detail':
+        kw_lower = keyword.lower()
+        results = []
+        for s in await async_rancher_client.get_cluster_summary():
+            matching_nodes = [n for n in s.nodes if kw_lower in n.name.lower()]
+            if matching_nodes:
+                results.append(s.with_nodes(matching_nodes))
+    else:
+        results = await async_rancher_client.get_cluster_summary(cluster_name=keyword)
+    return results, None
+
+
+async def stream_inventory_async(parsed):
+    """Async app.stream_inventory: yields summaries as each cluster's nodes arrive."""
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    if INVENTORY_SNAPSHOT_ENABLED or RANCHER_ENDPOINTS or intent in ('top_clusters', 'top_nodes'):
+        results, _ = await query_inventory_async(parsed)
+        for summary in results:
+            yield summary
+        return
+
+    kw_lower = keyword.lower()
+    if intent in ('node_detail', 'list_clusters') or not keyword:
+        summaries = async_rancher_client.iter_cluster_summary()
+    else:
+        summaries = async_rancher_client.iter_cluster_summary(cluster_name=keyword)
+    async for s in summaries:
+        if intent != 'node_detail':
+            yield s
+            continue
+        matching_nodes = [n for n in s.nodes if kw_lower in n.name.lower()]
+        if matching_nodes:
+            yield s.with_nodes(matching_nodes)
+
+
+# ── ASGI plumbing ─────────────────────────────────────────────────────────────
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = flask_app.json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            *CORS_HEADERS,
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_answer(scope, send, answer, snapshot, stream, headers=()):
+    """A cached chat answer (see app.cached_answer), or 304 if the client has it."""
+    headers = [(b'etag', answer.etag.encode()), (b'cache-control', b'no-cache'), *CORS_HEADERS, *headers]
+    if_none_match = dict(scope.get('headers', [])).get(b'if-none-match', b'').decode('latin-1')
+    if answer.matches(if_none_match):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    body = answer.body(snapshot.age_seconds())
+    content_type = b'application/x-ndjson' if stream else b'application/json'
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def wants_stream(scope):
+    """app.wants_stream for a raw ASGI scope."""
+    query = scope.get('query_string', b'').decode('latin-1')
+    if any(part in ('stream=1', 'stream=true', 'stream=yes') for part in query.lower().split('&')):
+        return True
+    headers = dict(scope.get('headers', []))
+    return headers.get(b'accept', b'').split(b',')[0].strip() == b'application/x-ndjson'
+
+
+# ── Routes ────────────────────────────────────────────────────────────────────
+
+async def chat(scope, receive, send):
+    """Async /api/chat, with the same JSON and NDJSON responses as app.chat."""
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+        user_query = data.get('message', '').strip()
+        if not user_query:
+            return await send_json(send, {'error': 'Please enter a message'}, 400)
+
+        with timed_request() as timings:
+            with stage('parse'):
+                parsed = parse_user_query(user_query)
+            intent = parsed['intent']
+            keyword = parsed['keyword']
+            stream = wants_stream(scope)
+
+            if INVENTORY_SNAPSHOT_ENABLED and inventory.peek() is None:
+                await asyncio.to_thread(inventory.current)
+            cached = cached_answer(parsed, stream)
+            if cached is None:
+                if stream:
+                    return await stream_chat(send, parsed)
+                with stage('lookup'):
+                    results, data_age = await query_inventory_async(parsed)
+                with stage('format'):
+                    results = [page_summary(r, intent, keyword) for r in results]
+                    suggestions = suggest_names(keyword) if not results else None
+                    response = format_response(results, intent, keyword, data_age, suggestions)
+        # Serialization happens in send_json, so it isn't a stage here
+        headers = [(b'server-timing', timings.header().encode())] if SERVER_TIMING_ENABLED else []
+        if cached is not None:
+            return await send_answer(scope, send, *cached, stream, headers)
+        await send_json(send, response, headers=headers)
+
+    except RuntimeError as e:
+        await send_json(send, {'error': str(e)}, 503)
+    except Exception as e:
+        await send_json(send, {'error': f'An error occurred: {str(e)}'}, 500)
+
+
+async def stream_chat(send, parsed):
+    """NDJSON stream in the format of app.stream_chat."""
+    intent = parsed['intent']
+    keyword = parsed['keyword']
+
+    async def line(obj, more=True):
+        await send({
+            'type': 'http.response.body',
+            'body': (flask_app.json.dumps(obj) + '\n').encode(),
+            'more_body': more,
+        })
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'application/x-ndjson'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            *CORS_HEADERS,
+        ],
+    })
+    await line({'type': 'start', 'intent': intent, 'keyword': keyword})
+    try:
+        results = []
+        async for summary in stream_inventory_async(parsed):
+            results.append(summary)
+            await line({'type': 'cluster', 'cluster': page_summary(summary, intent, keyword)})
+        data_age = inventory.current().age_seconds() if INVENTORY_SNAPSHOT_ENABLED else None
+        suggestions = suggest_names(keyword) if not results else None
+        response = format_response(results, intent, keyword, data_age, suggestions)
+        del response['results']
+        await line({'type': 'done', **response}, more=False)
+    except RuntimeError as e:
+        await line({'type': 'error', 'error': str(e), 'status': 503}, more=False)
+    except Exception as e:
+        await line({'type': 'error', 'error': f'An error occurred: {str(e)}', 'status': 500}, more=False)
+
+
+async def get_stats(scope, receive, send):
+    """Async /api/stats (see app.get_stats)."""
+    try:
+        snapshot = inventory.peek() if INVENTORY_SNAPSHOT_ENABLED else None
+        if snapshot is not None:
+            stats = {
+                **snapshot.stats,
+                'data_age_seconds': snapshot.age_seconds(),
+                'last_refresh': inventory.last_refresh,
+                'failed_endpoints': rancher_client.failed_endpoints(),
+            }
+        else:
+            if INVENTORY_SNAPSHOT_ENABLED:
+                inventory.start()
+            if RANCHER_ENDPOINTS:
+                stats = await asyncio.to_thread(rancher_client.get_statistics)
+            else:
+                stats = await async_rancher_client.get_statistics()
+        await send_json(send, stats)
+    except Exception as e:
+        await send_json(send, {'error': f'Error fetching statistics: {str(e)}'}, 500)
+
+
+async def events(scope, receive, send):
+    """
+    Async /api/events (see app.events). Each SSE client is a queue on the
+    event loop rather than a blocked WSGI thread.
+    """
+    if not (INVENTORY_SNAPSHOT_ENABLED and EVENTS_ENABLED):
+        return await send_json(send, {'error': 'Live events need the inventory snapshot and EVENTS_ENABLED'}, 503)
+    inventory.start()
+    headers = dict(scope.get('headers', []))
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    last_id = parse_last_event_id(
+        headers.get(b'last-event-id', b'').decode('latin-1') or query.get('last_event_id', [None])[0]
+    )
+    sub = event_bus.subscribe(
+        AsyncSubscription(asyncio.get_running_loop(), event_bus.queue_size), last_event_id=last_id,
+    )
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    disconnected = asyncio.ensure_future(wait_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *CORS_HEADERS,
+            ],
+        })
+        chunk = 'retry: 5000\n\n'
+        while not disconnected.done():
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+            event = await sub.get(timeout=EVENTS_HEARTBEAT_SECONDS)
+            chunk = sse_format(event) if event is not None else ': keep-alive\n\n'
+    except OSError:
+        pass
+    finally:
+        event_bus.unsubscribe(sub)
+        disconnected.cancel()
+
+
+ROUTES = {
+    ('POST', '/api/chat'): chat,
+    ('GET', '/api/stats'): get_stats,
+    ('GET', '/api/events'): events,
+}
+
+
+async def application(scope, receive, send):
+    """ASGI callable: async routes natively, everything else via the Flask app."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_rancher_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    handler = ROUTES.get((scope.get('method'), scope.get('path')))
+    if handler is not None:
+        return await handler(scope, receive, timed_send(scope, send))
+    return await wsgi_app(scope, receive, send)
+
+
+def timed_send(scope, send):
+    """Wrap send to record the request latency (to headers) like app.record_request_latency."""
+    started = time.perf_counter()
+
+    async def send_and_time(message):
+        if message['type'] == 'http.response.start':
+            http_request_seconds.observe(
+                time.perf_counter() - started, scope['method'], scope['path'], str(message['status'])
+            )
+        await send(message)
+    return send_and_time
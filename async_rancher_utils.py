@@ -0,0 +1,393 @@
+"""
+Async Rancher API client for the ASGI entry point (asgi.py).
+Same records, cache and error messages as rancher_utils.RancherClient, but
+requests go through one pooled httpx.AsyncClient, so a single event loop
+can keep many chat requests waiting on Rancher without a thread each.
+Talks to one Rancher server: with federated endpoints (RANCHER_ENDPOINTS)
+asgi.py answers through the sync FederatedRancherClient in worker threads.
+Needs the optional httpx package.
+"""
+import asyncio
+import time
+
+try:
+    import httpx
+except ImportError:  # optional: only asgi.py needs it
+    httpx = None
+
+from config import (
+    RANCHER_PAGE_LIMIT, RANCHER_MAX_CONCURRENCY, RANCHER_FANOUT_TIMEOUT,
+    RANCHER_BULK_NODES_THRESHOLD, RANCHER_CACHE_CLUSTERS_TTL, RANCHER_CACHE_NODES_TTL,
+    RANCHER_ASYNC_MAX_CONNECTIONS,
+)
+from cache_utils import PageCache, CachedPage
+from json_utils import parse_collection
+from metrics_utils import observe_rancher
+from rancher_utils import RancherClient, rancher_client, _age_seconds
+from resource_utils import fleet_statistics
+from record_utils import ClusterSummary
+from retry_utils import RETRY_STATUSES, CircuitOpenError, backoff_delay, is_server_failure
+
+
+class AsyncRancherClient:
+    """
+    asyncio client for the Rancher v3 API.
+
+    Mirrors the sync client (its first endpoint, if federated) and shares
+    its InventoryCache, conditional-GET page cache, transfer stats and
+    circuit breaker by default, so the snapshotter, exports and async
+    requests all reuse each other's listings and agree on whether Rancher
+    is healthy.
+    Fresh entries are served directly, stale ones while a background task
+    reloads them, and concurrent misses for one key share a single load.
+    """
+
+    def __init__(self, cache=None, breaker=None):
+        sync = self._sync = rancher_client.endpoints[0]
+        self.base_url = sync.base_url
+        self.headers = {
+            'Authorization': sync.session.headers['Authorization'],
+            'Content-Type': 'application/json',
+        }
+        self.verify_ssl = sync.verify_ssl
+        self.page_limit = RANCHER_PAGE_LIMIT
+        self.max_concurrency = max(1, RANCHER_MAX_CONCURRENCY)
+        self.max_connections = max(1, RANCHER_ASYNC_MAX_CONNECTIONS)
+        self.fanout_timeout = RANCHER_FANOUT_TIMEOUT
+        self.bulk_nodes_threshold = RANCHER_BULK_NODES_THRESHOLD
+        self.clusters_ttl = RANCHER_CACHE_CLUSTERS_TTL
+        self.nodes_ttl = RANCHER_CACHE_NODES_TTL
+        self.timeout = sync.timeout
+        self.retries = sync.retries
+        self.backoff_base = sync.backoff_base
+        self.backoff_max = sync.backoff_max
+        self.cache = cache if cache is not None else sync.cache
+        self.breaker = breaker if breaker is not None else sync.breaker
+        self.pages = sync.pages
+        self.transfer = sync.transfer
+        self._client = None
+        self._inflight = {}
+
+    def _http(self):
+        """The pooled httpx.AsyncClient, created on first use inside the event loop."""
+        if httpx is None:
+            raise RuntimeError("The async Rancher client needs httpx (pip install httpx).")
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                verify=self.verify_ssl,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close pooled connections (call on event loop shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._inflight.clear()
+
+    async def _get(self, path, params=None):
+        """Internal GET request helper; returns parsed JSON."""
+        return await self._get_url(f"{self.base_url}{path}", params=params)
+
+    async def _get_url(self, url, params=None):
+        """GET an absolute URL; returns parsed JSON."""
+        resp = await self._fetch(url, params)
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+
+    async def _fetch(self, url, params=None, headers=None):
+        """
+        Async RancherClient._fetch: the response (2xx or 304), with the same
+        retries and circuit breaker.
+        """
+        client = self._http()
+        if not self.breaker.allow():
+            raise CircuitOpenError(self._sync._circuit_open_message())
+        try:
+            resp = await self._send_with_retries(client, url, params, headers)
+            if resp.status_code != 304:  # httpx treats 3xx as errors here too
+                resp.raise_for_status()
+        except httpx.ConnectError:
+            self.breaker.record_failure()
+            raise RuntimeError(
+                f"Cannot connect to Rancher at {self.base_url}. "
+                "Check RANCHER_BASE_URL in config.py."
+            )
+        except httpx.TimeoutException:
+            self.breaker.record_failure()
+            raise RuntimeError(f"Rancher at {self.base_url} did not respond within {self.timeout:g}s.")
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if is_server_failure(status):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise RuntimeError(f"Rancher API error (HTTP {status}): {e}")
+        except Exception as e:
+            self.breaker.record_failure()
+            raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+        self.breaker.record_success()
+        return resp
+
+    async def _send_with_retries(self, client, url, params=None, headers=None):
+        """Async RancherClient._send_with_retries."""
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            started = time.perf_counter()
+            try:
+                resp = await client.get(url, params=params, headers=headers)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                status = 'timeout' if isinstance(e, httpx.TimeoutException) else 'error'
+                observe_rancher(url, status, time.perf_counter() - started)
+                if last_attempt:
+                    raise
+                retry_after = None
+            else:
+                observe_rancher(url, resp.status_code, time.perf_counter() - started)
+                if last_attempt or resp.status_code not in RETRY_STATUSES:
+                    return resp
+                retry_after = resp.headers.get('Retry-After')
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+
+    async def _get_page(self, url, params=None, parse=None):
+        """Async RancherClient._get_page: (items, next_url), conditional when possible."""
+        key = PageCache.key(url, params)
+        cached = self.pages.get(key)
+        resp = await self._fetch(url, params, headers=cached.validators() if cached else None)
+        if resp.status_code == 304 and cached is not None:
+            self.transfer.record(resp.num_bytes_downloaded, not_modified=True)
+            return cached.items, cached.next_url
+
+        started = time.perf_counter()
+        try:
+            # Streamed: each item is projected by parse() as soon as it's decoded
+            items, fields = parse_collection(resp.content.decode('utf-8'), parse)
+        except ValueError as e:
+            raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+        next_url = (fields.get('pagination') or {}).get('next')
+        self.transfer.record(
+            resp.num_bytes_downloaded, len(resp.content), time.perf_counter() - started
+        )
+
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.pages.put(key, CachedPage(etag, last_modified, items, next_url))
+        return items, next_url
+
+    async def iter_collection(self, path, params=None, limit=None, parse=None):
+        """Async version of RancherClient.iter_collection (follows pagination.next)."""
+        params = dict(params or {})
+        params.setdefault('limit', limit or self.page_limit)
+        items, next_url = await self._get_page(f"{self.base_url}{path}", params, parse)
+        while True:
+            for item in items:
+                yield item
+            if not next_url:
+                return
+            items, next_url = await self._get_page(next_url, parse=parse)
+
+    # ── Cache ─────────────────────────────────────────────────────────────────
+
+    async def _cached(self, key, loader, ttl):
+        """Return (value, fetched_at) for key, awaiting loader() only when needed."""
+        fresh = self.cache.peek(key, fresh_only=True)
+        if fresh is not None:
+            return fresh
+        stale = self.cache.peek(key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        if stale is not None:
+            return stale
+        # Shielded so a cancelled waiter doesn't abort the load others share
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader, ttl):
+        value = await loader()
+        fetched_at = time.time()
+        self.cache.put(key, value, ttl)
+        return value, fetched_at
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # background refresh failures are retried on next use
+
+    # ── Clusters and nodes ────────────────────────────────────────────────────
+
+    async def _list_clusters(self):
+        return [
+            c async for c in self.iter_collection('/v3/clusters', parse=RancherClient._parse_cluster)
+        ]
+
+    async def _list_nodes(self, cluster_id=None):
+        params = {'clusterId': cluster_id} if cluster_id else None
+        return [
+            n async for n in self.iter_collection(
+                '/v3/nodes', params=params, parse=RancherClient._parse_node
+            )
+        ]
+
+    async def _build_node_index(self):
+        index = {}
+        for node in await self._list_nodes():
+            index.setdefault(node.cluster_id, []).append(node)
+        return index
+
+    async def _cached_clusters(self):
+        return await self._cached('clusters', self._list_clusters, self.clusters_ttl)
+
+    async def _cached_cluster_nodes(self, cluster_id):
+        return await self._cached(
+            ('nodes', cluster_id), lambda: self._list_nodes(cluster_id), self.nodes_ttl
+        )
+
+    async def _cached_node_index(self):
+        return await self._cached('node_index', self._build_node_index, self.nodes_ttl)
+
+    async def get_all_clusters(self):
+        """Return the cached list of cluster records (treat as read-only)."""
+        return (await self._cached_clusters())[0]
+
+    async def get_cluster_nodes(self, cluster_id):
+        """Return the cached node records of one cluster (treat as read-only)."""
+        return (await self._cached_cluster_nodes(cluster_id))[0]
+
+    async def _fan_out(self, cluster_ids):
+        """
+        Fetch nodes for several clusters concurrently, at most
+        ``max_concurrency`` requests in flight for this call.
+        Yields (cluster_id, nodes, fetched_at, error) as each cluster completes;
+        clusters still pending after ``fanout_timeout`` are yielded as timed out.
+        """
+        cluster_ids = list(cluster_ids)
+        if not cluster_ids:
+            return
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(cid):
+            async with semaphore:
+                return await self._cached_cluster_nodes(cid)
+
+        tasks = {asyncio.ensure_future(fetch(cid)): cid for cid in cluster_ids}
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.fanout_timeout
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is not None:
+                        yield tasks[task], [], None, str(task.exception())
+                    else:
+                        nodes, fetched_at = task.result()
+                        yield tasks[task], nodes, fetched_at, None
+            for task in pending:
+                yield tasks[task], [], None, f'timed out after {self.fanout_timeout:g}s'
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _nodes_for_clusters(self, cluster_ids):
+        """Async RancherClient._nodes_for_clusters: (nodes_by_cluster, errors, oldest fetched_at)."""
+        cluster_ids = list(cluster_ids)
+        if len(cluster_ids) >= self.bulk_nodes_threshold:
+            try:
+                index, fetched_at = await self._cached_node_index()
+                return {cid: index.get(cid, []) for cid in cluster_ids}, {}, fetched_at
+            except Exception:
+                pass
+
+        nodes_by_cluster = {}
+        errors = {}
+        oldest = None
+        async for cid, nodes, fetched_at, error in self._fan_out(cluster_ids):
+            nodes_by_cluster[cid] = nodes
+            if error:
+                errors[cid] = error
+            elif oldest is None or fetched_at < oldest:
+                oldest = fetched_at
+        return nodes_by_cluster, errors, oldest
+
+    async def _match_clusters(self, cluster_id=None, cluster_name=None):
+        all_clusters, clusters_at = await self._cached_clusters()
+        if cluster_name:
+            name_lower = cluster_name.lower()
+            matches = [c for c in all_clusters if name_lower in c.name.lower()]
+        elif cluster_id:
+            matches = [c for c in all_clusters if c.id == cluster_id]
+        else:
+            matches = all_clusters
+        return matches, clusters_at
+
+    async def get_cluster_summary(self, cluster_id=None, cluster_name=None):
+        """Async RancherClient.get_cluster_summary: a list of ClusterSummary."""
+        matches, clusters_at = await self._match_clusters(cluster_id, cluster_name)
+        nodes_by_cluster, errors, nodes_at = await self._nodes_for_clusters(
+            c.id for c in matches
+        )
+        data_age = _age_seconds(clusters_at, nodes_at)
+        return [
+            ClusterSummary(
+                cluster,
+                nodes_by_cluster.get(cluster.id, []),
+                nodes_error=errors.get(cluster.id),
+                data_age_seconds=data_age,
+            )
+            for cluster in matches
+        ]
+
+    async def iter_cluster_summary(self, cluster_id=None, cluster_name=None):
+        """Async RancherClient.iter_cluster_summary: summaries in completion order."""
+        matches, clusters_at = await self._match_clusters(cluster_id, cluster_name)
+        by_id = {c.id: c for c in matches}
+        async for cid, nodes, nodes_at, error in self._fan_out(by_id):
+            yield ClusterSummary(
+                by_id[cid],
+                nodes,
+                nodes_error=error,
+                data_age_seconds=_age_seconds(clusters_at, nodes_at),
+            )
+
+    async def get_statistics(self):
+        """Async RancherClient.get_statistics."""
+        try:
+            clusters, clusters_at = await self._cached_clusters()
+            cached_index = self.cache.peek('node_index')
+            if cached_index is not None:
+                index, nodes_at = cached_index
+                nodes_by_cluster = {c.id: index.get(c.id, []) for c in clusters}
+                errors = {}
+            else:
+                missing = [c.id for c in clusters if c.node_count is None]
+                nodes_by_cluster, errors, nodes_at = await self._nodes_for_clusters(missing)
+                for cid in errors:
+                    nodes_by_cluster.pop(cid, None)
+
+            stats = fleet_statistics(clusters, nodes_by_cluster)
+            stats['failed_clusters'] = sorted(errors)
+            stats['data_age_seconds'] = _age_seconds(clusters_at, nodes_at)
+            return stats
+        except Exception as e:
+            return {'error': str(e), 'total_clusters': 0, 'total_nodes': 0}
+
+
+# Singleton
+async_rancher_client = AsyncRancherClient()
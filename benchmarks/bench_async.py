@@ -0,0 +1,154 @@
+"""
+Load benchmark: threaded WSGI (app.py) vs ASGI (asgi.py) /api/chat.
+
+Starts the local fake Rancher (fake_rancher.py) and both app servers as
+subprocesses under uvicorn, with the inventory snapshot off and caching
+effectively disabled so every chat request waits on Rancher. Then fires the
+same mix of cluster queries at each server at several concurrency levels
+and reports throughput, latency percentiles and Rancher calls per request.
+
+The WSGI server gets a fixed pool of --sync-threads request threads (like a
+threaded gunicorn worker); the ASGI server is a single event loop.
+
+Needs httpx and uvicorn. The load generator is a pool of client threads
+with keep-alive sessions.
+Usage:  python benchmarks/bench_async.py [--requests 400] [--concurrency 10,50,100]
+            [--latency 0.05] [--clusters 20] [--nodes 10] [--sync-threads 10]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SYNC_SERVER = (
+    "import sys, uvicorn\n"
+    "from uvicorn.middleware.wsgi import WSGIMiddleware\n"
+    "from app import app\n"
+    "uvicorn.run(WSGIMiddleware(app, workers=int(sys.argv[2])), port=int(sys.argv[1]), log_level='warning')\n"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_load(base_url, queries, total, concurrency):
+    """Send `total` chat requests, `concurrency` at a time; returns (latencies, errors, seconds)."""
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        resp = session.post(f'{base_url}/api/chat', json={'message': queries[i % len(queries)]}, timeout=120)
+        return time.perf_counter() - start, resp.status_code != 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    seconds = time.perf_counter() - start
+    return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds
+
+
+def rancher_calls(fake_url):
+    return requests.get(f'{fake_url}/_calls').json()['calls']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WSGI vs ASGI /api/chat load benchmark')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', default='10,50,100')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--clusters', type=int, default=20)
+    parser.add_argument('--nodes', type=int, default=10)
+    parser.add_argument('--sync-threads', type=int, default=10)
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    fake_port, sync_port, async_port = free_port(), free_port(), free_port()
+    fake_url = f'http://127.0.0.1:{fake_port}'
+    env = dict(
+        os.environ,
+        RANCHER_BASE_URL=fake_url,
+        INVENTORY_SNAPSHOT_ENABLED='false',
+        RANCHER_CACHE_CLUSTERS_TTL='0',
+        RANCHER_CACHE_NODES_TTL='0',
+        RANCHER_CACHE_STALE_SECONDS='0',
+    )
+    procs = [
+        subprocess.Popen([
+            sys.executable, os.path.join(HERE, 'fake_rancher.py'), '--port', str(fake_port),
+            '--clusters', str(args.clusters), '--nodes', str(args.nodes),
+            '--latency', str(args.latency),
+        ]),
+        subprocess.Popen(
+            [sys.executable, '-c', SYNC_SERVER, str(sync_port), str(args.sync_threads)],
+            cwd=ROOT, env=env,
+        ),
+        subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(async_port),
+             '--log-level', 'warning'],
+            cwd=ROOT, env=env,
+        ),
+    ]
+    try:
+        servers = [
+            (f'wsgi ({args.sync_threads} threads)', f'http://127.0.0.1:{sync_port}'),
+            ('asgi (event loop)', f'http://127.0.0.1:{async_port}'),
+        ]
+        wait_for(f'{fake_url}/_calls')
+        for _, url in servers:
+            wait_for(f'{url}/api/stats')
+
+        names = [c['name'] for c in requests.get(f'{fake_url}/v3/clusters?limit=100000').json()['data']]
+        queries = [f'cluster {name}' for name in names]
+
+        print(f"{args.clusters} clusters x {args.nodes} nodes, "
+              f"{args.latency * 1000:g} ms Rancher latency, {args.requests} requests per run\n")
+        print(f"{'server':<24}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'errors':>8}{'calls/req':>11}")
+        for concurrency in levels:
+            for label, url in servers:
+                calls_before = rancher_calls(fake_url)
+                latencies, errors, seconds = run_load(url, queries, args.requests, concurrency)
+                calls = rancher_calls(fake_url) - calls_before
+                print(f"{label:<24}{concurrency:>6}{args.requests / seconds:>9.1f}"
+                      f"{percentile(latencies, 50) * 1000:>9.0f}{percentile(latencies, 95) * 1000:>9.0f}"
+                      f"{errors:>8}{calls / args.requests:>11.2f}")
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
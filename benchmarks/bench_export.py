@@ -0,0 +1,137 @@
+"""
+Export benchmark: export_cluster_nodes.py on a synthetic fleet.
+
+Starts the local fake Rancher (fake_rancher.py) with a large fleet (default
+100 clusters x 500 nodes = 50k nodes) and runs each export mode in its own
+subprocess, reporting wall time, peak RSS and output size:
+
+  legacy xlsx   the previous exporter: bulk node listing, in-memory
+                Workbook, then a pass over every cell for column widths
+  xlsx          parallel per-cluster fetch, write-only workbook
+  csv, parquet  parallel fetch, rows streamed to disk (parquet needs pyarrow)
+
+Usage:  python benchmarks/bench_export.py [--clusters 100] [--nodes 500]
+            [--latency 0.05] [--workers 8] [--modes legacy,xlsx,csv,parquet]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MODES = ('legacy', 'xlsx', 'csv', 'parquet')
+
+
+def legacy_export(output_path):
+    """The exporter before streaming: whole Workbook in memory, widths in a second pass."""
+    sys.path.insert(0, ROOT)
+    from openpyxl import Workbook
+    import export_cluster_nodes as export
+    from rancher_utils import rancher_client
+
+    clusters = rancher_client.get_all_clusters()
+    node_index, _ = rancher_client.get_nodes_for_clusters(c.id for c in clusters)
+    wb = Workbook()
+    ws_summary = wb.active
+    ws_summary.append(export.SUMMARY_HEADERS)
+    ws_nodes = wb.create_sheet('All Nodes')
+    ws_nodes.append(export.NODE_HEADERS)
+    for cluster in clusters:
+        nodes = node_index.get(cluster.id, [])
+        ws_summary.append(export.summary_row(cluster, nodes))
+        for node in nodes:
+            ws_nodes.append(export.node_row(cluster, node))
+    for ws in (ws_summary, ws_nodes):
+        for col in ws.columns:
+            max_len = max(len(str(cell.value)) for cell in col if cell.value)
+            ws.column_dimensions[col[0].column_letter].width = min(max_len + 4, 40)
+    wb.save(output_path)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up')
+
+
+def run(cmd, env):
+    """(seconds, peak RSS MiB, exit status) of one subprocess."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux
+    return time.perf_counter() - start, usage.ru_maxrss / 1024, proc.returncode
+
+
+def output_size(path):
+    stem, ext = os.path.splitext(path)
+    return sum(os.path.getsize(p) for p in (path, f'{stem}_clusters{ext}') if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='export_cluster_nodes.py benchmark')
+    parser.add_argument('--clusters', type=int, default=100)
+    parser.add_argument('--nodes', type=int, default=500, help='nodes per cluster')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--legacy-run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.legacy_run:
+        legacy_export(args.legacy_run)
+        return
+
+    port = free_port()
+    fake_url = f'http://127.0.0.1:{port}'
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(HERE, 'fake_rancher.py'), '--port', str(port),
+        '--clusters', str(args.clusters), '--nodes', str(args.nodes),
+        '--latency', str(args.latency), '--page-size', '1000',
+    ], stdout=subprocess.DEVNULL)
+    env = dict(os.environ, RANCHER_BASE_URL=fake_url)
+    try:
+        wait_for(f'{fake_url}/_calls')
+        print(f"{args.clusters} clusters x {args.nodes} nodes = {args.clusters * args.nodes} nodes, "
+              f"{args.latency * 1000:g} ms Rancher latency, {args.workers} workers\n")
+        print(f"{'mode':<14}{'seconds':>9}{'peak RSS MiB':>14}{'output MiB':>12}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in args.modes.split(','):
+                if mode == 'legacy':
+                    path = os.path.join(tmp, 'legacy.xlsx')
+                    cmd = [sys.executable, os.path.abspath(__file__), '--legacy-run', path]
+                else:
+                    path = os.path.join(tmp, f'export.{mode}')
+                    cmd = [sys.executable, 'export_cluster_nodes.py', path,
+                           '--workers', str(args.workers), '--no-state']
+                seconds, rss, code = run(cmd, env)
+                if code != 0:
+                    print(f"{mode:<14}{'failed (exit ' + str(code) + ')':>35}")
+                    continue
+                print(f"{mode:<14}{seconds:>9.1f}{rss:>14.0f}{output_size(path) / 2 ** 20:>12.1f}")
+    finally:
+        fake.terminate()
+        fake.wait()
+
+
+if __name__ == '__main__':
+    main()
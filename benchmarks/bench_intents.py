@@ -0,0 +1,104 @@
+"""
+Intent matcher micro-benchmark.
+
+Checks intent_utils.registry against the golden corpus in intent_corpus.json,
+then times it against the original if-chain of re.search calls, and again
+with extra never-triggered rules registered to show parse time doesn't grow
+with the number of intents.
+
+Usage:  python benchmarks/bench_intents.py [iterations]
+"""
+import json
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from intent_utils import IntentRegistry, registry  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_corpus.json')
+
+
+# ── Baseline: the original inline regex chain ─────────────────────────────────
+
+def legacy_parse_user_query(query):
+    q = query.lower().strip()
+    if re.search(r'\b(list|show|get|all)\b.*\bclusters?\b', q) or q in ('clusters', 'all clusters'):
+        return {'intent': 'list_clusters', 'keyword': ''}
+    m = re.search(
+        r'(?:cluster|show me|details?(?:\s+of)?|status(?:\s+of)?)\s+([a-z0-9_\-\.]+)', q
+    )
+    if m:
+        return {'intent': 'cluster_detail', 'keyword': m.group(1)}
+    if re.search(r'\bnodes?\b', q):
+        nm = re.search(r'\bnode\s+([a-z0-9_\-\.]+)', q)
+        if nm:
+            return {'intent': 'node_detail', 'keyword': nm.group(1)}
+        return {'intent': 'list_clusters', 'keyword': ''}
+    if re.search(r'\b(cpu|memory|mem|resources?|utilization|usage)\b', q):
+        cm = re.search(r'(?:cpu|memory|mem|resources?|usage).*?\b([a-z0-9_\-\.]{3,})\b', q)
+        if cm:
+            return {'intent': 'cluster_detail', 'keyword': cm.group(1)}
+        return {'intent': 'list_clusters', 'keyword': ''}
+    return {'intent': 'search_cluster', 'keyword': query.strip()}
+
+
+def padded_registry(extra):
+    """A copy of the live registry with `extra` never-triggered rules appended."""
+    padded = IntentRegistry(fallback=registry.fallback)
+    for rule in registry.rules:
+        padded.register(rule.name, rule.triggers)(rule.resolve)
+    for i in range(extra):
+        pattern = re.compile(rf'\bzzintent{i}\b\s+(\w+)')
+
+        def resolve(q, query, pattern=pattern):
+            m = pattern.search(q)
+            return {'intent': 'extra', 'keyword': m.group(1)} if m else None
+        padded.register(f'extra_{i}', triggers=(f'zzintent{i}',))(resolve)
+    return padded
+
+
+def check_corpus(corpus):
+    """Return the corpus entries the registry gets wrong."""
+    failures = []
+    for case in corpus:
+        expected = {k: v for k, v in case.items() if k != 'query'}
+        got = registry.match(case['query'])
+        if {k: got.get(k) for k in expected} != expected:
+            failures.append((case['query'], expected, got))
+    return failures
+
+
+def time_per_query(parse, queries, iterations):
+    """Mean microseconds per parse call."""
+    total = timeit.timeit(lambda: [parse(q) for q in queries], number=iterations)
+    return total / (iterations * len(queries)) * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+    queries = [case['query'] for case in corpus]
+
+    failures = check_corpus(corpus)
+    for query, expected, got in failures:
+        print(f"MISMATCH {query!r}: expected {expected}, got {got}")
+    print(f"Golden corpus: {len(corpus) - len(failures)}/{len(corpus)} queries match")
+
+    print(f"\n{'matcher':<32}{'µs/query':>10}")
+    print(f"{'legacy if-chain':<32}{time_per_query(legacy_parse_user_query, queries, iterations):>10.2f}")
+    print(f"{'registry':<32}{time_per_query(registry.match, queries, iterations):>10.2f}")
+    for extra in (10, 100):
+        padded = padded_registry(extra)
+        label = f'registry + {extra} extra intents'
+        print(f"{label:<32}{time_per_query(padded.match, queries, iterations):>10.2f}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
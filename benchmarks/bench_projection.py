@@ -0,0 +1,153 @@
+"""
+Parse benchmark: whole-page json.loads vs streamed projection.
+
+Parses one large /v3/nodes collection page into NodeRecords both ways
+(the previous json.loads-then-project path, and json_utils.parse_collection)
+and reports the best time and the peak memory of each via tracemalloc.
+
+Pass a recorded page (e.g. `curl -H "Authorization: Bearer $TOKEN"
+"$RANCHER/v3/nodes?limit=1000" > nodes.json`) to measure real payloads;
+without one, a page of Rancher-shaped nodes with typical labels,
+annotations, links and actions is generated (--save writes it out).
+
+Usage:  python benchmarks/bench_projection.py [recorded.json] [--nodes 1000]
+            [--repeat 5] [--save path]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from json_utils import parse_collection  # noqa: E402
+from rancher_utils import RancherClient  # noqa: E402
+
+CONDITIONS = ('MemoryPressure', 'DiskPressure', 'PIDPressure', 'Ready')
+
+
+def synthetic_page(count):
+    """JSON text of a /v3/nodes page with the fields a real Rancher node carries."""
+    nodes = []
+    for i in range(count):
+        node_id = f'c-abcde:m-{i:06d}'
+        nodes.append({
+            'id': node_id,
+            'type': 'node',
+            'baseType': 'node',
+            'clusterId': 'c-abcde',
+            'nodeName': f'worker-{i:06d}',
+            'state': 'active' if i % 50 else 'unavailable',
+            'transitioning': 'no',
+            'worker': True,
+            'controlPlane': i % 20 == 0,
+            'etcd': i % 20 == 0,
+            'info': {
+                'os': {
+                    'operatingSystem': 'Ubuntu 22.04.3 LTS',
+                    'kernelVersion': '5.15.0-89-generic',
+                    'dockerVersion': 'containerd://1.7.7-k3s1',
+                },
+                'cpu': {'count': 16},
+                'memory': {'memTotalKiB': 65842396},
+                'kubernetes': {'kubeletVersion': 'v1.27.6+rke2r1', 'kubeProxyVersion': 'v1.27.6+rke2r1'},
+            },
+            'capacity': {'cpu': '16', 'memory': '65842396Ki', 'pods': '110', 'ephemeral-storage': '101430960Ki'},
+            'requested': {'cpu': f'{(i % 15) + 1}', 'memory': f'{(i % 60) + 1}Gi', 'pods': '23'},
+            'allocatable': {'cpu': '15800m', 'memory': '64818396Ki', 'pods': '110'},
+            'conditions': [
+                {
+                    'type': t,
+                    'status': 'True' if t == 'Ready' else 'False',
+                    'lastHeartbeatTime': '2024-01-01T00:00:00Z',
+                    'lastTransitionTime': '2024-01-01T00:00:00Z',
+                    'message': 'kubelet is posting ready status',
+                    'reason': 'KubeletReady',
+                }
+                for t in CONDITIONS
+            ],
+            'labels': {f'node.example.com/label-{k}': f'value-{k}-{i}' for k in range(15)},
+            'annotations': {f'rke2.io/annotation-{k}': 'x' * 120 for k in range(12)},
+            'links': {
+                rel: f'https://rancher.example.com/v3/nodes/{node_id}/{rel}'
+                for rel in ('self', 'remove', 'update', 'nodePool', 'cluster', 'nodeTemplate')
+            },
+            'actions': {
+                action: f'https://rancher.example.com/v3/nodes/{node_id}?action={action}'
+                for action in ('cordon', 'drain', 'scaledown')
+            },
+            'taints': [],
+            'volumesAttached': {},
+            'publicEndpoints': [],
+        })
+    return json.dumps({
+        'type': 'collection',
+        'resourceType': 'node',
+        'links': {'self': 'https://rancher.example.com/v3/nodes'},
+        'actions': {},
+        'pagination': {'limit': count, 'total': count},
+        'sort': {},
+        'filters': {},
+        'data': nodes,
+    })
+
+
+def whole_page(text):
+    """The previous path: materialize the page, then project every item."""
+    return [RancherClient._parse_node(n) for n in json.loads(text).get('data', [])]
+
+
+def streamed(text):
+    return parse_collection(text, RancherClient._parse_node)[0]
+
+
+def measure(parse, text, repeat):
+    """(best seconds, peak traced bytes) for parse(text)."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        records = parse(text)
+        best = min(best, time.perf_counter() - start)
+        del records
+    gc.collect()
+    tracemalloc.start()
+    records = parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collection page parse benchmark')
+    parser.add_argument('recorded', nargs='?', help='recorded /v3/nodes page (JSON)')
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='write the generated page to this path')
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded, encoding='utf-8') as f:
+            text = f.read()
+        source = args.recorded
+    else:
+        text = synthetic_page(args.nodes)
+        source = f'synthetic, {args.nodes} nodes'
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    print(f"Page: {source}, {len(text) / 2 ** 20:.2f} MiB of JSON\n")
+    print(f"{'parser':<28}{'ms':>9}{'peak MiB':>11}")
+    for label, parse in (('json.loads + project', whole_page), ('streamed projection', streamed)):
+        seconds, peak = measure(parse, text, args.repeat)
+        print(f"{label:<28}{seconds * 1000:>9.1f}{peak / 2 ** 20:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Memory benchmark: per-node dicts vs slotted NodeRecords.
+
+Builds node summaries for a synthetic fleet from freshly parsed Rancher JSON
+(so strings aren't shared by accident) both ways, drops the raw payload and
+reports the memory each representation keeps alive, via tracemalloc.
+
+Usage:  python benchmarks/bench_records.py [nodes]
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rancher_utils import rancher_client  # noqa: E402
+
+
+def synthetic_payload(count, clusters=50):
+    """JSON text of a /v3/nodes page with `count` realistic node objects."""
+    nodes = []
+    for i in range(count):
+        nodes.append({
+            'id': f'c-{i % clusters}:m-{i}',
+            'clusterId': f'c-{i % clusters}',
+            'nodeName': f'worker-{i % clusters:03d}-{i:06d}',
+            'state': 'active' if i % 50 else 'unavailable',
+            'worker': True,
+            'controlPlane': i % 20 == 0,
+            'etcd': i % 20 == 0,
+            'info': {
+                'os': {'operatingSystem': 'Ubuntu 22.04.3 LTS', 'kernelVersion': '5.15.0-89-generic'},
+                'cpu': {'count': 16},
+            },
+            'capacity': {'cpu': '16', 'memory': '65842396Ki', 'pods': '110'},
+            'requested': {'cpu': f'{(i % 15) + 1}', 'memory': f'{(i % 60) + 1}Gi'},
+            'allocatable': {'cpu': '15800m', 'memory': '64818396Ki'},
+            'conditions': [],
+            'labels': {'kubernetes.io/hostname': f'worker-{i:06d}', 'topology.kubernetes.io/zone': 'zone-a'},
+        })
+    return json.dumps({'data': nodes})
+
+
+def baseline_node_dict(n):
+    """The original per-node dict built by get_cluster_nodes."""
+    info = n.get('info', {})
+    os_info = info.get('os', {})
+    cpu_info = info.get('cpu', {})
+    cap = n.get('capacity', {})
+    req = n.get('requested', {})
+    alloc = n.get('allocatable', {})
+    roles = []
+    if n.get('controlPlane'):
+        roles.append('control-plane')
+    if n.get('etcd'):
+        roles.append('etcd')
+    if n.get('worker'):
+        roles.append('worker')
+    node_state = n.get('state', 'unknown')
+    return {
+        'name': n.get('nodeName', n.get('requestedHostname', 'unknown')),
+        'cluster_id': n.get('clusterId', ''),
+        'state': node_state,
+        'roles': roles,
+        'os_image': os_info.get('operatingSystem', 'N/A'),
+        'kernel': os_info.get('kernelVersion', 'N/A'),
+        'cpu_count': cpu_info.get('count', cap.get('cpu', 'N/A')),
+        'cpu_capacity': cap.get('cpu', ''),
+        'cpu_requested': req.get('cpu', ''),
+        'memory_capacity': cap.get('memory', ''),
+        'memory_requested': req.get('memory', ''),
+        'allocatable_cpu': alloc.get('cpu', ''),
+        'allocatable_memory': alloc.get('memory', ''),
+        'conditions': n.get('conditions', []),
+        'is_down': node_state.lower() not in ('active', 'running'),
+    }
+
+
+def retained_bytes(payload, build):
+    """Bytes still allocated after building summaries and dropping the raw JSON."""
+    gc.collect()
+    tracemalloc.start()
+    raw = json.loads(payload)['data']
+    summaries = [build(n) for n in raw]
+    del raw
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del summaries
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    payload = synthetic_payload(count)
+
+    as_dicts = retained_bytes(payload, baseline_node_dict)
+    as_records = retained_bytes(payload, rancher_client._parse_node)
+
+    per_10k = 10000 / count
+    print(f"{count} nodes")
+    print(f"{'representation':<16}{'MiB / 10k nodes':>18}{'bytes / node':>14}")
+    for label, size in (('dict', as_dicts), ('NodeRecord', as_records)):
+        print(f"{label:<16}{size * per_10k / 2 ** 20:>18.2f}{size / count:>14.0f}")
+    print(f"NodeRecord saves {100 * (1 - as_records / as_dicts):.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Local stub of the Rancher v3 API for benchmarks.
+
+Serves /v3/clusters and /v3/nodes (optionally filtered by ?clusterId=) for a
+synthetic fleet, with Rancher-style marker/limit pagination and a fixed
+latency added to every response. With --etags, pages carry an ETag and
+If-None-Match is answered with 304; with --gzip, bodies are gzip-encoded
+for clients that accept it. GET /_calls returns how many API calls have
+been served so far and how many were failed on purpose (not counted
+itself). With --error-rate, that fraction of API calls is answered with
+503 Service Unavailable, drawn from a seeded generator so runs repeat.
+With --flap, one node toggles between active and unavailable every few
+seconds, as a local event source for the live change feed (/api/events).
+
+Usage:  python benchmarks/fake_rancher.py [--port 18080] [--clusters 20]
+            [--nodes 10] [--latency 0.05] [--page-size 100] [--etags] [--gzip]
+            [--error-rate 0.0] [--seed 1] [--flap SECONDS]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+def make_fleet(clusters, nodes_per_cluster):
+    """Raw Rancher cluster and node objects for a synthetic fleet."""
+    cluster_objs = []
+    node_objs = []
+    for c in range(clusters):
+        cid = f'c-{c:05d}'
+        env = ('prod', 'staging', 'dev')[c % 3]
+        cluster_objs.append({
+            'id': cid,
+            'name': f'{env}-{("east", "west")[c % 2]}-{c:03d}',
+            'state': 'active' if c % 17 else 'provisioning',
+            'provider': ('rke2', 'eks', 'aks')[c % 3],
+            'version': {'gitVersion': f'v1.{26 + c % 3}.{c % 10}'},
+            'nodeCount': nodes_per_cluster,
+            'capacity': {'cpu': str(16 * nodes_per_cluster), 'memory': f'{64 * nodes_per_cluster}Gi'},
+            'requested': {'cpu': f'{(c % 12 + 1) * nodes_per_cluster}', 'memory': f'{(c % 50 + 4) * nodes_per_cluster}Gi'},
+            'allocatable': {'cpu': f'{15800 * nodes_per_cluster}m', 'memory': f'{62 * nodes_per_cluster}Gi'},
+            'conditions': [],
+        })
+        for n in range(nodes_per_cluster):
+            i = c * nodes_per_cluster + n
+            node_objs.append({
+                'id': f'{cid}:m-{n:05d}',
+                'clusterId': cid,
+                'nodeName': f'{cluster_objs[-1]["name"]}-node-{n:04d}',
+                'state': 'active' if i % 50 else 'unavailable',
+                'worker': True,
+                'controlPlane': n < 3,
+                'etcd': n < 3,
+                'info': {
+                    'os': {'operatingSystem': 'Ubuntu 22.04.3 LTS', 'kernelVersion': '5.15.0-89-generic'},
+                    'cpu': {'count': 16},
+                },
+                'capacity': {'cpu': '16', 'memory': '65842396Ki', 'pods': '110'},
+                'requested': {'cpu': f'{(i % 15) + 1}', 'memory': f'{(i % 60) + 1}Gi'},
+                'allocatable': {'cpu': '15800m', 'memory': '64818396Ki'},
+                'conditions': [],
+                'labels': {'kubernetes.io/hostname': f'node-{i:06d}', 'topology.kubernetes.io/zone': 'zone-a'},
+            })
+    return cluster_objs, node_objs
+
+
+class FakeRancher:
+    """The fleet plus server settings shared by request handlers."""
+
+    def __init__(self, clusters=20, nodes=10, latency=0.05, page_size=100,
+                 etags=False, gzip=False, error_rate=0.0, seed=1):
+        self.clusters, self.nodes = make_fleet(clusters, nodes)
+        self.nodes_by_cluster = {}
+        for n in self.nodes:
+            self.nodes_by_cluster.setdefault(n['clusterId'], []).append(n)
+        self.latency = latency
+        self.page_size = page_size
+        self.etags = etags
+        self.gzip = gzip
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count_call(self):
+        """Count an API call; True if it should be failed (see error_rate)."""
+        with self._lock:
+            self.calls += 1
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+    def flap(self, index=0):
+        """Toggle one node between active and unavailable; returns the node."""
+        node = self.nodes[index % len(self.nodes)]
+        node['state'] = 'unavailable' if node['state'] == 'active' else 'active'
+        return node
+
+    def flap_every(self, seconds, index=0):
+        """Call flap() every ``seconds`` from a daemon thread."""
+        def run():
+            while True:
+                time.sleep(seconds)
+                node = self.flap(index)
+                print(f"{node['nodeName']} -> {node['state']}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def page(self, base_url, path, query):
+        """One collection page as a Rancher-style JSON body, or None for unknown paths."""
+        if path == '/v3/clusters':
+            items = self.clusters
+        elif path == '/v3/nodes':
+            cluster_id = query.get('clusterId', [None])[0]
+            items = self.nodes_by_cluster.get(cluster_id, []) if cluster_id else self.nodes
+        else:
+            return None
+        limit = min(int(query.get('limit', [self.page_size])[0]), self.page_size)
+        marker = int(query.get('marker', ['0'])[0])
+        data = items[marker:marker + limit]
+        pagination = {'limit': limit, 'total': len(items)}
+        if marker + limit < len(items):
+            params = {k: v[0] for k, v in query.items()}
+            params['marker'] = marker + limit
+            pagination['next'] = f'{base_url}{path}?{urlencode(params)}'
+        return {'type': 'collection', 'data': data, 'pagination': pagination}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/_calls':
+                self.send_json({'calls': fake.calls, 'errors': fake.errors})
+                return
+            fail = fake.count_call()
+            if fake.latency:
+                time.sleep(fake.latency)
+            if fail:
+                self.send_error(503)
+                return
+            base_url = f'http://{self.headers.get("Host")}'
+            body = fake.page(base_url, url.path, parse_qs(url.query))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_json(body)
+
+        def send_json(self, body):
+            payload = json.dumps(body).encode()
+            headers = {'Content-Type': 'application/json'}
+            if fake.etags:
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                headers['ETag'] = etag
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+            if fake.gzip and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                payload = gzip.compress(payload, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class FakeRancherServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(fake, host='127.0.0.1', port=18080):
+    """Start a FakeRancherServer for fake in a daemon thread; returns the server."""
+    server = FakeRancherServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--clusters', type=int, default=20)
+    parser.add_argument('--nodes', type=int, default=10, help='nodes per cluster')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--etags', action='store_true', help='send ETags and answer 304s')
+    parser.add_argument('--gzip', action='store_true', help='gzip bodies when accepted')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of API calls answered with 503')
+    parser.add_argument('--seed', type=int, default=1, help='seed for --error-rate')
+    parser.add_argument('--flap', type=float, metavar='SECONDS',
+                        help='toggle the first node active/unavailable this often')
+    args = parser.parse_args()
+
+    fake = FakeRancher(
+        args.clusters, args.nodes, args.latency, args.page_size, args.etags, args.gzip,
+        args.error_rate, args.seed,
+    )
+    if args.flap:
+        fake.flap_every(args.flap)
+    server = FakeRancherServer((args.host, args.port), make_handler(fake))
+    print(f"Fake Rancher on http://{args.host}:{args.port} "
+          f"({args.clusters} clusters x {args.nodes} nodes, {args.latency * 1000:g} ms latency"
+          f"{f', {args.error_rate:.0%} errors' if args.error_rate else ''})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
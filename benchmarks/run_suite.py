@@ -0,0 +1,384 @@
+"""
+Benchmark suite: fixed scenarios against a local fake Rancher, results
+saved as JSON for comparison between runs.
+
+Every scenario starts its own fake Rancher (fake_rancher.py) with the same
+synthetic fleet and, for HTTP scenarios, a fresh app server, so scenarios
+don't share caches or memory high-water marks. Requests follow a fixed,
+seeded query order; a few warm-up requests run before measuring.
+
+Scenarios (--scenarios, default all):
+  chat-snapshot   /api/chat query mix served from the inventory snapshot
+  chat-direct     same mix with the snapshot off (cached Rancher lookups)
+  chat-errors     chat-direct with --error-rate failed Rancher calls (retries)
+  stats           /api/stats
+  export          export_cluster_nodes.py to CSV (one run per --export-runs)
+
+Reported per scenario: throughput, p50/p95/p99 latency, failed requests,
+Rancher calls per request and the server's (or exporter's) peak RSS.
+Results go to benchmarks/results/<time>-<commit>.json (git-ignored; or --output);
+--compare prints the change against an earlier results file.
+
+Usage:  python benchmarks/run_suite.py [--clusters 50] [--nodes 200]
+            [--latency 0.02] [--page-size 100] [--error-rate 0.05]
+            [--requests 200] [--concurrency 10] [--server wsgi|asgi]
+            [--scenarios chat-snapshot,...] [--output path] [--compare path]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from fake_rancher import make_fleet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+SCENARIOS = ('chat-snapshot', 'chat-direct', 'chat-errors', 'stats', 'export')
+
+WSGI_SERVER = (
+    "import sys, uvicorn\n"
+    "from uvicorn.middleware.wsgi import WSGIMiddleware\n"
+    "from app import app\n"
+    "uvicorn.run(WSGIMiddleware(app, workers=int(sys.argv[2])), port=int(sys.argv[1]), log_level='warning')\n"
+)
+
+# Metrics compared by --compare: (key, label, True if higher is better)
+COMPARED = (
+    ('throughput', 'req/s', True),
+    ('p50_ms', 'p50 ms', False),
+    ('p95_ms', 'p95 ms', False),
+    ('p99_ms', 'p99 ms', False),
+    ('calls_per_request', 'calls/req', False),
+    ('peak_rss_mib', 'RSS MiB', False),
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mib(pid):
+    """High-water resident memory of a running process (Linux), or None."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# ── Fleet and servers ─────────────────────────────────────────────────────────
+
+class FakeFleet:
+    """fake_rancher.py in a subprocess; a fresh one per scenario."""
+
+    def __init__(self, args, error_rate=0.0):
+        self.url = f'http://127.0.0.1:{free_port()}'
+        self.proc = subprocess.Popen([
+            sys.executable, os.path.join(HERE, 'fake_rancher.py'),
+            '--port', self.url.rsplit(':', 1)[1],
+            '--clusters', str(args.clusters), '--nodes', str(args.nodes),
+            '--latency', str(args.latency), '--page-size', str(args.page_size),
+            '--error-rate', str(error_rate), '--seed', str(args.seed),
+        ], stdout=subprocess.DEVNULL)
+        wait_for(f'{self.url}/_calls')
+
+    def calls(self):
+        return requests.get(f'{self.url}/_calls').json()['calls']
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def start_app(args, fleet, snapshot):
+    """App server subprocess against a fleet; returns (process, base URL)."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        RANCHER_BASE_URL=fleet.url,
+        INVENTORY_SNAPSHOT_ENABLED='true' if snapshot else 'false',
+        EVENTS_ENABLED='false',
+    )
+    if args.server == 'asgi':
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+               '--log-level', 'warning']
+    else:
+        cmd = [sys.executable, '-c', WSGI_SERVER, str(port), str(args.threads)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    wait_for(f'{url}/')
+    return proc, url
+
+
+def chat_queries(clusters, seed):
+    """Seeded mix of the intents users ask most, over the fleet's cluster names."""
+    names = [c['name'] for c in make_fleet(clusters, 0)[0]]
+    rng = random.Random(seed)
+    queries = ['list all clusters', 'top 10 nodes by cpu', 'top 5 clusters by memory']
+    for name in rng.sample(names, min(len(names), 10)):
+        queries += [f'cluster {name}', f'show node {name}-node-000']
+    rng.shuffle(queries)
+    return queries
+
+
+# ── Load generation ───────────────────────────────────────────────────────────
+
+def run_load(send, total, concurrency):
+    """
+    Call send(i, session) ``total`` times, ``concurrency`` at a time.
+    Returns (latencies, failed, seconds).
+    """
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = send(i, session).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    seconds = time.perf_counter() - start
+    return [latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds
+
+
+def http_scenario(args, path, snapshot=True, error_rate=0.0):
+    """Measure GET /api/stats or POST /api/chat (path) against a fresh server."""
+    fleet = FakeFleet(args, error_rate)
+    proc = None
+    try:
+        proc, url = start_app(args, fleet, snapshot)
+        if path == '/api/chat':
+            queries = chat_queries(args.clusters, args.seed)
+
+            def send(i, session):
+                return session.post(f'{url}/api/chat', json={'message': queries[i % len(queries)]},
+                                    timeout=120)
+        else:
+            def send(i, session):
+                return session.get(f'{url}{path}', timeout=120)
+
+        # Warm-up: snapshot build / first cache fills are not what we measure
+        run_load(send, args.warmup, 1)
+        calls_before = fleet.calls()
+        latencies, failed, seconds = run_load(send, args.requests, args.concurrency)
+        calls = fleet.calls() - calls_before
+        return {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seconds': round(seconds, 3),
+            'throughput': round(args.requests / seconds, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'failed': failed,
+            'calls_per_request': round(calls / args.requests, 3),
+            'peak_rss_mib': peak_rss_mib(proc.pid),
+        }
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        fleet.stop()
+
+
+def export_scenario(args):
+    """Time export_cluster_nodes.py (CSV, no saved state) as a subprocess."""
+    import tempfile
+
+    fleet = FakeFleet(args)
+    env = dict(os.environ, RANCHER_BASE_URL=fleet.url)
+    latencies, rss, failed, calls = [], [], 0, 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for run in range(args.export_runs):
+                calls_before = fleet.calls()
+                start = time.perf_counter()
+                proc = subprocess.Popen(
+                    [sys.executable, 'export_cluster_nodes.py', os.path.join(tmp, f'export{run}.csv'),
+                     '--no-state'],
+                    cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                )
+                _, status, usage = os.wait4(proc.pid, 0)
+                latencies.append(time.perf_counter() - start)
+                rss.append(usage.ru_maxrss / 1024)  # KiB on Linux
+                failed += os.waitstatus_to_exitcode(status) != 0
+                calls += fleet.calls() - calls_before
+    finally:
+        fleet.stop()
+    runs = args.export_runs
+    return {
+        'requests': runs,
+        'concurrency': 1,
+        'seconds': round(sum(latencies), 3),
+        'throughput': round(runs / sum(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'failed': failed,
+        'calls_per_request': round(calls / runs, 3),
+        'peak_rss_mib': round(max(rss), 1),
+    }
+
+
+def run_scenario(name, args):
+    if name == 'chat-snapshot':
+        return http_scenario(args, '/api/chat', snapshot=True)
+    if name == 'chat-direct':
+        return http_scenario(args, '/api/chat', snapshot=False)
+    if name == 'chat-errors':
+        return http_scenario(args, '/api/chat', snapshot=False, error_rate=args.error_rate)
+    if name == 'stats':
+        return http_scenario(args, '/api/stats', snapshot=True)
+    if name == 'export':
+        return export_scenario(args)
+    raise ValueError(f'Unknown scenario: {name}')
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+
+def print_results(scenarios):
+    print(f"{'scenario':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'failed':>8}{'calls/req':>11}{'RSS MiB':>9}")
+    for name, r in scenarios.items():
+        rss = f"{r['peak_rss_mib']:.0f}" if r['peak_rss_mib'] is not None else '-'
+        print(f"{name:<16}{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['failed']:>8}{r['calls_per_request']:>11.2f}{rss:>9}")
+
+
+def print_comparison(baseline, results):
+    """Per-scenario change of each compared metric vs a baseline results file."""
+    print(f"\nvs {baseline.get('commit') or '?'} ({baseline.get('started_at', '?')}); "
+          "+ is better, - is worse")
+    if baseline.get('config') != results['config']:
+        print("  note: the runs used different fleets or load settings")
+    scenarios = results['scenarios']
+    for name, r in scenarios.items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        parts = []
+        for key, label, higher_is_better in COMPARED:
+            old, new = before.get(key), r.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            sign = change if higher_is_better else -change
+            parts.append(f"{label} {old:g}→{new:g} ({sign:+.0f}%)")
+        print(f"  {name:<14} " + ', '.join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite against a fake Rancher')
+    parser.add_argument('--clusters', type=int, default=50)
+    parser.add_argument('--nodes', type=int, default=200, help='nodes per cluster')
+    parser.add_argument('--latency', type=float, default=0.02, help='Rancher latency (s)')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.05, help='for chat-errors')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--export-runs', type=int, default=3)
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--threads', type=int, default=10, help='wsgi request threads')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--output', help='results JSON (default benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    names = args.scenarios.split(',')
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name!r} (choose from {", ".join(SCENARIOS)})')
+
+    started = datetime.now(timezone.utc)
+    commit = git_commit()
+    print(f"{args.clusters} clusters x {args.nodes} nodes, {args.latency * 1000:g} ms Rancher "
+          f"latency, page size {args.page_size}; {args.requests} requests at concurrency "
+          f"{args.concurrency} ({args.server}); commit {commit or '?'}\n")
+
+    scenarios = {}
+    for name in names:
+        print(f"running {name}…", file=sys.stderr)
+        scenarios[name] = run_scenario(name, args)
+    print_results(scenarios)
+
+    results = {
+        'started_at': started.isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'fleet': {
+                'clusters': args.clusters, 'nodes': args.nodes, 'latency': args.latency,
+                'page_size': args.page_size, 'error_rate': args.error_rate, 'seed': args.seed,
+            },
+            'requests': args.requests, 'concurrency': args.concurrency, 'warmup': args.warmup,
+            'export_runs': args.export_runs, 'server': args.server, 'threads': args.threads,
+        },
+        'scenarios': scenarios,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{started.strftime('%Y%m%dT%H%M%SZ')}-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults: {os.path.relpath(output, ROOT)}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+In-process inventory cache for Rancher API data.
+TTL per entry, stale-while-revalidate, single-flight refresh and LRU eviction,
+plus a page cache for conditional GETs and a cache of rendered chat answers.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    """A cached value and when it was fetched."""
+
+    __slots__ = ('value', 'fetched_at', 'expires_at', 'stale_until')
+
+    def __init__(self, value, ttl, stale_seconds):
+        self.value = value
+        self.fetched_at = time.time()
+        self.expires_at = self.fetched_at + ttl
+        self.stale_until = self.expires_at + stale_seconds
+
+
+class _Flight:
+    """An in-progress load that concurrent callers wait on instead of repeating."""
+
+    __slots__ = ('done', 'entry', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+class InventoryCache:
+    """
+    Thread-safe cache keyed by resource (e.g. 'clusters', ('nodes', cluster_id)).
+
+    - Fresh entries (younger than their TTL) are served directly.
+    - Expired entries still within ``stale_seconds`` are served as-is while a
+      background thread reloads them.
+    - Older or missing entries are loaded synchronously.
+    - Only one load per key runs at a time; concurrent callers share its result.
+    - At most ``max_entries`` keys are kept, least recently used evicted first.
+    """
+
+    def __init__(self, max_entries=512, stale_seconds=120):
+        self.max_entries = max(1, max_entries)
+        self.stale_seconds = stale_seconds
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key, loader, ttl):
+        """
+        Return (value, fetched_at) for key, calling loader() when the cached
+        value is missing or too old. fetched_at is a time.time() timestamp.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.expires_at:
+                    self.hits += 1
+                    return entry.value, entry.fetched_at
+                if now < entry.stale_until:
+                    self.stale_hits += 1
+                    if key not in self._flights:
+                        self._flights[key] = flight = _Flight()
+                        threading.Thread(
+                            target=self._load, args=(key, loader, ttl, flight),
+                            name=f'cache-refresh-{key}', daemon=True,
+                        ).start()
+                    return entry.value, entry.fetched_at
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                self._flights[key] = flight = _Flight()
+
+        if leader:
+            self._load(key, loader, ttl, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.entry.value, flight.entry.fetched_at
+
+    def _load(self, key, loader, ttl, flight):
+        """
+        Run loader() for a flight this thread owns and publish the result.
+        A failed background refresh leaves the stale entry in place.
+        """
+        try:
+            flight.entry = _Entry(loader(), ttl, self.stale_seconds)
+            self._store(key, flight.entry)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def peek(self, key, fresh_only=False):
+        """
+        Return (value, fetched_at) if key holds a servable (fresh or stale)
+        entry, else None. With fresh_only, stale entries count as missing.
+        Never triggers a load.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() >= (entry.expires_at if fresh_only else entry.stale_until):
+                return None
+            return entry.value, entry.fetched_at
+
+    def put(self, key, value, ttl):
+        """Store a value fetched elsewhere (e.g. by a background refresher)."""
+        self._store(key, _Entry(value, ttl, self.stale_seconds))
+
+    def _store(self, key, entry):
+        """Insert an entry as most recently used and evict past max_entries."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss counters and the current entry count."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+            }
+
+
+# ── Conditional GET page cache ────────────────────────────────────────────────
+
+class CachedPage:
+    """A collection page's parsed items, next link and HTTP validators."""
+
+    __slots__ = ('etag', 'last_modified', 'items', 'next_url')
+
+    def __init__(self, etag, last_modified, items, next_url):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.items = items
+        self.next_url = next_url
+
+    def validators(self):
+        """Request headers that make the next GET of this page conditional."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Last parsed response of each collection page URL, kept only for pages
+    that came with an ETag or Last-Modified. The next request for the page
+    is made conditional; on 304 Not Modified the cached items are reused
+    instead of being downloaded and parsed again. Thread-safe, LRU-bounded.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None):
+        return (url, tuple(sorted(params.items())) if params else ())
+
+    def get(self, key):
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, key, page):
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def items(self):
+        """List of (key, CachedPage), least recently used first."""
+        with self._lock:
+            return list(self._pages.items())
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def __len__(self):
+        return len(self._pages)
+
+
+# ── Rendered chat answer cache ────────────────────────────────────────────────
+
+class CachedAnswer:
+    """
+    A serialized chat answer, split around its data age (the one value that
+    changes while the snapshot doesn't), and a weak ETag for it.
+    """
+
+    __slots__ = ('head', 'tail', 'etag')
+
+    def __init__(self, head, tail, version):
+        self.head = head
+        self.tail = tail
+        digest = hashlib.blake2b(head + (tail or b''), digest_size=8).hexdigest()
+        self.etag = f'W/"{version}-{digest}"'
+
+    def body(self, data_age):
+        """Response bytes with the given data age filled in."""
+        if self.tail is None:
+            return self.head
+        return self.head + str(data_age).encode() + self.tail
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header names this answer (weak comparison)."""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or any(tag.removeprefix('W/') == self.etag[2:] for tag in tags)
+
+
+class AnswerCache:
+    """
+    Rendered chat answers keyed by normalized query, valid for one inventory
+    snapshot version: a lookup for a newer version empties the cache. A
+    snapshot that is only re-dated (nothing changed) keeps its version, so
+    its answers stay cached. Thread-safe, LRU-bounded.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = None
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self.version:
+                self._answers.clear()
+                self.version = version
+            answer = self._answers.get(key)
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._answers.move_to_end(key)
+            return answer
+
+    def put(self, version, key, answer):
+        with self._lock:
+            if version != self.version:
+                return      # rendered from a snapshot that has since been replaced
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._answers), 'hits': self.hits, 'misses': self.misses}
@@ -1,6 +1,7 @@
 """
 Configuration settings for the Platform Engineering Chatbot
 """
+import json
 import os
 
 # Base directory
@@ -16,6 +17,9 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 #     'RUN_AS': 'Run as',
 #     'NOTES': 'Notes'
 # }
+# # New records go to a JSONL journal next to the workbook; it is compacted
+# # into the .xlsx once this many are pending (0 = only via compact())
+# EXCEL_JOURNAL_COMPACT_ENTRIES = int(os.environ.get('EXCEL_JOURNAL_COMPACT_ENTRIES', '1000'))
 
 # ── Flask configuration ───────────────────────────────────────────────────────
 DEBUG = True
@@ -26,3 +30,85 @@ PORT = 5001
 RANCHER_BASE_URL = os.environ.get('RANCHER_BASE_URL', 'https://rancher.example.com')
 RANCHER_API_TOKEN = os.environ.get('RANCHER_API_TOKEN', 'token-xxxxx:yyyyyyy')
 RANCHER_VERIFY_SSL = os.environ.get('RANCHER_VERIFY_SSL', 'false').lower() != 'false'
+
+# Page size requested from Rancher collection endpoints (pagination.next is followed)
+RANCHER_PAGE_LIMIT = int(os.environ.get('RANCHER_PAGE_LIMIT', '1000'))
+# Max number of /v3/nodes requests in flight when fanning out across clusters
+RANCHER_MAX_CONCURRENCY = int(os.environ.get('RANCHER_MAX_CONCURRENCY', '8'))
+# Overall deadline (seconds) for one fan-out; slower clusters are reported as timed out
+RANCHER_FANOUT_TIMEOUT = float(os.environ.get('RANCHER_FANOUT_TIMEOUT', '30'))
+# At or above this many clusters, list every node in one paginated /v3/nodes
+# stream instead of one request per cluster
+RANCHER_BULK_NODES_THRESHOLD = int(os.environ.get('RANCHER_BULK_NODES_THRESHOLD', '4'))
+# Keep-alive connections pooled per Rancher host by the sync client; at least the
+# fan-out concurrency so parallel node requests reuse connections
+RANCHER_POOL_SIZE = int(os.environ.get('RANCHER_POOL_SIZE', str(max(RANCHER_MAX_CONCURRENCY, 10))))
+# Per-request timeout (seconds)
+RANCHER_TIMEOUT = float(os.environ.get('RANCHER_TIMEOUT', '15'))
+# Retries of a GET after a connection error, timeout or 429/502/503/504, with
+# exponential backoff (base * 2**attempt, capped) and full jitter
+RANCHER_RETRIES = int(os.environ.get('RANCHER_RETRIES', '3'))
+RANCHER_BACKOFF_BASE = float(os.environ.get('RANCHER_BACKOFF_BASE', '0.2'))
+RANCHER_BACKOFF_MAX = float(os.environ.get('RANCHER_BACKOFF_MAX', '2'))
+# Circuit breaker: after this many failed calls in a row, stop calling Rancher
+# for RANCHER_BREAKER_RESET_SECONDS and fail fast instead
+RANCHER_BREAKER_THRESHOLD = int(os.environ.get('RANCHER_BREAKER_THRESHOLD', '5'))
+RANCHER_BREAKER_RESET_SECONDS = float(os.environ.get('RANCHER_BREAKER_RESET_SECONDS', '30'))
+# Collection pages remembered with their ETag/Last-Modified for conditional GETs
+RANCHER_CONDITIONAL_PAGES = int(os.environ.get('RANCHER_CONDITIONAL_PAGES', '256'))
+# Connection pool size of the async client (asgi.py), shared by all in-flight requests
+RANCHER_ASYNC_MAX_CONNECTIONS = int(os.environ.get('RANCHER_ASYNC_MAX_CONNECTIONS', '64'))
+
+# ── Rancher federation ────────────────────────────────────────────────────────
+# Several Rancher management servers queried in parallel, as a JSON list of
+# {"name": "eu", "url": "https://rancher-eu.example.com", "token": "...",
+#  "timeout": 10, "verify_ssl": true} objects (token, timeout and verify_ssl are
+# optional). Empty: the single RANCHER_BASE_URL / RANCHER_API_TOKEN above is used.
+# Cluster IDs become '<name>:<id>' and every cluster is tagged with its source.
+RANCHER_ENDPOINTS = json.loads(os.environ.get('RANCHER_ENDPOINTS', '') or '[]')
+# Default deadline (seconds) for one endpoint's answer; slower endpoints are
+# reported as failed and left out of that answer
+RANCHER_ENDPOINT_TIMEOUT = float(os.environ.get('RANCHER_ENDPOINT_TIMEOUT', '20'))
+
+# ── Rancher inventory cache ───────────────────────────────────────────────────
+# Seconds a cached cluster / node listing is served as fresh
+RANCHER_CACHE_CLUSTERS_TTL = float(os.environ.get('RANCHER_CACHE_CLUSTERS_TTL', '60'))
+RANCHER_CACHE_NODES_TTL = float(os.environ.get('RANCHER_CACHE_NODES_TTL', '30'))
+# Extra seconds an expired entry is still served while it refreshes in the background
+RANCHER_CACHE_STALE_SECONDS = float(os.environ.get('RANCHER_CACHE_STALE_SECONDS', '120'))
+# Max cached entries (one per resource / per cluster node listing), LRU-evicted
+RANCHER_CACHE_MAX_ENTRIES = int(os.environ.get('RANCHER_CACHE_MAX_ENTRIES', '512'))
+
+# ── Inventory snapshot ────────────────────────────────────────────────────────
+# Answer chat queries from a background-refreshed in-memory snapshot
+INVENTORY_SNAPSHOT_ENABLED = os.environ.get('INVENTORY_SNAPSHOT_ENABLED', 'true').lower() != 'false'
+# Seconds between background snapshot refreshes
+INVENTORY_REFRESH_SECONDS = float(os.environ.get('INVENTORY_REFRESH_SECONDS', '30'))
+
+# ── Chat answer cache ─────────────────────────────────────────────────────────
+# Serialized /api/chat answers kept per inventory snapshot version (0 disables)
+CHAT_ANSWER_CACHE_ENTRIES = int(os.environ.get('CHAT_ANSWER_CACHE_ENTRIES', '256'))
+
+# ── Node pagination ───────────────────────────────────────────────────────────
+# Chat answers carry cluster summaries; node lists are fetched page by page
+# from /api/clusters/<id>/nodes. Default and maximum nodes per page:
+NODES_PAGE_SIZE = int(os.environ.get('NODES_PAGE_SIZE', '50'))
+NODES_PAGE_MAX = int(os.environ.get('NODES_PAGE_MAX', '500'))
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+# Prometheus-format metrics at /metrics (set to 'false' to answer 404 instead)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+# Add a Server-Timing header (parse/lookup/format/serialize ms) to /api/chat JSON answers
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+# ── Live change events ────────────────────────────────────────────────────────
+# Push node/cluster changes found between snapshot refreshes to browsers (SSE)
+EVENTS_ENABLED = os.environ.get('EVENTS_ENABLED', 'true').lower() != 'false'
+# Seconds between SSE keep-alive comments on an idle stream
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Recent events kept for clients reconnecting with Last-Event-ID
+EVENTS_BUFFER = int(os.environ.get('EVENTS_BUFFER', '200'))
+# Events queued per connected client before the oldest are dropped
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', '100'))
+# Cap on events published for one refresh (a summary event covers the rest)
+EVENTS_MAX_PER_REFRESH = int(os.environ.get('EVENTS_MAX_PER_REFRESH', '50'))
@@ -0,0 +1,222 @@
+"""
+Live inventory change events.
+Each time the inventory snapshot is rebuilt, it is diffed against the
+previous one ("node worker-3 went unavailable", "cluster added", ...) and
+the changes are published on an in-process event bus that browsers follow
+over Server-Sent Events (/api/events).
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from config import EVENTS_BUFFER, EVENTS_QUEUE_SIZE, EVENTS_MAX_PER_REFRESH
+
+
+# ── Snapshot diff ─────────────────────────────────────────────────────────────
+
+def _node_map(snapshot):
+    return {
+        (s.id, node.name): (s, node)
+        for s in snapshot.summaries for node in s.nodes
+    }
+
+
+def diff_snapshots(old, new):
+    """
+    Changes between two InventorySnapshots as a list of event dicts (without
+    ids), clusters first. Types: cluster_added, cluster_removed,
+    cluster_state, node_added, node_removed, node_state.
+    """
+    events = []
+    old_clusters = old.by_id
+    new_clusters = new.by_id
+
+    for cid, s in new_clusters.items():
+        before = old_clusters.get(cid)
+        if before is None:
+            events.append(_event('cluster_added', s, message=f"Cluster **{s.name}** was added"))
+        elif before.state != s.state:
+            events.append(_event(
+                'cluster_state', s, previous=before.state, state=s.state,
+                message=f"Cluster **{s.name}** is now **{s.state}** (was {before.state})",
+            ))
+    for cid, s in old_clusters.items():
+        if cid not in new_clusters:
+            events.append(_event('cluster_removed', s, message=f"Cluster **{s.name}** was removed"))
+
+    old_nodes = _node_map(old)
+    new_nodes = _node_map(new)
+    for key, (s, node) in new_nodes.items():
+        before = old_nodes.get(key)
+        if before is None:
+            if s.id in old_clusters:  # nodes of a new cluster are implied by cluster_added
+                events.append(_event(
+                    'node_added', s, node=node,
+                    message=f"Node **{node.name}** joined **{s.name}**",
+                ))
+        elif before[1].state != node.state:
+            events.append(_event(
+                'node_state', s, node=node, previous=before[1].state, state=node.state,
+                message=(
+                    f"{'⚠️ ' if node.is_down else '✅ '}Node **{node.name}** in **{s.name}** "
+                    f"went **{node.state}** (was {before[1].state})"
+                ),
+            ))
+    for key, (s, node) in old_nodes.items():
+        if key not in new_nodes and s.id in new_clusters:
+            events.append(_event(
+                'node_removed', s, node=node,
+                message=f"Node **{node.name}** left **{s.name}**",
+            ))
+    return events
+
+
+def _event(kind, summary, node=None, previous=None, state=None, message=''):
+    event = {
+        'type': kind,
+        'cluster': summary.name,
+        'cluster_id': summary.id,
+        'message': message,
+    }
+    if node is not None:
+        event['node'] = node.name
+        event['is_down'] = node.is_down
+    if state is not None:
+        event['previous'] = previous
+        event['state'] = state
+    return event
+
+
+# ── Event bus ─────────────────────────────────────────────────────────────────
+
+class Subscription:
+    """A subscriber's bounded queue; on overflow the oldest events are dropped."""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None after timeout seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Subscription for an asyncio consumer (asgi.py); delivery is thread-safe."""
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """
+    Thread-safe publish/subscribe for change events. Every event gets an
+    increasing id; the last ``buffer`` events are kept so a reconnecting
+    client (SSE Last-Event-ID) can catch up on what it missed.
+    """
+
+    def __init__(self, buffer=EVENTS_BUFFER, queue_size=EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._recent = deque(maxlen=buffer)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def publish(self, event):
+        """Stamp an event with id and time and deliver it to every subscriber."""
+        with self._lock:
+            event = {'id': self._next_id, 'time': time.time(), **event}
+            self._next_id += 1
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.deliver(event)
+        return event
+
+    def subscribe(self, subscription=None, last_event_id=None):
+        """
+        Register a subscription (a new thread Subscription by default).
+        Buffered events after ``last_event_id`` are delivered to it first.
+        """
+        sub = subscription or Subscription(self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event['id'] > last_event_id:
+                        sub.deliver(event)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def recent(self):
+        with self._lock:
+            return list(self._recent)
+
+
+def publish_changes(bus, old, new, limit=EVENTS_MAX_PER_REFRESH):
+    """
+    Snapshot listener: publish the diff between two snapshots. A mass change
+    is capped at ``limit`` events plus one 'changes_truncated' summary.
+    """
+    if old is None:
+        return
+    events = diff_snapshots(old, new)
+    for event in events[:limit]:
+        bus.publish(event)
+    if len(events) > limit:
+        hidden = len(events) - limit
+        bus.publish({
+            'type': 'changes_truncated',
+            'count': hidden,
+            'message': f"…and **{hidden}** more inventory change(s)",
+        })
+
+
+def sse_format(event):
+    """One Server-Sent Events message for an event dict."""
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Singleton
+event_bus = EventBus()
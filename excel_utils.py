@@ -1,11 +1,84 @@
 """
 Excel data management utilities for server/application data
+The sheet is parsed once into an indexed in-memory table and only re-read
+when the file's mtime or size changes. New records are appended to a JSONL
+journal next to the workbook and folded into the .xlsx by compact().
 """
+import json
 import openpyxl
+from contextlib import contextmanager
 from openpyxl import Workbook
+from openpyxl.packaging.custom import StringProperty
 from openpyxl.styles import Font, PatternFill
 import os
-from config import EXCEL_FILE_PATH, EXCEL_SHEET_NAME, COLUMNS
+import threading
+import uuid
+from config import EXCEL_FILE_PATH, EXCEL_SHEET_NAME, COLUMNS, EXCEL_JOURNAL_COMPACT_ENTRIES
+from index_utils import NgramIndex, TokenIndex
+
+try:
+    import fcntl  # cross-process journal lock (POSIX)
+except ImportError:
+    fcntl = None
+
+# Separates fields in the search_all text, so a match can't span two fields
+FIELD_SEPARATOR = '\x1f'
+# Workbook property holding the id of the last journal compacted into it
+JOURNAL_ID_PROPERTY = 'journal_id'
+
+
+class ColumnIndex:
+    """Lowercase value → row ids map for one column, with substring search over the distinct values"""
+
+    def __init__(self, values):
+        self.rows = {}
+        for idx, value in enumerate(values):
+            if value:
+                self.rows.setdefault(str(value).lower(), []).append(idx)
+        self.values = list(self.rows)
+        self.index = NgramIndex(self.values)
+
+    def exact(self, value):
+        """Row ids whose value equals value (case-insensitive)"""
+        return self.rows.get(value.lower(), [])
+
+    def search(self, keyword):
+        """Row ids whose value contains keyword (case-insensitive), in sheet order"""
+        ids = []
+        for value_id in self.index.search(keyword):
+            ids.extend(self.rows[self.values[value_id]])
+        return sorted(ids)
+
+
+class ExcelTable:
+    """
+    Immutable indexed view of a list of records; ``version`` is the
+    (mtime_ns, size) of the file they were read from. ``journal_id`` is
+    the id of a journal's generation, or on workbook tables of the last
+    journal compacted in.
+    """
+
+    INDEXED_COLUMNS = ('SERVER_NAME', 'APPLICATION')
+
+    def __init__(self, records, version=None, journal_id=None):
+        self.records = records
+        self.version = version
+        self.journal_id = journal_id
+        self.columns = {
+            key: ColumnIndex([record.get(COLUMNS[key]) for record in records])
+            for key in self.INDEXED_COLUMNS
+        }
+        self.text_index = TokenIndex([
+            FIELD_SEPARATOR.join(str(value) for value in record.values() if value is not None)
+            for record in records
+        ])
+        self.distinct = {
+            key: {record[COLUMNS[key]] for record in records if record.get(COLUMNS[key])}
+            for key in self.INDEXED_COLUMNS
+        }
+
+    def rows(self, ids):
+        return [self.records[i] for i in ids]
 
 
 class ExcelDataManager:
@@ -14,6 +87,11 @@ class ExcelDataManager:
     def __init__(self, file_path=EXCEL_FILE_PATH):
         self.file_path = file_path
         self.sheet_name = EXCEL_SHEET_NAME
+        self.journal_path = os.path.splitext(file_path)[0] + '.journal.jsonl'
+        self.compact_entries = EXCEL_JOURNAL_COMPACT_ENTRIES
+        self._tables = None  # (workbook ExcelTable, journal ExcelTable)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
         self._ensure_file_exists()
     
     def _ensure_file_exists(self):
@@ -41,104 +119,241 @@ class ExcelDataManager:
             
             wb.save(self.file_path)
     
-    def load_data(self):
-        """Load all data from Excel file"""
+    @staticmethod
+    def _version(path):
         try:
-            wb = openpyxl.load_workbook(self.file_path)
-            ws = wb[self.sheet_name]
-            
-            data = []
-            headers = [cell.value for cell in ws[1]]
-            
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if any(row):  # Skip empty rows
-                    record = dict(zip(headers, row))
-                    data.append(record)
-            
-            return data
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            return []
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def _read_workbook(self):
+        """ExcelTable of the sheet; records are dicts keyed by header"""
+        version = self._version(self.file_path)
+        wb = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = wb[self.sheet_name].iter_rows(values_only=True)
+            headers = next(rows, ())
+            records = [dict(zip(headers, row)) for row in rows if any(row)]  # Skip empty rows
+            journal_id = next(
+                (p.value for p in wb.custom_doc_props.props if p.name == JOURNAL_ID_PROPERTY),
+                None,
+            )
+        finally:
+            wb.close()
+        return ExcelTable(records, version, journal_id)
+
+    def _read_journal(self, workbook):
+        """
+        ExcelTable of the journal's records. The first line of a journal is
+        its generation id; a journal whose id is recorded in the workbook was
+        already compacted (the process stopped before truncating it), so it
+        counts as empty. A torn last line from an interrupted write is skipped.
+        """
+        version = self._version(self.journal_path)
+        if version is None:
+            return ExcelTable([], version)
+        with open(self.journal_path, 'rb') as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return ExcelTable([], version)
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                pass
+        journal_id = entries[0].get('journal') if entries else None
+        if journal_id is not None:
+            entries = entries[1:]
+            if journal_id == workbook.journal_id:
+                return ExcelTable([], version, journal_id)
+        return ExcelTable(entries, version, journal_id)
+
+    def tables(self):
+        """
+        (workbook, journal) ExcelTables. Each is only re-read when its file's
+        mtime or size changed since the last load, so writes by other
+        processes are picked up; concurrent callers share one reload.
+        """
+        file_version = self._version(self.file_path)
+        journal_version = self._version(self.journal_path)
+        tables = self._tables
+        if tables is not None and (tables[0].version, tables[1].version) == (file_version, journal_version):
+            return tables
+        with self._lock:
+            tables = self._tables
+            try:
+                workbook = tables[0] if tables and tables[0].version == file_version else self._read_workbook()
+                journal = (
+                    tables[1]
+                    if tables and workbook is tables[0] and tables[1].version == journal_version
+                    else self._read_journal(workbook)
+                )
+            except Exception as e:
+                print(f"Error loading data: {e}")
+                return ExcelTable([]), ExcelTable([])
+            self._tables = (workbook, journal)
+            return self._tables
+
+    def invalidate(self):
+        """Force the next lookup to re-read the files"""
+        with self._lock:
+            self._tables = None
+
+    def load_data(self):
+        """Load all data from Excel file and journal"""
+        workbook, journal = self.tables()
+        return workbook.records + journal.records
     
+    def _search(self, lookup):
+        return [row for table in self.tables() for row in table.rows(lookup(table))]
+
     def search_by_server(self, server_name):
         """Search for all applications on a specific server"""
-        data = self.load_data()
-        server_name_lower = server_name.lower()
-        
-        results = [
-            record for record in data
-            if record.get(COLUMNS['SERVER_NAME']) and 
-            server_name_lower in record[COLUMNS['SERVER_NAME']].lower()
-        ]
-        
-        return results
+        return self._search(lambda table: table.columns['SERVER_NAME'].search(server_name))
     
     def search_by_application(self, app_name):
         """Search for all servers running a specific application"""
-        data = self.load_data()
-        app_name_lower = app_name.lower()
-        
-        results = [
-            record for record in data
-            if record.get(COLUMNS['APPLICATION']) and 
-            app_name_lower in record[COLUMNS['APPLICATION']].lower()
-        ]
-        
-        return results
+        return self._search(lambda table: table.columns['APPLICATION'].search(app_name))
     
     def search_all(self, query):
         """Search across all fields"""
-        data = self.load_data()
-        query_lower = query.lower()
-        
-        results = []
-        for record in data:
-            # Search in all text fields
-            if any(
-                query_lower in str(value).lower()
-                for value in record.values()
-                if value is not None
-            ):
-                results.append(record)
-        
-        return results
+        return self._search(lambda table: table.text_index.search(query))
     
+    def get_statistics(self):
+        """Get statistics about the data"""
+        workbook, journal = self.tables()
+
+        def distinct(key):
+            return len(workbook.distinct[key]) + len(journal.distinct[key] - workbook.distinct[key])
+
+        return {
+            'total_records': len(workbook.records) + len(journal.records),
+            'unique_servers': distinct('SERVER_NAME'),
+            'unique_applications': distinct('APPLICATION'),
+        }
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive journal lock: across threads, and across processes where flock exists"""
+        with self._write_lock:
+            with open(self.journal_path + '.lock', 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def _trim_torn_line(self):
+        """
+        Cut a torn last line (left by an interrupted write) off the journal,
+        so the next append starts on a line of its own. Call with the lock held.
+        """
+        with open(self.journal_path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            pos = end
+            while pos > 0:
+                step = min(pos, 65536)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    pos += newline + 1
+                    break
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _record(self, server_name, application, environment="", run_as="", notes=""):
+        values = (server_name, application, environment, run_as, notes)
+        return dict(zip(COLUMNS.values(), values))
+
     def add_record(self, server_name, application, environment="", run_as="", notes=""):
         """Add a new server/application record"""
+        return self.add_records([(server_name, application, environment, run_as, notes)]) == 1
+
+    def add_records(self, rows):
+        """
+        Add many records at once: each row is a tuple/list in column order or
+        a dict of add_record's keyword arguments. The rows are appended to
+        the journal with one write and one fsync, and are visible to searches
+        immediately. Returns how many were added (0 on error).
+        """
+        records = [
+            self._record(**row) if isinstance(row, dict) else self._record(*row)
+            for row in rows
+        ]
+        if not records:
+            return 0
+        payload = ''.join(json.dumps(record, default=str) + '\n' for record in records)
         try:
-            wb = openpyxl.load_workbook(self.file_path)
-            ws = wb[self.sheet_name]
-            
-            new_row = [server_name, application, environment, run_as, notes]
-            ws.append(new_row)
-            
-            wb.save(self.file_path)
-            return True
+            with self._locked():
+                workbook, journal = self.tables()
+                journal_id = journal.journal_id
+                if journal.records:
+                    mode = 'a'
+                    self._trim_torn_line()
+                else:
+                    # Empty, missing or already compacted: start a new generation
+                    mode = 'w'
+                    journal_id = uuid.uuid4().hex
+                    payload = json.dumps({'journal': journal_id}) + '\n' + payload
+                with open(self.journal_path, mode, encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                merged = ExcelTable(
+                    journal.records + records, self._version(self.journal_path), journal_id
+                )
+                with self._lock:
+                    if self._tables is not None and self._tables[0] is workbook:
+                        self._tables = (workbook, merged)
+                pending = len(merged.records)
+            if self.compact_entries and pending >= self.compact_entries:
+                self.compact()
+            return len(records)
         except Exception as e:
             print(f"Error adding record: {e}")
-            return False
-    
-    def get_statistics(self):
-        """Get statistics about the data"""
-        data = self.load_data()
-        
-        total_records = len(data)
-        unique_servers = len(set(
-            record[COLUMNS['SERVER_NAME']] 
-            for record in data 
-            if record.get(COLUMNS['SERVER_NAME'])
-        ))
-        unique_apps = len(set(
-            record[COLUMNS['APPLICATION']] 
-            for record in data 
-            if record.get(COLUMNS['APPLICATION'])
-        ))
-        
-        return {
-            'total_records': total_records,
-            'unique_servers': unique_servers,
-            'unique_applications': unique_apps
-        }
+            return 0
+
+    def compact(self):
+        """
+        Fold the journal into the .xlsx: the rows are appended to the sheet,
+        the workbook is written to a temporary file and atomically renamed
+        over the old one, then the journal is truncated. The workbook records
+        the journal's id, so a crash before the truncate doesn't apply the
+        same rows twice. Returns the number of rows compacted.
+        """
+        with self._locked():
+            workbook = self._read_workbook()
+            journal = self._read_journal(workbook)
+            if journal.records:
+                wb = openpyxl.load_workbook(self.file_path)
+                ws = wb[self.sheet_name]
+                headers = [cell.value for cell in ws[1]]
+                for record in journal.records:
+                    ws.append([record.get(header) for header in headers])
+                if JOURNAL_ID_PROPERTY in wb.custom_doc_props.names:
+                    wb.custom_doc_props[JOURNAL_ID_PROPERTY].value = journal.journal_id
+                else:
+                    wb.custom_doc_props.append(
+                        StringProperty(name=JOURNAL_ID_PROPERTY, value=journal.journal_id)
+                    )
+                tmp_path = self.file_path + '.tmp'
+                wb.save(tmp_path)
+                os.replace(tmp_path, self.file_path)
+            if journal.version is not None:
+                open(self.journal_path, 'wb').close()
+            self.invalidate()
+            return len(journal.records)
 
 
 # Singleton instance
@@ -1,8 +1,21 @@
 """
-Export Cluster Nodes to Excel
-Fetches all clusters from Rancher, retrieves nodes for each cluster,
-and writes the output to an Excel file.
+Export Cluster Nodes to Excel, CSV or Parquet
+Fetches all clusters from Rancher, then their nodes (one paginated listing
+for larger fleets, otherwise per cluster in parallel), and streams the rows
+to the output file.
+
+Usage:  python export_cluster_nodes.py [output_path] [--format xlsx|csv|parquet]
+            [--workers N] [--state PATH | --no-state] [--changes-only]
+
+CSV and Parquet write two files: the node table at output_path and the
+cluster summary next to it as <name>_clusters.<ext>.
+
+Each run saves a snapshot (data/export_state.sqlite). The next run only
+downloads Rancher pages that changed and adds a "Changes" sheet (or
+<name>_changes.<ext>) of added, removed and state-changed clusters and nodes.
 """
+import argparse
+import csv
 import sys
 import os
 from datetime import datetime
@@ -12,12 +25,57 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
 except ImportError:
     print("openpyxl is required. Install it with:  pip install openpyxl")
     sys.exit(1)
 
-from rancher_utils import rancher_client
+from cache_utils import PageCache
+from rancher_utils import TransferStats, create_rancher_client
+from export_state_utils import CHANGE_HEADERS, ExportState, diff_inventory
+
+
+FORMATS = ("xlsx", "csv", "parquet")
+
+SUMMARY_HEADERS = [
+    "Cluster Name",
+    "Cluster ID",
+    "State",
+    "Provider",
+    "K8s Version",
+    "Total Nodes",
+    "Down Nodes",
+    "CPU Capacity",
+    "CPU Requested",
+    "Memory Capacity",
+    "Memory Requested",
+]
+
+NODE_HEADERS = [
+    "Cluster Name",
+    "Node Name",
+    "State",
+    "Roles",
+    "OS",
+    "Kernel",
+    "CPU Count",
+    "CPU Capacity",
+    "CPU Requested",
+    "Memory Capacity",
+    "Memory Requested",
+    "Allocatable CPU",
+    "Allocatable Memory",
+]
+
+# Snapshot of the last run (cluster/node states and Rancher page validators)
+DEFAULT_STATE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "export_state.sqlite"
+)
+
+# Column of the colour-coded state in both sheets (0-based)
+STATE_COLUMN = 2
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -29,200 +87,480 @@ def _safe(value, fallback="N/A"):
     return value
 
 
-# ── Main ──────────────────────────────────────────────────────────────────────
+def _field_name(header):
+    """Column name for CSV/Parquet: 'CPU Capacity' → 'cpu_capacity'."""
+    return header.lower().replace(" ", "_")
+
+
+def summary_row(cluster, nodes, fallback="N/A"):
+    return (
+        cluster.name,
+        cluster.id,
+        _safe(cluster.state, fallback),
+        _safe(cluster.provider, fallback),
+        _safe(cluster.k8s_version, fallback),
+        len(nodes),
+        sum(1 for n in nodes if n.is_down),
+        _safe(cluster.cpu_capacity, fallback),
+        _safe(cluster.cpu_requested, fallback),
+        _safe(cluster.memory_capacity, fallback),
+        _safe(cluster.memory_requested, fallback),
+    )
 
-def export_nodes_to_excel(output_path=None):
-    """Query Rancher for all clusters & nodes and write an Excel workbook."""
 
-    if output_path is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "data",
-            f"cluster_nodes_{timestamp}.xlsx",
-        )
+def node_row(cluster, node, fallback="N/A"):
+    return (
+        cluster.name,
+        _safe(node.name, fallback),
+        _safe(node.state, fallback),
+        ", ".join(node.roles) or fallback,
+        _safe(node.os_image, fallback),
+        _safe(node.kernel, fallback),
+        _safe(node.cpu_count, fallback),
+        _safe(node.cpu_capacity, fallback),
+        _safe(node.cpu_requested, fallback),
+        _safe(node.memory_capacity, fallback),
+        _safe(node.memory_requested, fallback),
+        _safe(node.allocatable_cpu, fallback),
+        _safe(node.allocatable_memory, fallback),
+    )
 
-    # Make sure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    print("Connecting to Rancher API …")
-    clusters = rancher_client.get_all_clusters()
-    print(f"Found {len(clusters)} cluster(s).\n")
+def default_output_path(fmt):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "data",
+        f"cluster_nodes_{timestamp}.{fmt}",
+    )
 
-    # ── Create workbook ───────────────────────────────────────────────────
-    wb = Workbook()
 
-    # ── Styles ────────────────────────────────────────────────────────────
-    header_font = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
-    header_fill = PatternFill(start_color="2F5496", end_color="2F5496", fill_type="solid")
-    header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+def companion_path(output_path, suffix):
+    """data/cluster_nodes.csv → data/cluster_nodes_clusters.csv"""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{suffix}{ext}"
+
+
+class ColumnWidths:
+    """Auto-fit column widths, updated row by row: longest value + padding, capped."""
+
+    def __init__(self, headers, padding=4, cap=40):
+        self.padding = padding
+        self.cap = cap
+        self.longest = [len(str(h)) for h in headers]
+
+    def add(self, row):
+        longest = self.longest
+        for i, value in enumerate(row):
+            if value is not None:
+                n = len(str(value))
+                if n > longest[i]:
+                    longest[i] = n
+
+    def widths(self):
+        return [min(n + self.padding, self.cap) for n in self.longest]
+
+
+# ── Writers ───────────────────────────────────────────────────────────────────
+#
+# Every writer takes add_nodes calls as node batches arrive (a cluster may
+# span several), one add_cluster call per cluster, an optional
+# add_changes(rows) with the diff against the previous run, and
+# returns the files it wrote from close(). With full=False only the
+# changes are written.
+
+class ExcelExport:
+    """
+    Workbook in openpyxl write-only mode: rows are streamed to disk instead
+    of held as styled cell objects. Column widths must be written before the
+    first row, so rows are kept as plain tuples (sharing the record strings)
+    while widths are tracked, and streamed into the sheets on close().
+    """
+
+    def __init__(self, output_path, full=True):
+        self.output_path = output_path
+        self.full = full
+        self.clusters = []
+        self.nodes = []
+        self.changes = None
+        self.cluster_widths = ColumnWidths(SUMMARY_HEADERS)
+        self.node_widths = ColumnWidths(NODE_HEADERS)
+
+    def add_cluster(self, cluster, nodes):
+        row = summary_row(cluster, nodes)
+        self.cluster_widths.add(row)
+        # Colour-code cluster state: active green, anything else red
+        self.clusters.append((row, cluster.state.lower() != "active"))
+
+    def add_nodes(self, cluster, nodes):
+        for node in nodes:
+            row = node_row(cluster, node)
+            self.node_widths.add(row)
+            # Colour-code node state: active green, down red, others plain
+            if node.state.lower() == "active":
+                down = False
+            else:
+                down = True if node.is_down else None
+            self.nodes.append((row, down))
+
+    def add_changes(self, changes):
+        self.changes = changes
+
+    def close(self):
+        wb = Workbook(write_only=True)
+
+        # ── Styles ────────────────────────────────────────────────────────
+        self.header_font = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
+        self.header_fill = PatternFill(start_color="2F5496", end_color="2F5496", fill_type="solid")
+        self.header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+        self.active_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+        self.active_font = Font(color="006100")
+        self.down_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+        self.down_font = Font(color="9C0006")
+
+        self.thin_border = Border(
+            left=Side(style="thin"),
+            right=Side(style="thin"),
+            top=Side(style="thin"),
+            bottom=Side(style="thin"),
+        )
+
+        # ── Changes since the previous run (first, for reviewers) ────────
+        if self.changes is not None:
+            widths = ColumnWidths(CHANGE_HEADERS)
+            for row in self.changes:
+                widths.add(row)
+            ws_changes = self._sheet(wb, "Changes", CHANGE_HEADERS, widths, len(self.changes))
+            for row in self.changes:
+                ws_changes.append(row)
+
+        if self.full:
+            # ── Summary (all clusters) ────────────────────────────────────
+            ws_summary = self._sheet(wb, "Cluster Summary", SUMMARY_HEADERS,
+                                     self.cluster_widths, len(self.clusters))
+            for row, down in self.clusters:
+                ws_summary.append(self._styled(ws_summary, row, down))
+
+            # ── All Nodes ─────────────────────────────────────────────────
+            ws_nodes = self._sheet(wb, "All Nodes", NODE_HEADERS,
+                                   self.node_widths, len(self.nodes))
+            for row, down in self.nodes:
+                ws_nodes.append(self._styled(ws_nodes, row, down))
+
+        wb.save(self.output_path)
+        return [self.output_path]
+
+    def _sheet(self, wb, title, headers, widths, row_count):
+        """Write-only sheet with widths, filter and frozen header set up front."""
+        ws = wb.create_sheet(title)
+        for col_idx, width in enumerate(widths.widths(), 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        last_col = get_column_letter(len(headers))
+        ws.auto_filter.ref = f"A1:{last_col}{row_count + 1}"
+        ws.freeze_panes = "A2"
+
+        header = []
+        for value in headers:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            cell.alignment = self.header_align
+            cell.border = self.thin_border
+            header.append(cell)
+        ws.append(header)
+        return ws
+
+    def _styled(self, ws, row, down):
+        """Row with its state cell coloured: down True → red, False → green, None → plain."""
+        if down is None:
+            return row
+        cell = WriteOnlyCell(ws, value=row[STATE_COLUMN])
+        cell.fill = self.down_fill if down else self.active_fill
+        cell.font = self.down_font if down else self.active_font
+        return (*row[:STATE_COLUMN], cell, *row[STATE_COLUMN + 1:])
+
+
+class CsvExport:
+    """Node and cluster tables as CSV, written row by row as clusters arrive."""
+
+    def __init__(self, output_path, full=True):
+        self.output_path = output_path
+        self.paths = []
+        self._files = []
+        if full:
+            self.node_writer = self._open(output_path, NODE_HEADERS)
+            self.cluster_writer = self._open(companion_path(output_path, "clusters"), SUMMARY_HEADERS)
+
+    def _open(self, path, headers):
+        f = open(path, "w", newline="", encoding="utf-8")
+        self._files.append(f)
+        self.paths.append(path)
+        writer = csv.writer(f)
+        writer.writerow([_field_name(h) for h in headers])
+        return writer
+
+    def add_cluster(self, cluster, nodes):
+        self.cluster_writer.writerow(summary_row(cluster, nodes, fallback=""))
+
+    def add_nodes(self, cluster, nodes):
+        self.node_writer.writerows(node_row(cluster, node, fallback="") for node in nodes)
+
+    def add_changes(self, changes):
+        path = companion_path(self.output_path, "changes") if self.paths else self.output_path
+        self._open(path, CHANGE_HEADERS).writerows(changes)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+        return self.paths
+
+
+class ParquetExport:
+    """
+    Node and cluster tables as Parquet (needs pyarrow), written in row
+    groups of ``batch_size`` rows so only one batch is buffered at a time.
+    Missing values are nulls; node and cluster counts are int64.
+    """
+
+    def __init__(self, output_path, full=True, batch_size=10000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("pyarrow is required for Parquet output. Install it with:  pip install pyarrow")
+            sys.exit(1)
+        self.pa = pa
+        self.pq = pq
+        self.output_path = output_path
+        self.batch_size = batch_size
+        self.paths = []
+        self._writers = []
+        if full:
+            self.node_schema = self._schema(NODE_HEADERS)
+            self.cluster_schema = self._schema(SUMMARY_HEADERS, ("Total Nodes", "Down Nodes"))
+            self.node_writer = self._open(output_path, self.node_schema)
+            self.cluster_writer = self._open(companion_path(output_path, "clusters"), self.cluster_schema)
+        self.node_rows = []
+        self.cluster_rows = []
+
+    def _schema(self, headers, int_columns=()):
+        pa = self.pa
+        return pa.schema([
+            (_field_name(h), pa.int64() if h in int_columns else pa.string())
+            for h in headers
+        ])
 
-    active_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    active_font = Font(color="006100")
-    down_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    down_font = Font(color="9C0006")
+    def _open(self, path, schema):
+        writer = self.pq.ParquetWriter(path, schema)
+        self._writers.append(writer)
+        self.paths.append(path)
+        return writer
+
+    def add_cluster(self, cluster, nodes):
+        self.cluster_rows.append(summary_row(cluster, nodes, fallback=None))
+        if len(self.cluster_rows) >= self.batch_size:
+            self._flush(self.cluster_writer, self.cluster_schema, self.cluster_rows)
+
+    def add_nodes(self, cluster, nodes):
+        self.node_rows.extend(node_row(cluster, node, fallback=None) for node in nodes)
+        if len(self.node_rows) >= self.batch_size:
+            self._flush(self.node_writer, self.node_schema, self.node_rows)
+
+    def add_changes(self, changes):
+        path = companion_path(self.output_path, "changes") if self.paths else self.output_path
+        schema = self._schema(CHANGE_HEADERS)
+        # Empty strings in the change rows mean "not applicable": store nulls
+        rows = [tuple(v if v != "" else None for v in row) for row in changes]
+        self._flush(self._open(path, schema), schema, rows)
+
+    def _flush(self, writer, schema, rows):
+        if rows:
+            # Rancher values are mostly strings but not always (cpu count)
+            columns = [
+                list(col) if field.type != self.pa.string()
+                else [None if v is None else str(v) for v in col]
+                for field, col in zip(schema, zip(*rows))
+            ]
+            writer.write_table(self.pa.Table.from_arrays(columns, schema=schema))
+            rows.clear()
+
+    def close(self):
+        if self.node_rows:
+            self._flush(self.node_writer, self.node_schema, self.node_rows)
+        if self.cluster_rows:
+            self._flush(self.cluster_writer, self.cluster_schema, self.cluster_rows)
+        for writer in self._writers:
+            writer.close()
+        return self.paths
+
+
+WRITERS = {"xlsx": ExcelExport, "csv": CsvExport, "parquet": ParquetExport}
 
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
 
-    # ── Sheet 1: Summary (all clusters) ──────────────────────────────────
-    ws_summary = wb.active
-    ws_summary.title = "Cluster Summary"
-
-    summary_headers = [
-        "Cluster Name",
-        "Cluster ID",
-        "State",
-        "Provider",
-        "K8s Version",
-        "Total Nodes",
-        "Down Nodes",
-        "CPU Capacity",
-        "CPU Requested",
-        "Memory Capacity",
-        "Memory Requested",
-    ]
-    ws_summary.append(summary_headers)
-
-    for col_idx, _ in enumerate(summary_headers, 1):
-        cell = ws_summary.cell(row=1, column=col_idx)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-        cell.border = thin_border
-
-    # ── Sheet 2: All Nodes ────────────────────────────────────────────────
-    ws_nodes = wb.create_sheet("All Nodes")
-
-    node_headers = [
-        "Cluster Name",
-        "Node Name",
-        "State",
-        "Roles",
-        "OS",
-        "Kernel",
-        "CPU Count",
-        "CPU Capacity",
-        "CPU Requested",
-        "Memory Capacity",
-        "Memory Requested",
-        "Allocatable CPU",
-        "Allocatable Memory",
-    ]
-    ws_nodes.append(node_headers)
-
-    for col_idx, _ in enumerate(node_headers, 1):
-        cell = ws_nodes.cell(row=1, column=col_idx)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-        cell.border = thin_border
-
-    # ── Populate data ─────────────────────────────────────────────────────
-    total_nodes = 0
-    for cluster in clusters:
-        cid = cluster["id"]
-        cname = cluster["name"]
-        print(f"  Fetching nodes for cluster: {cname} ({cid}) …")
+# ── Main ──────────────────────────────────────────────────────────────────────
 
-        try:
-            nodes = rancher_client.get_cluster_nodes(cid)
-        except Exception as exc:
-            print(f"    ⚠  Could not fetch nodes: {exc}")
-            nodes = []
-
-        down_count = sum(1 for n in nodes if n.get("is_down"))
-
-        # Summary row
-        ws_summary.append([
-            cname,
-            cid,
-            _safe(cluster.get("state")),
-            _safe(cluster.get("provider")),
-            _safe(cluster.get("k8s_version")),
-            len(nodes),
-            down_count,
-            _safe(cluster.get("cpu_capacity")),
-            _safe(cluster.get("cpu_requested")),
-            _safe(cluster.get("memory_capacity")),
-            _safe(cluster.get("memory_requested")),
-        ])
+def export_nodes(output_path=None, fmt="xlsx", workers=None, state_path=DEFAULT_STATE_PATH,
+                 changes_only=False):
+    """
+    Query Rancher for all clusters & nodes and write them as xlsx, csv or
+    parquet. From RANCHER_BULK_NODES_THRESHOLD clusters up, nodes come from
+    one paginated /v3/nodes listing; smaller fleets (or a failed listing)
+    are fetched ``workers`` clusters at a time (default
+    RANCHER_MAX_CONCURRENCY). Node rows are written as they arrive and the
+    cluster summaries once all nodes are in.
+
+    With a ``state_path`` (SQLite, see export_state_utils), the previous
+    run's snapshot is used to re-request Rancher pages conditionally (only
+    changed pages are downloaded) and to add a Changes sheet/file of added,
+    removed and state-changed clusters and nodes; this run then replaces
+    the snapshot. ``changes_only`` writes just the changes.
+    Returns the list of files written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if output_path is None:
+        output_path = default_output_path(fmt)
 
-        # Colour-code cluster state
-        state_cell = ws_summary.cell(row=ws_summary.max_row, column=3)
-        if cluster.get("state", "").lower() == "active":
-            state_cell.fill = active_fill
-            state_cell.font = active_font
-        else:
-            state_cell.fill = down_fill
-            state_cell.font = down_font
+    # Make sure output directory exists
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    # A batch export waits for every cluster and every federated endpoint
+    # (per-request timeouts and retries still apply) rather than the
+    # interactive fan-out and endpoint deadlines. It gets a client of its
+    # own, so a process that also serves chat keeps those deadlines.
+    # With a state file it keeps every page of this run in a PageCache of
+    # its own, so all their validators can be saved.
+    pages = PageCache(max_entries=float("inf")) if state_path else None
+    client = create_rancher_client(pages)
+    for endpoint in client.endpoints:
+        if workers:
+            endpoint.max_concurrency = max(1, workers)
+        endpoint.fanout_timeout = None
+        endpoint.deadline = None
+
+    state = None
+    if state_path:
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+        state = ExportState(state_path)
+        loaded = state.load_pages(pages)
+        if state.exported_at is not None:
+            previous = datetime.fromtimestamp(state.exported_at).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"Previous export: {previous} ({loaded} cached page(s))")
+    if changes_only and (state is None or state.exported_at is None):
+        print("No previous export snapshot to compare with; writing the full export.")
+        changes_only = False
+    transfer_before = client.transfer.snapshot()
 
-        # Node rows
+    print("Connecting to Rancher API …")
+    clusters = client.get_all_clusters()
+    print(f"Found {len(clusters)} cluster(s).\n")
+    by_id = {c.id: c for c in clusters}
+
+    writer = WRITERS[fmt](output_path, full=not changes_only)
+    current_clusters = {c.id: (c.name, c.state) for c in clusters}
+    current_nodes = {}
+    for failed in client.failed_endpoints():
+        print(f"  ⚠  Rancher endpoint skipped — {failed['error']}")
+        # Carry its last known clusters forward rather than reporting them removed
+        if state is not None:
+            prefix = f"{failed['name']}:"
+            current_clusters.update(
+                (cid, cluster) for cid, cluster in state.clusters.items() if cid.startswith(prefix)
+            )
+            current_nodes.update(
+                (key, node_state) for key, node_state in state.nodes.items() if key[0].startswith(prefix)
+            )
+
+    # ── Populate data (node rows streamed as they arrive) ────────────────
+    endpoint = client.endpoints[0]
+    if len(clusters) >= endpoint.bulk_nodes_threshold:
+        print("Fetching nodes (one paginated listing per Rancher server) …")
+    else:
+        concurrency = sum(e.max_concurrency for e in client.endpoints)
+        print(f"Fetching nodes ({concurrency} clusters at a time) …")
+    nodes_by_cluster = {cid: [] for cid in by_id}
+    errors = {}
+    for cid, nodes, error in client.iter_node_batches(by_id):
+        cluster = by_id[cid]
+        if error:
+            errors[cid] = error
+        if not changes_only:
+            writer.add_nodes(cluster, nodes)
+        nodes_by_cluster[cid].extend(nodes)
         for node in nodes:
-            ws_nodes.append([
-                cname,
-                _safe(node.get("name")),
-                _safe(node.get("state")),
-                ", ".join(node.get("roles", [])) or "N/A",
-                _safe(node.get("os_image")),
-                _safe(node.get("kernel")),
-                _safe(node.get("cpu_count")),
-                _safe(node.get("cpu_capacity")),
-                _safe(node.get("cpu_requested")),
-                _safe(node.get("memory_capacity")),
-                _safe(node.get("memory_requested")),
-                _safe(node.get("allocatable_cpu")),
-                _safe(node.get("allocatable_memory")),
-            ])
-
-            # Colour-code node state
-            node_state_cell = ws_nodes.cell(row=ws_nodes.max_row, column=3)
-            if node.get("state", "").lower() == "active":
-                node_state_cell.fill = active_fill
-                node_state_cell.font = active_font
-            elif node.get("is_down"):
-                node_state_cell.fill = down_fill
-                node_state_cell.font = down_font
-
-            total_nodes += 1
+            current_nodes[(cid, node.name)] = node.state
 
+    # ── Cluster summaries, once every node listing is done ───────────────
+    total_nodes = 0
+    for cluster in clusters:
+        nodes = nodes_by_cluster[cluster.id]
+        print(f"  Cluster: {cluster.name} ({cluster.id}) …")
+        if cluster.id in errors:
+            print(f"    ⚠  Could not fetch nodes: {errors[cluster.id]}")
+            # Carry the last known nodes forward rather than reporting them removed
+            if state is not None:
+                current_nodes.update(
+                    (key, node_state) for key, node_state in state.nodes.items() if key[0] == cluster.id
+                )
+
+        if not changes_only:
+            writer.add_cluster(cluster, nodes)
+        total_nodes += len(nodes)
+
+        down_count = sum(1 for n in nodes if n.is_down)
         print(f"    ✓ {len(nodes)} node(s) ({down_count} down)")
 
-    # ── Auto-fit column widths ────────────────────────────────────────────
-    for ws in [ws_summary, ws_nodes]:
-        for col in ws.columns:
-            max_len = 0
-            col_letter = col[0].column_letter
-            for cell in col:
-                try:
-                    if cell.value:
-                        max_len = max(max_len, len(str(cell.value)))
-                except Exception:
-                    pass
-            ws.column_dimensions[col_letter].width = min(max_len + 4, 40)
-
-    # ── Add filters ───────────────────────────────────────────────────────
-    ws_summary.auto_filter.ref = ws_summary.dimensions
-    ws_nodes.auto_filter.ref = ws_nodes.dimensions
-
-    # ── Freeze header row ─────────────────────────────────────────────────
-    ws_summary.freeze_panes = "A2"
-    ws_nodes.freeze_panes = "A2"
+    changes = None
+    if state is not None and state.exported_at is not None:
+        changes = diff_inventory(state.clusters, state.nodes, current_clusters, current_nodes)
+        writer.add_changes(changes)
 
     # ── Save ──────────────────────────────────────────────────────────────
-    wb.save(output_path)
+    paths = writer.close()
+    if state is not None:
+        state.save(current_clusters, current_nodes, client.pages)
+        state.close()
+
+    transfer = TransferStats.delta(client.transfer.snapshot(), transfer_before)
     print(f"\n{'='*60}")
-    print(f"Excel report saved → {output_path}")
+    for path in paths:
+        print(f"{fmt.upper()} report saved → {path}")
     print(f"  Clusters: {len(clusters)}  |  Total nodes: {total_nodes}")
+    print(f"  Rancher pages: {transfer['pages']} "
+          f"({transfer['not_modified']} unchanged since the last run)")
+    if changes is not None:
+        print(f"  Changes since the previous export: {len(changes)}")
     print(f"{'='*60}")
-    return output_path
+    return paths
+
+
+def export_nodes_to_excel(output_path=None):
+    """Query Rancher for all clusters & nodes and write an Excel workbook."""
+    return export_nodes(output_path, "xlsx")[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Rancher clusters and nodes")
+    parser.add_argument("output_path", nargs="?", help="output file (default: data/cluster_nodes_<timestamp>.<format>)")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="output format (default: from the output file extension, else xlsx)")
+    parser.add_argument("--workers", type=int, help="clusters fetched in parallel (default: RANCHER_MAX_CONCURRENCY)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH,
+                        help="snapshot of the last run, for changes and conditional fetches (default: %(default)s)")
+    parser.add_argument("--no-state", action="store_true", help="full export without reading or saving a snapshot")
+    parser.add_argument("--changes-only", action="store_true",
+                        help="write only the changes since the previous run")
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt is None and args.output_path:
+        ext = os.path.splitext(args.output_path)[1].lstrip(".").lower()
+        fmt = ext if ext in FORMATS else None
+    export_nodes(args.output_path, fmt or "xlsx", args.workers,
+                 state_path=None if args.no_state else args.state,
+                 changes_only=args.changes_only)
 
 
 if __name__ == "__main__":
-    # Optional: pass a custom output path as first argument
-    custom_path = sys.argv[1] if len(sys.argv) > 1 else None
-    export_nodes_to_excel(custom_path)
+    main()
@@ -0,0 +1,137 @@
+"""
+Snapshot of the last export_cluster_nodes.py run, kept in a local SQLite file.
+Holds every cluster's and node's state, for the "Changes" report of the next
+run, and the ETag/Last-Modified validators of every Rancher page fetched,
+together with the parsed records. On the next run the page cache is seeded
+from it, so pages Rancher answers with 304 Not Modified are neither
+downloaded nor parsed again.
+"""
+import json
+import sqlite3
+import time
+
+from cache_utils import CachedPage
+from record_utils import ClusterRecord, NodeRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS clusters (id TEXT PRIMARY KEY, name TEXT, state TEXT);
+CREATE TABLE IF NOT EXISTS nodes (
+    cluster_id TEXT, name TEXT, state TEXT, PRIMARY KEY (cluster_id, name)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY, kind TEXT, etag TEXT, last_modified TEXT, next_url TEXT, items TEXT
+);
+"""
+
+RECORD_KINDS = {'cluster': ClusterRecord, 'node': NodeRecord}
+
+CHANGE_HEADERS = ['Change', 'Kind', 'Cluster Name', 'Node Name', 'Previous State', 'State']
+
+
+def _page_key(key):
+    """PageCache key (url, params tuple) ⇄ JSON text."""
+    url, params = key
+    return json.dumps([url, [list(p) for p in params]])
+
+
+def _load_page_key(text):
+    url, params = json.loads(text)
+    return url, tuple(tuple(p) for p in params)
+
+
+class ExportState:
+    """
+    The last run's snapshot at ``path``. ``clusters`` maps cluster ID to
+    (name, state) and ``nodes`` maps (cluster ID, node name) to state; both
+    are empty, and ``exported_at`` is None, before the first run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'exported_at'").fetchone()
+        self.exported_at = float(row[0]) if row else None
+        self.clusters = {
+            cid: (name, state)
+            for cid, name, state in self.conn.execute('SELECT id, name, state FROM clusters')
+        }
+        self.nodes = {
+            (cid, name): state
+            for cid, name, state in self.conn.execute('SELECT cluster_id, name, state FROM nodes')
+        }
+
+    def load_pages(self, page_cache):
+        """Seed a PageCache with the saved pages; returns how many were loaded."""
+        count = 0
+        for key, kind, etag, last_modified, next_url, items in self.conn.execute(
+            'SELECT key, kind, etag, last_modified, next_url, items FROM pages'
+        ):
+            record_type = RECORD_KINDS[kind]
+            records = [record_type.from_dict(item) for item in json.loads(items)]
+            page_cache.put(_load_page_key(key), CachedPage(etag, last_modified, records, next_url))
+            count += 1
+        return count
+
+    def save(self, clusters, nodes, page_cache, exported_at=None):
+        """Replace the snapshot with this run's cluster/node states and cached pages."""
+        pages = []
+        for key, page in page_cache.items():
+            kind = 'cluster' if page.items and isinstance(page.items[0], ClusterRecord) else 'node'
+            items = json.dumps([record.to_dict() for record in page.items])
+            pages.append((_page_key(key), kind, page.etag, page.last_modified, page.next_url, items))
+
+        with self.conn:
+            for table in ('meta', 'clusters', 'nodes', 'pages'):
+                self.conn.execute(f'DELETE FROM {table}')
+            self.conn.execute(
+                "INSERT INTO meta VALUES ('exported_at', ?)", (str(exported_at or time.time()),)
+            )
+            self.conn.executemany(
+                'INSERT INTO clusters VALUES (?, ?, ?)',
+                ((cid, name, state) for cid, (name, state) in clusters.items()),
+            )
+            self.conn.executemany(
+                'INSERT INTO nodes VALUES (?, ?, ?)',
+                ((cid, name, state) for (cid, name), state in nodes.items()),
+            )
+            self.conn.executemany('INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?)', pages)
+
+    def close(self):
+        self.conn.close()
+
+
+def diff_inventory(old_clusters, old_nodes, clusters, nodes):
+    """
+    Rows for the Changes report between two runs (same shape as
+    ExportState.clusters / .nodes), clusters first:
+    (change, kind, cluster name, node name, previous state, state).
+    Nodes of added or removed clusters are implied by the cluster row.
+    """
+    changes = []
+    for cid, (name, state) in clusters.items():
+        before = old_clusters.get(cid)
+        if before is None:
+            changes.append(('added', 'Cluster', name, '', '', state))
+        elif before[1] != state:
+            changes.append(('state changed', 'Cluster', name, '', before[1], state))
+    for cid, (name, state) in old_clusters.items():
+        if cid not in clusters:
+            changes.append(('removed', 'Cluster', name, '', state, ''))
+
+    def cluster_name(cid):
+        return (clusters.get(cid) or old_clusters.get(cid))[0]
+
+    for (cid, name), state in nodes.items():
+        if cid not in old_clusters:
+            continue
+        before = old_nodes.get((cid, name))
+        if before is None:
+            changes.append(('added', 'Node', cluster_name(cid), name, '', state))
+        elif before != state:
+            changes.append(('state changed', 'Node', cluster_name(cid), name, before, state))
+    for (cid, name), state in old_nodes.items():
+        if cid in clusters and (cid, name) not in nodes:
+            changes.append(('removed', 'Node', cluster_name(cid), name, state, ''))
+    return changes
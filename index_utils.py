@@ -0,0 +1,110 @@
+"""
+In-memory text indexes shared by the Rancher inventory snapshot and the
+Excel data manager: n-gram substring search over names, and a token index
+for full-text search over records.
+"""
+import re
+from collections import Counter
+
+
+class NgramIndex:
+    """
+    Character n-gram index over a list of names for case-insensitive
+    substring lookups and fuzzy "did you mean" ranking. Each name is
+    identified by its position in the list.
+    """
+
+    def __init__(self, names, n=3):
+        self.n = n
+        self.names = [name.lower() for name in names]
+        self.postings = {}
+        self.gram_counts = []
+        for idx, name in enumerate(self.names):
+            grams = self._grams(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(idx)
+
+    def _grams(self, text):
+        """Distinct n-grams of text (empty for text shorter than n)."""
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def search(self, keyword):
+        """Return the ids of names containing keyword, in insertion order."""
+        kw = keyword.lower()
+        if len(kw) < self.n:
+            # Too short to have an n-gram: plain scan over the names
+            return [i for i, name in enumerate(self.names) if kw in name]
+
+        candidates = None
+        for gram in sorted(self._grams(kw), key=lambda g: len(self.postings.get(g, ()))):
+            ids = self.postings.get(gram)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        # Every n-gram present doesn't guarantee the substring; verify
+        return sorted(i for i in candidates if kw in self.names[i])
+
+    def similar(self, keyword, limit=5, min_score=0.3):
+        """
+        Rank names by n-gram overlap with keyword (Dice coefficient), reading
+        only the posting lists of the keyword's n-grams rather than comparing
+        against every name. Returns [(id, score), ...], best first.
+        """
+        grams = self._grams(keyword.lower())
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        scored = []
+        for idx, common in shared.items():
+            score = 2.0 * common / (len(grams) + self.gram_counts[idx])
+            if score >= min_score:
+                scored.append((idx, score))
+        scored.sort(key=lambda item: (-item[1], len(self.names[item[0]]), self.names[item[0]]))
+        return scored[:limit]
+
+
+class TokenIndex:
+    """
+    Full-text index over one text per record: a posting list of record ids
+    per alphanumeric token, plus an n-gram index over the token vocabulary.
+    search() returns the same records as a plain case-insensitive substring
+    scan, but only verifies records that share every query token.
+    """
+
+    TOKEN = re.compile(r'[a-z0-9]+')
+
+    def __init__(self, texts):
+        self.texts = [text.lower() for text in texts]
+        postings = {}
+        for idx, text in enumerate(self.texts):
+            for token in set(self.TOKEN.findall(text)):
+                postings.setdefault(token, []).append(idx)
+        self.vocabulary = list(postings)
+        self.postings = [postings[token] for token in self.vocabulary]
+        self.vocab_index = NgramIndex(self.vocabulary)
+
+    def search(self, query):
+        """Ids of texts containing query (case-insensitive), in insertion order."""
+        q = query.lower()
+        tokens = set(self.TOKEN.findall(q))
+        if not tokens:
+            # Punctuation-only query: nothing to look up, scan
+            return [i for i, text in enumerate(self.texts) if q in text]
+
+        # Each alphanumeric run of the query lies inside one token of a
+        # matching text, so candidates hold a token containing every run
+        candidates = None
+        for token in sorted(tokens, key=len, reverse=True):
+            ids = set()
+            for vocab_id in self.vocab_index.search(token):
+                ids.update(self.postings[vocab_id])
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if q in self.texts[i])
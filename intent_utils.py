@@ -0,0 +1,174 @@
+"""
+Table-driven intent matching for chat queries.
+Each intent rule declares the trigger words that make it a candidate and a
+resolver with precompiled patterns. One pass of a combined trigger regex over
+the query selects the candidate rules, so adding rules doesn't slow down
+queries that can't match them.
+"""
+import re
+
+
+class IntentRule:
+    """A named rule: trigger substrings plus a resolver(q, query) -> dict or None."""
+
+    __slots__ = ('name', 'triggers', 'resolve', 'priority')
+
+    def __init__(self, name, triggers, resolve, priority):
+        self.name = name
+        self.triggers = tuple(t.lower() for t in triggers)
+        self.resolve = resolve
+        self.priority = priority
+
+
+class IntentRegistry:
+    """
+    Ordered collection of intent rules. Rules are tried in registration order
+    (first match wins), but only those whose triggers occur in the query.
+    A rule's triggers must be substrings that every query it accepts contains.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.rules = []
+        self._trigger_re = None
+        self._rules_by_trigger = {}
+
+    def register(self, name, triggers):
+        """Decorator registering resolver(q, query) as the next rule in priority order."""
+        def decorator(resolve):
+            self.rules.append(IntentRule(name, triggers, resolve, len(self.rules)))
+            self._compile()
+            return resolve
+        return decorator
+
+    def _compile(self):
+        """Build the combined trigger regex and the trigger → rules map."""
+        triggers = {t for r in self.rules for t in r.triggers}
+        # Lookahead so overlapping triggers ("nodetail" → node, detail) are all seen;
+        # at each position the longest trigger wins, so it also stands for any
+        # shorter trigger that is a prefix of it
+        self._trigger_re = re.compile('(?=(' + _trie_pattern(triggers) + '))')
+        self._rules_by_trigger = {
+            t: sorted({r.priority for r in self.rules for rt in r.triggers if t.startswith(rt)})
+            for t in triggers
+        }
+
+    def candidates(self, q):
+        """Priorities of the rules triggered by the lowercased query, in order."""
+        hits = set()
+        for m in self._trigger_re.finditer(q):
+            hits.update(self._rules_by_trigger[m.group(1)])
+        return sorted(hits)
+
+    def match(self, query):
+        """Return {'intent': ..., 'keyword': ...} for a raw user query."""
+        q = query.lower().strip()
+        if self.rules:
+            for priority in self.candidates(q):
+                result = self.rules[priority].resolve(q, query)
+                if result is not None:
+                    return result
+        return self.fallback(q, query)
+
+
+def _trie_pattern(words):
+    """
+    Regex alternation for words, factored into a prefix trie
+    ("node|nodes|cpu" → "(?:cpu|node(?:s)?)") so matching cost at each
+    position depends on the query, not on how many words there are.
+    Longer words are preferred over their prefixes.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        ends_here = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if ends_here else body
+
+    return build(trie)
+
+
+# ── Rules ─────────────────────────────────────────────────────────────────────
+
+def _search_cluster(q, query):
+    """Fallback: treat the whole query as a cluster name keyword."""
+    return {'intent': 'search_cluster', 'keyword': query.strip()}
+
+
+registry = IntentRegistry(fallback=_search_cluster)
+
+_LIST_CLUSTERS_RE = re.compile(r'\b(list|show|get|all)\b.*\bclusters?\b')
+_CLUSTER_DETAIL_RE = re.compile(
+    r'(?:cluster|show me|details?(?:\s+of)?|status(?:\s+of)?)\s+([a-z0-9_\-\.]+)'
+)
+_NODES_RE = re.compile(r'\bnodes?\b')
+_NODE_NAME_RE = re.compile(r'\bnode\s+([a-z0-9_\-\.]+)')
+_RESOURCES_RE = re.compile(r'\b(cpu|memory|mem|resources?|utilization|usage)\b')
+_RESOURCE_TARGET_RE = re.compile(r'(?:cpu|memory|mem|resources?|usage).*?\b([a-z0-9_\-\.]{3,})\b')
+
+
+_TOP_RE = re.compile(r'\b(?:top|most|highest|busiest)\b(?:\s+(\d+))?')
+_TOP_RESOURCE_RE = re.compile(r'\b(cpu|memory|mem)\b')
+_TOP_SCOPE_RE = re.compile(r'\bnodes?\b')
+
+
+@registry.register('top_utilization', triggers=('top', 'most', 'highest', 'busiest'))
+def _top_utilization(q, query):
+    """'top 10 clusters by memory pressure', 'busiest nodes by cpu'."""
+    top = _TOP_RE.search(q)
+    resource = _TOP_RESOURCE_RE.search(q)
+    if not top or not resource:
+        return None
+    limit = min(int(top.group(1) or 10), 50)
+    return {
+        'intent': 'top_nodes' if _TOP_SCOPE_RE.search(q) else 'top_clusters',
+        'keyword': 'cpu' if resource.group(1) == 'cpu' else 'memory',
+        'limit': max(limit, 1),
+    }
+
+
+@registry.register('list_clusters', triggers=('cluster',))
+def _list_clusters(q, query):
+    """'list all clusters', 'show clusters', ..."""
+    if _LIST_CLUSTERS_RE.search(q) or q in ('clusters', 'all clusters'):
+        return {'intent': 'list_clusters', 'keyword': ''}
+    return None
+
+
+@registry.register('cluster_detail', triggers=('cluster', 'show me', 'detail', 'status'))
+def _cluster_detail(q, query):
+    """'cluster prod', 'status of dev', 'details of staging'."""
+    m = _CLUSTER_DETAIL_RE.search(q)
+    if m:
+        return {'intent': 'cluster_detail', 'keyword': m.group(1)}
+    return None
+
+
+@registry.register('nodes', triggers=('node',))
+def _nodes(q, query):
+    """'node worker-01' → that node; any other node question → all clusters."""
+    if not _NODES_RE.search(q):
+        return None
+    nm = _NODE_NAME_RE.search(q)
+    if nm:
+        return {'intent': 'node_detail', 'keyword': nm.group(1)}
+    return {'intent': 'list_clusters', 'keyword': ''}   # show all with node info
+
+
+@registry.register('resources', triggers=('cpu', 'mem', 'resource', 'utilization', 'usage'))
+def _resources(q, query):
+    """'cpu usage for staging' → that cluster; bare resource questions → all clusters."""
+    if not _RESOURCES_RE.search(q):
+        return None
+    cm = _RESOURCE_TARGET_RE.search(q)
+    if cm:
+        return {'intent': 'cluster_detail', 'keyword': cm.group(1)}
+    return {'intent': 'list_clusters', 'keyword': ''}
@@ -0,0 +1,271 @@
+"""
+In-memory inventory snapshot of Rancher clusters and nodes.
+A background thread rebuilds the snapshot periodically; chat lookups read the
+prebuilt indexes instead of calling Rancher on every request.
+"""
+import copy
+import threading
+import time
+
+from config import INVENTORY_REFRESH_SECONDS
+from index_utils import NgramIndex
+from rancher_utils import TransferStats, rancher_client
+from resource_utils import ResourceTable, fleet_statistics, rank_utilization
+from record_utils import ClusterSummary, sort_nodes
+
+
+class InventorySnapshot:
+    """
+    Immutable view of the whole inventory with prebuilt cluster summaries
+    and lookup indexes. Never modified after construction, so readers can
+    use it without locking.
+    """
+
+    def __init__(self, clusters, node_index, fetched_at, version):
+        self.fetched_at = fetched_at
+        self.version = version
+
+        # Prebuilt summaries, same shape as RancherClient.get_cluster_summary()
+        self.summaries = [
+            ClusterSummary(cluster, node_index.get(cluster.id, [])) for cluster in clusters
+        ]
+
+        # Fleet aggregates, computed once per refresh for /api/stats
+        self.stats = fleet_statistics(
+            clusters, {s.id: s.nodes for s in self.summaries}
+        )
+        self.stats['failed_clusters'] = []
+
+        # Columnar node resources for utilization rankings
+        self.resources = ResourceTable(self.summaries)
+        self.stats['utilization'] = self.resources.fleet_utilization()
+
+        # Exact-name and ID maps
+        self.by_id = {s.id: s for s in self.summaries}
+        self.by_name = {}
+        for s in self.summaries:
+            self.by_name.setdefault(s.name.lower(), []).append(s)
+
+        # Substring indexes over cluster names and node names; node ids map
+        # back to (summary position, node) for node→cluster lookups
+        self.cluster_index = NgramIndex([s.name for s in self.summaries])
+        self.node_refs = [
+            (pos, node)
+            for pos, s in enumerate(self.summaries)
+            for node in s.nodes
+        ]
+        self.node_index = NgramIndex([node.name for _, node in self.node_refs])
+        # Name-sorted node lists for paging, built on first request per cluster
+        self._sorted_nodes = {}
+        self.node_clusters = {}
+        for pos, node in self.node_refs:
+            self.node_clusters.setdefault(node.name.lower(), []).append(
+                self.summaries[pos].id
+            )
+
+    def age_seconds(self):
+        """Seconds since the data in this snapshot was fetched."""
+        return round(max(0.0, time.time() - self.fetched_at), 1)
+
+    def holds(self, clusters, node_index):
+        """
+        True if these are the very records this snapshot was built from
+        (pages answered 304 Not Modified return the same record objects).
+        """
+        if len(clusters) != len(self.summaries):
+            return False
+        for s, cluster in zip(self.summaries, clusters):
+            nodes = node_index.get(cluster.id, [])
+            if s.cluster is not cluster or len(nodes) != len(s.nodes):
+                return False
+            if any(a is not b for a, b in zip(nodes, s.nodes)):
+                return False
+        return True
+
+    def redated(self, fetched_at):
+        """Shallow copy of this snapshot with a new fetch time (same version and indexes)."""
+        snapshot = copy.copy(self)
+        snapshot.fetched_at = fetched_at
+        return snapshot
+
+    def all_clusters(self):
+        """Every cluster summary, in Rancher order."""
+        return self.summaries
+
+    def find_clusters(self, keyword):
+        """Cluster summaries whose name contains keyword (case-insensitive)."""
+        return [self.summaries[i] for i in self.cluster_index.search(keyword)]
+
+    def suggest(self, keyword, limit=5):
+        """
+        Closest cluster and node names to a keyword that matched nothing,
+        ranked together by n-gram similarity.
+        Returns [{'kind', 'name', 'cluster', 'score'}, ...], best first.
+        """
+        suggestions = [
+            {
+                'kind': 'cluster',
+                'name': self.summaries[i].name,
+                'cluster': self.summaries[i].name,
+                'score': round(score, 2),
+            }
+            for i, score in self.cluster_index.similar(keyword, limit)
+        ]
+        for i, score in self.node_index.similar(keyword, limit):
+            pos, node = self.node_refs[i]
+            suggestions.append({
+                'kind': 'node',
+                'name': node.name,
+                'cluster': self.summaries[pos].name,
+                'score': round(score, 2),
+            })
+        suggestions.sort(key=lambda s: -s['score'])
+        return suggestions[:limit]
+
+    def top_utilization(self, intent, resource, limit=10):
+        """Clusters or nodes under the most CPU / memory pressure."""
+        return rank_utilization(self.summaries, self.resources, intent, resource, limit)
+
+    def cluster_nodes(self, cluster_id):
+        """A cluster's nodes sorted by name, or None for an unknown cluster."""
+        nodes = self._sorted_nodes.get(cluster_id)
+        if nodes is None:
+            summary = self.by_id.get(cluster_id)
+            if summary is None:
+                return None
+            nodes = self._sorted_nodes[cluster_id] = sort_nodes(summary.nodes)
+        return nodes
+
+    def find_nodes(self, keyword):
+        """
+        Cluster summaries restricted to the nodes whose name contains keyword;
+        clusters without a matching node are left out.
+        """
+        matches = {}
+        for i in self.node_index.search(keyword):
+            pos, node = self.node_refs[i]
+            matches.setdefault(pos, []).append(node)
+        return [
+            self.summaries[pos].with_nodes(nodes)
+            for pos, nodes in sorted(matches.items())
+        ]
+
+
+class InventorySnapshotter:
+    """
+    Keeps an InventorySnapshot up to date from a background thread.
+    A new snapshot is fully built before it replaces the current one, so
+    readers always see a complete set of indexes.
+    """
+
+    def __init__(self, client, interval=INVENTORY_REFRESH_SECONDS):
+        self.client = client
+        self.interval = interval
+        self.last_error = None
+        # Pages, 304s, wire/decoded bytes, parse time and rebuild flag of the last refresh
+        self.last_refresh = None
+        self._listeners = []
+        self._snapshot = None
+        self._version = 0
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener):
+        """Call listener(old_snapshot, new_snapshot) after each rebuild (old is None at first)."""
+        self._listeners.append(listener)
+
+    def refresh(self):
+        """
+        Fetch the inventory and swap in a freshly built snapshot. If every
+        record came back unchanged (conditional GETs answered 304), the
+        current snapshot is kept under a new fetch time instead of rebuilt.
+        Listeners are told about rebuilt snapshots.
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            before = self.client.transfer.snapshot()
+            clusters, node_index, fetched_at = self.client.fetch_inventory()
+            current = self._snapshot
+            rebuilt = current is None or not current.holds(clusters, node_index)
+            if rebuilt:
+                self._version += 1
+                snapshot = InventorySnapshot(clusters, node_index, fetched_at, self._version)
+            else:
+                snapshot = current.redated(fetched_at)
+            self._snapshot = snapshot
+            self.last_error = None
+            self.last_refresh = {
+                **TransferStats.delta(self.client.transfer.snapshot(), before),
+                'rebuilt': rebuilt,
+                'seconds': round(time.perf_counter() - started, 3),
+            }
+            if rebuilt:
+                for listener in self._listeners:
+                    try:
+                        listener(current, snapshot)
+                    except Exception as e:
+                        self.last_error = f'Snapshot listener failed: {e}'
+            return snapshot
+
+    def peek(self):
+        """Return the latest snapshot without blocking, or None if none is built yet."""
+        return self._snapshot
+
+    def _ensure(self):
+        """Build the first snapshot unless one exists (or is being built)."""
+        with self._refresh_lock:
+            if self._snapshot is not None:
+                return self._snapshot
+        return self.refresh()
+
+    def current(self):
+        """
+        Return the latest snapshot, building the first one synchronously.
+        Raises RuntimeError if Rancher can't be reached and no snapshot exists.
+        """
+        self.start()
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._ensure()
+        return snapshot
+
+    def start(self):
+        """Start the background refresh thread (idempotent)."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='inventory-snapshotter', daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread, waiting for it to exit."""
+        self._stop.set()
+        with self._start_lock:
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def _run(self):
+        """
+        Refresh loop: builds the first snapshot right away, then refreshes
+        every interval. A failed refresh keeps serving the previous snapshot.
+        """
+        try:
+            self._ensure()
+        except Exception as e:
+            self.last_error = str(e)
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+
+
+# Singleton
+inventory = InventorySnapshotter(rancher_client)
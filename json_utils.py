@@ -0,0 +1,62 @@
+"""
+Streaming parser for Rancher collection pages.
+A v3 collection is one JSON object whose "data" array can hold a thousand
+nodes, each with labels, annotations, links and actions the chatbot never
+reads. Instead of building the whole page as dicts and then projecting it
+into records, items are decoded one at a time and handed straight to a
+projection function, so only one raw item is alive at any moment.
+"""
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r'[ \t\n\r]*')
+
+
+def _skip_ws(text, idx):
+    return _WS.match(text, idx).end()
+
+
+def _expect(text, idx, char):
+    if idx >= len(text) or text[idx] != char:
+        raise ValueError(f"Expected {char!r} at position {idx} of collection page")
+    return _skip_ws(text, idx + 1)
+
+
+def parse_collection(text, project=None, array_key='data'):
+    """
+    Parse a collection page from JSON text.
+
+    Returns (items, fields): items is the ``array_key`` array with each
+    element passed through ``project`` as soon as it is decoded (raw dicts
+    if project is None); fields holds the page's other top-level keys
+    (pagination, type, ...). Raises ValueError on malformed JSON.
+    """
+    items = []
+    fields = {}
+    idx = _expect(text, _skip_ws(text, 0), '{')
+    if text[idx:idx + 1] == '}':
+        return items, fields
+    while True:
+        key, idx = _decoder.raw_decode(text, idx)
+        idx = _expect(text, _skip_ws(text, idx), ':')
+        if key == array_key:
+            idx = _expect(text, idx, '[')
+            if text[idx:idx + 1] != ']':
+                while True:
+                    item, idx = _decoder.raw_decode(text, idx)
+                    items.append(project(item) if project else item)
+                    idx = _skip_ws(text, idx)
+                    if text[idx:idx + 1] != ',':
+                        break
+                    idx = _skip_ws(text, idx + 1)
+            idx = _expect(text, idx, ']')
+        else:
+            fields[key], idx = _decoder.raw_decode(text, idx)
+            idx = _skip_ws(text, idx)
+        if text[idx:idx + 1] != ',':
+            idx = _expect(text, idx, '}')
+            if idx != len(text):
+                raise ValueError(f"Extra data at position {idx} of collection page")
+            return items, fields
+        idx = _skip_ws(text, idx + 1)
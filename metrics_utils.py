@@ -0,0 +1,292 @@
+"""
+Request instrumentation, exposed in the Prometheus text format at /metrics.
+- Stage timers: where /api/chat time goes (parse, lookup, format, serialize),
+  optionally echoed per response in a Server-Timing header.
+- Rancher round trips counted and timed by host, API path and HTTP status.
+- HTTP request latency by route and status.
+- Collectors read at scrape time: inventory cache hit/miss counters, page
+  transfer totals (incl. 304s), circuit breaker state, snapshot age.
+Recording a sample takes a lock and a bisect; nothing is formatted until
+/metrics is scraped.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ── Metric types ──────────────────────────────────────────────────────────────
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield f'{self.name}{_labels(self.labels, label_values)} {_number(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def lines(self):
+        with self._lock:
+            series = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, counts in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = ('le', _number(bound))
+                yield f'{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}'
+            labels = _labels(self.labels, label_values)
+            yield f'{self.name}_sum{labels} {_number(counts[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus collectors: callables returning
+    [(name, kind, help, [(labels dict, value), ...]), ...] at scrape time,
+    for figures other objects already keep (cache and transfer counters).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        out = []
+        for metric in self._metrics:
+            out.append(f'# HELP {metric.name} {metric.help}')
+            out.append(f'# TYPE {metric.name} {metric.kind}')
+            out.extend(metric.lines())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                out.append(f'# collector {getattr(collector, "__name__", collector)} failed: {_escape(e)}')
+                continue
+            for name, kind, help, samples in families:
+                out.append(f'# HELP {name} {help}')
+                out.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    names = tuple(labels)
+                    out.append(f'{name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}')
+        return '\n'.join(out) + '\n'
+
+
+# ── Per-request stage timers ──────────────────────────────────────────────────
+
+class RequestTimings:
+    """Stages timed during one request, for its Server-Timing header."""
+
+    __slots__ = ('stages',)
+
+    def __init__(self):
+        self.stages = []
+
+    def header(self):
+        """Server-Timing value, e.g. 'parse;dur=0.1, lookup;dur=12.3' (ms)."""
+        return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.stages)
+
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def timed_request():
+    """Collect the stages timed inside the block (this thread or task only)."""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a block into the stage histogram and the current request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.stages.append((name, elapsed))
+
+
+def observe_rancher(url, status, seconds):
+    """Record one Rancher round trip (status: HTTP code, 'timeout' or 'error')."""
+    parts = urlsplit(url)
+    status = str(status)
+    rancher_requests.inc(parts.netloc, parts.path, status)
+    rancher_request_seconds.observe(seconds, parts.netloc, parts.path, status)
+
+
+# ── Collectors ────────────────────────────────────────────────────────────────
+
+def client_collector(client):
+    """
+    Cache, conditional-GET and circuit breaker figures of a RancherClient,
+    per endpoint when it is a FederatedRancherClient ('default' otherwise).
+    Page transfer totals are shared by all endpoints.
+    """
+    def collect():
+        endpoints = [(c.name or 'default', c) for c in client.endpoints]
+        caches = [(name, c.cache.stats()) for name, c in endpoints]
+        transfer = client.transfer.snapshot()
+        failed = {e['name'] for e in client.failed_endpoints()}
+        return [
+            ('rancher_cache_entries', 'gauge', 'Entries in the Rancher inventory cache.',
+             [({'endpoint': name}, cache['entries']) for name, cache in caches]),
+            ('rancher_cache_lookups_total', 'counter',
+             'Inventory cache lookups by result (hit, stale hit, miss).',
+             [({'endpoint': name, 'result': result}, cache[field])
+              for name, cache in caches
+              for result, field in (('hit', 'hits'), ('stale', 'stale_hits'), ('miss', 'misses'))]),
+            ('rancher_pages_total', 'counter',
+             'Collection pages fetched, by whether Rancher answered 304 Not Modified.',
+             [({'not_modified': 'false'}, transfer['pages'] - transfer['not_modified']),
+              ({'not_modified': 'true'}, transfer['not_modified'])]),
+            ('rancher_page_cache_entries', 'gauge', 'Pages kept for conditional GETs.',
+             [({}, len(client.pages))]),
+            ('rancher_wire_bytes_total', 'counter', 'Page bytes received (compressed).',
+             [({}, transfer['wire_bytes'])]),
+            ('rancher_decoded_bytes_total', 'counter', 'Page bytes after decompression.',
+             [({}, transfer['decoded_bytes'])]),
+            ('rancher_parse_seconds_total', 'counter', 'Seconds spent parsing pages.',
+             [({}, transfer['parse_seconds'])]),
+            ('rancher_circuit_state', 'gauge', 'Circuit breaker state (1 for the current one).',
+             [({'endpoint': name, 'state': state}, int(state == c.breaker.state))
+              for name, c in endpoints
+              for state in (c.breaker.CLOSED, c.breaker.OPEN, c.breaker.HALF_OPEN)]),
+            ('rancher_endpoint_up', 'gauge',
+             'Whether the endpoint answered the latest federated lookup (1) or not (0).',
+             [({'endpoint': name}, int(name not in failed)) for name, _ in endpoints]),
+        ]
+    return collect
+
+
+def answer_cache_collector(cache):
+    """Hit/miss counters of the chat AnswerCache."""
+    def collect():
+        stats = cache.stats()
+        return [
+            ('chat_answer_cache_entries', 'gauge', 'Rendered chat answers cached.',
+             [({}, stats['entries'])]),
+            ('chat_answer_cache_lookups_total', 'counter', 'Chat answer cache lookups by result.',
+             [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])]),
+        ]
+    return collect
+
+
+def snapshot_collector(snapshotter):
+    """Age and size of an InventorySnapshotter's current snapshot, if built."""
+    def collect():
+        snapshot = snapshotter.peek()
+        if snapshot is None:
+            return []
+        return [
+            ('inventory_snapshot_age_seconds', 'gauge', 'Age of the inventory snapshot.',
+             [({}, snapshot.age_seconds())]),
+            ('inventory_snapshot_clusters', 'gauge', 'Clusters in the inventory snapshot.',
+             [({}, len(snapshot.summaries))]),
+            ('inventory_snapshot_nodes', 'gauge', 'Nodes in the inventory snapshot.',
+             [({}, len(snapshot.node_refs))]),
+        ]
+    return collect
+
+
+# Singleton
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    'chatbot_stage_seconds', 'Time spent per /api/chat stage.', ('stage',),
+)
+rancher_requests = metrics.counter(
+    'rancher_requests_total', 'Rancher API round trips by host, path and status.',
+    ('host', 'path', 'status'),
+)
+rancher_request_seconds = metrics.histogram(
+    'rancher_request_seconds', 'Rancher API round-trip latency by host, path and status.',
+    ('host', 'path', 'status'),
+)
+http_request_seconds = metrics.histogram(
+    'http_request_seconds', 'Request latency (to response headers) by route and status.',
+    ('method', 'route', 'status'),
+)
@@ -2,194 +2,1023 @@
 Rancher API client utilities for fetching cluster, node, and resource data.
 Uses Rancher v3 REST API.
 """
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
 import requests
 import urllib3
-from config import RANCHER_BASE_URL, RANCHER_API_TOKEN, RANCHER_VERIFY_SSL
+from requests.adapters import HTTPAdapter
+from config import (
+    RANCHER_BASE_URL, RANCHER_API_TOKEN, RANCHER_VERIFY_SSL,
+    RANCHER_PAGE_LIMIT, RANCHER_MAX_CONCURRENCY, RANCHER_FANOUT_TIMEOUT,
+    RANCHER_BULK_NODES_THRESHOLD, RANCHER_CACHE_CLUSTERS_TTL, RANCHER_CACHE_NODES_TTL,
+    RANCHER_CACHE_STALE_SECONDS, RANCHER_CACHE_MAX_ENTRIES,
+    RANCHER_POOL_SIZE, RANCHER_TIMEOUT, RANCHER_RETRIES, RANCHER_BACKOFF_BASE,
+    RANCHER_BACKOFF_MAX, RANCHER_BREAKER_THRESHOLD, RANCHER_BREAKER_RESET_SECONDS,
+    RANCHER_CONDITIONAL_PAGES, RANCHER_ENDPOINTS, RANCHER_ENDPOINT_TIMEOUT,
+)
+from cache_utils import InventoryCache, PageCache, CachedPage
+from json_utils import parse_collection
+from retry_utils import (
+    RETRY_STATUSES, CircuitBreaker, CircuitOpenError, backoff_delay, is_server_failure,
+)
+from resource_utils import fleet_statistics
+from metrics_utils import observe_rancher
+from record_utils import ClusterRecord, NodeRecord, ClusterSummary, intern_roles, intern_str
 
 # Suppress SSL warnings when verify=False
-if not RANCHER_VERIFY_SSL:
+if not RANCHER_VERIFY_SSL or any(not e.get('verify_ssl', RANCHER_VERIFY_SSL) for e in RANCHER_ENDPOINTS):
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
-class RancherClient:
-    """Client for interacting with the Rancher v3 API."""
+class TransferStats:
+    """
+    Running totals for collection pages fetched from Rancher: pages,
+    304 Not Modified answers, bytes on the wire (compressed) vs decoded,
+    and seconds spent parsing. Thread-safe.
+    """
+
+    FIELDS = ('pages', 'not_modified', 'wire_bytes', 'decoded_bytes', 'parse_seconds')
 
     def __init__(self):
-        self.base_url = RANCHER_BASE_URL.rstrip('/')
+        self._lock = threading.Lock()
+        self._totals = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, wire_bytes, decoded_bytes=0, parse_seconds=0.0, not_modified=False):
+        with self._lock:
+            totals = self._totals
+            totals['pages'] += 1
+            totals['not_modified'] += int(not_modified)
+            totals['wire_bytes'] += wire_bytes
+            totals['decoded_bytes'] += decoded_bytes
+            totals['parse_seconds'] += parse_seconds
+
+    def snapshot(self):
+        """Copy of the current totals."""
+        with self._lock:
+            return dict(self._totals)
+
+    @staticmethod
+    def delta(after, before):
+        """Totals accumulated between two snapshots."""
+        diff = {field: after[field] - before[field] for field in TransferStats.FIELDS}
+        diff['parse_seconds'] = round(diff['parse_seconds'], 4)
+        return diff
+
+
+def _wire_bytes(resp):
+    """Bytes of a requests response as sent over the wire (before gzip decoding)."""
+    try:
+        return resp.raw.tell()
+    except Exception:
+        return len(resp.content)
+
+
+class RancherClient:
+    """
+    Client for interacting with the Rancher v3 API.
+
+    A named client is one endpoint of a FederatedRancherClient: its cluster
+    IDs are prefixed with '<name>:' (also in node.cluster_id) and clusters
+    carry ``source = name``, so records from several Rancher servers can be
+    merged without ID clashes. ``deadline`` is how long the federation waits
+    for this endpoint (None: no limit). ``pages`` is the conditional-GET
+    PageCache to use (default: a new one of RANCHER_CONDITIONAL_PAGES).
+    """
+
+    def __init__(self, base_url=RANCHER_BASE_URL, api_token=RANCHER_API_TOKEN, name=None,
+                 verify_ssl=RANCHER_VERIFY_SSL, deadline=None, pages=None):
+        self.name = name
+        self.deadline = deadline
+        self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({
-            'Authorization': f'Bearer {RANCHER_API_TOKEN}',
+            'Authorization': f'Bearer {api_token}',
             'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
         })
-        self.verify_ssl = RANCHER_VERIFY_SSL
+        # Keep-alive pool sized for the fan-out, so parallel node requests
+        # reuse connections instead of opening and discarding extra ones
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, RANCHER_POOL_SIZE))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.verify_ssl = verify_ssl
+        self.timeout = RANCHER_TIMEOUT
+        self.retries = max(0, RANCHER_RETRIES)
+        self.backoff_base = RANCHER_BACKOFF_BASE
+        self.backoff_max = RANCHER_BACKOFF_MAX
+        self.breaker = CircuitBreaker(RANCHER_BREAKER_THRESHOLD, RANCHER_BREAKER_RESET_SECONDS)
+        self.page_limit = RANCHER_PAGE_LIMIT
+        self.max_concurrency = max(1, RANCHER_MAX_CONCURRENCY)
+        self.fanout_timeout = RANCHER_FANOUT_TIMEOUT
+        self.bulk_nodes_threshold = RANCHER_BULK_NODES_THRESHOLD
+        self.clusters_ttl = RANCHER_CACHE_CLUSTERS_TTL
+        self.nodes_ttl = RANCHER_CACHE_NODES_TTL
+        self.cache = InventoryCache(
+            max_entries=RANCHER_CACHE_MAX_ENTRIES,
+            stale_seconds=RANCHER_CACHE_STALE_SECONDS,
+        )
+        self.pages = pages if pages is not None else PageCache(max_entries=RANCHER_CONDITIONAL_PAGES)
+        self.transfer = TransferStats()
+
+    @property
+    def endpoints(self):
+        """The RancherClients behind this client: just itself."""
+        return [self]
+
+    def failed_endpoints(self):
+        """Endpoints left out of the latest answers; a single client has none."""
+        return []
+
+    def rancher_id(self, cluster_id):
+        """The ID Rancher itself uses for one of this client's cluster IDs."""
+        if self.name and cluster_id.startswith(f'{self.name}:'):
+            return cluster_id[len(self.name) + 1:]
+        return cluster_id
 
     def _get(self, path, params=None):
         """Internal GET request helper; returns parsed JSON or None."""
-        url = f"{self.base_url}{path}"
+        return self._get_url(f"{self.base_url}{path}", params=params)
+
+    def _get_url(self, url, params=None):
+        """GET an absolute URL; returns parsed JSON."""
+        resp = self._fetch(url, params)
         try:
-            resp = self.session.get(url, params=params, verify=self.verify_ssl, timeout=15)
-            resp.raise_for_status()
             return resp.json()
+        except ValueError as e:
+            raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+
+    def _fetch(self, url, params=None, headers=None):
+        """
+        GET an absolute URL (e.g. a pagination link); returns the response
+        (2xx, or 304 for a conditional request).
+        Transient failures are retried (see _send_with_retries). While the
+        circuit breaker is open, raises CircuitOpenError without calling Rancher.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self._circuit_open_message())
+        try:
+            resp = self._send_with_retries(url, params, headers)
+            resp.raise_for_status()
+            resp.content  # read the body inside the error handling
         except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            raise RuntimeError(f"Cannot connect to Rancher at {self.base_url}. {self._config_hint()}")
+        except requests.exceptions.Timeout:
+            self.breaker.record_failure()
             raise RuntimeError(
-                f"Cannot connect to Rancher at {self.base_url}. "
-                "Check RANCHER_BASE_URL in config.py."
+                f"Rancher at {self.base_url} did not respond within {self.timeout:g}s."
+                + (f" {self._config_hint()}" if self.name else "")
             )
         except requests.exceptions.HTTPError as e:
-            status = e.response.status_code if e.response else 'unknown'
+            status = e.response.status_code if e.response is not None else 'unknown'
+            if e.response is None or is_server_failure(status):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()   # Rancher is up; the request was refused
             raise RuntimeError(f"Rancher API error (HTTP {status}): {e}")
         except Exception as e:
+            self.breaker.record_failure()
             raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+        self.breaker.record_success()
+        return resp
+
+    def _send_with_retries(self, url, params=None, headers=None):
+        """
+        session.get, retrying connection errors, timeouts and 429/502/503/504
+        responses up to ``retries`` times with jittered exponential backoff.
+        Returns the last response, or raises the last connection error.
+        Every attempt is recorded in the Rancher request metrics.
+        """
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(
+                    url, params=params, headers=headers, verify=self.verify_ssl, timeout=self.timeout
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                status = 'timeout' if isinstance(e, requests.exceptions.Timeout) else 'error'
+                observe_rancher(url, status, time.perf_counter() - started)
+                if last_attempt:
+                    raise
+                retry_after = None
+            else:
+                observe_rancher(url, resp.status_code, time.perf_counter() - started)
+                if last_attempt or resp.status_code not in RETRY_STATUSES:
+                    return resp
+                retry_after = resp.headers.get('Retry-After')
+                resp.close()
+            time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+
+    def _config_hint(self):
+        """Where this client's Rancher URL is configured."""
+        if self.name:
+            return f"Check the '{self.name}' entry of RANCHER_ENDPOINTS."
+        return "Check RANCHER_BASE_URL in config.py."
+
+    def _circuit_open_message(self):
+        if self.breaker.state == self.breaker.HALF_OPEN:
+            return f"Rancher at {self.base_url} is failing; a trial request is in progress."
+        return (
+            f"Rancher at {self.base_url} is failing; not calling it for another "
+            f"{self.breaker.retry_after():.0f}s."
+        )
+
+    def _get_page(self, url, params=None, parse=None):
+        """
+        Fetch one collection page; returns (items, next_url) with each item
+        passed through ``parse`` if given.
+
+        Pages that came with an ETag or Last-Modified are re-requested
+        conditionally; a 304 reuses the cached parsed items. Wire/decoded
+        bytes and parse time are added to ``transfer``.
+        """
+        key = PageCache.key(url, params)
+        cached = self.pages.get(key)
+        resp = self._fetch(url, params, headers=cached.validators() if cached else None)
+        if resp.status_code == 304 and cached is not None:
+            self.transfer.record(_wire_bytes(resp), not_modified=True)
+            return cached.items, cached.next_url
+
+        started = time.perf_counter()
+        try:
+            # Streamed: each item is projected by parse() as soon as it's decoded
+            items, fields = parse_collection(resp.content.decode('utf-8'), parse)
+        except ValueError as e:
+            raise RuntimeError(f"Unexpected error calling Rancher API: {e}")
+        next_url = (fields.get('pagination') or {}).get('next')
+        self.transfer.record(
+            _wire_bytes(resp), len(resp.content), time.perf_counter() - started
+        )
+
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.pages.put(key, CachedPage(etag, last_modified, items, next_url))
+        return items, next_url
+
+    def iter_collection(self, path, params=None, limit=None, parse=None):
+        """
+        Yield the records of a collection endpoint one by one (passed through
+        ``parse`` if given), following ``pagination.next`` links until the
+        last page. Only one page of ``limit`` records (default ``page_limit``)
+        is held at a time, apart from pages kept for conditional GETs.
+        """
+        params = dict(params or {})
+        params.setdefault('limit', limit or self.page_limit)
+        items, next_url = self._get_page(f"{self.base_url}{path}", params, parse)
+        while True:
+            yield from items
+            if not next_url:
+                return
+            # The next link already carries the marker/limit query string
+            items, next_url = self._get_page(next_url, parse=parse)
 
     # ── Cluster Methods ───────────────────────────────────────────────────────
 
+    @staticmethod
+    def _parse_cluster(c):
+        """Convert a raw Rancher cluster object into a ClusterRecord."""
+        allocatable = c.get('allocatable', {})
+        requested = c.get('requested', {})
+        capacity = c.get('capacity', {})
+
+        # Node counts from allocatable/capacity info embedded in cluster
+        node_count = c.get('nodeCount', None)
+
+        return ClusterRecord(
+            id=c.get('id', ''),
+            name=c.get('name', ''),
+            state=c.get('state', 'unknown'),
+            provider=c.get('provider', c.get('driverName', 'unknown')),
+            k8s_version=c.get('rancherKubernetesEngineConfig', {}).get(
+                'kubernetesVersion', c.get('version', {}).get('gitVersion', 'N/A')
+            ),
+            node_count=node_count,
+            conditions=c.get('conditions', []),
+            # CPU/Memory from capacity vs requested
+            cpu_capacity=capacity.get('cpu', ''),
+            cpu_requested=requested.get('cpu', ''),
+            memory_capacity=capacity.get('memory', ''),
+            memory_requested=requested.get('memory', ''),
+            allocatable_cpu=allocatable.get('cpu', ''),
+            allocatable_memory=allocatable.get('memory', ''),
+        )
+
+    def _cluster_parser(self):
+        """_parse_cluster, tagging records with this endpoint's name if it has one."""
+        if not self.name:
+            return self._parse_cluster
+        prefix = f'{self.name}:'
+        source = intern_str(self.name)
+
+        def parse(c):
+            cluster = self._parse_cluster(c)
+            cluster.id = prefix + cluster.id
+            cluster.source = source
+            return cluster
+        return parse
+
+    def iter_clusters(self):
+        """Yield cluster summaries page by page from /v3/clusters."""
+        return self.iter_collection('/v3/clusters', parse=self._cluster_parser())
+
+    def _cached_clusters(self):
+        """Return (clusters, fetched_at) through the inventory cache."""
+        return self.cache.get(
+            'clusters', lambda: list(self.iter_clusters()), self.clusters_ttl
+        )
+
     def get_all_clusters(self):
         """
-        Return a list of cluster summaries.
+        Return a list of cluster summaries (cached; treat as read-only).
         Each entry has: id, name, state, node_count, nodes_down, cpu, memory
         """
-        data = self._get('/v3/clusters')
-        clusters = []
-        for c in data.get('data', []):
-            cluster_id = c.get('id', '')
-            allocatable = c.get('allocatable', {})
-            requested = c.get('requested', {})
-            capacity = c.get('capacity', {})
-
-            # Node counts from allocatable/capacity info embedded in cluster
-            node_count = c.get('nodeCount', None)
-
-            # Build summary
-            entry = {
-                'id': cluster_id,
-                'name': c.get('name', ''),
-                'state': c.get('state', 'unknown'),
-                'provider': c.get('provider', c.get('driverName', 'unknown')),
-                'k8s_version': c.get('rancherKubernetesEngineConfig', {}).get(
-                    'kubernetesVersion', c.get('version', {}).get('gitVersion', 'N/A')
-                ),
-                'node_count': node_count,
-                'conditions': c.get('conditions', []),
-                # CPU/Memory from capacity vs requested
-                'cpu_capacity': capacity.get('cpu', ''),
-                'cpu_requested': requested.get('cpu', ''),
-                'memory_capacity': capacity.get('memory', ''),
-                'memory_requested': requested.get('memory', ''),
-                'allocatable_cpu': allocatable.get('cpu', ''),
-                'allocatable_memory': allocatable.get('memory', ''),
-            }
-            clusters.append(entry)
-        return clusters
+        return self._cached_clusters()[0]
 
     def get_cluster_by_name(self, name):
         """Find a cluster whose name contains the given keyword (case-insensitive)."""
         clusters = self.get_all_clusters()
         name_lower = name.lower()
-        return [c for c in clusters if name_lower in c['name'].lower()]
+        return [c for c in clusters if name_lower in c.name.lower()]
+
+    # ── Node Methods ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _parse_node(n):
+        """Convert a raw Rancher node object into a NodeRecord."""
+        info = n.get('info', {})
+        os_info = info.get('os', {})
+        cpu_info = info.get('cpu', {})
+        cap = n.get('capacity', {})
+        req = n.get('requested', {})
+        alloc = n.get('allocatable', {})
+
+        roles = intern_roles(n.get('controlPlane'), n.get('etcd'), n.get('worker'))
+
+        node_state = n.get('state', 'unknown')
+        conditions = n.get('conditions', [])
+
+        return NodeRecord(
+            name=n.get('nodeName', n.get('requestedHostname', 'unknown')),
+            cluster_id=n.get('clusterId', ''),
+            state=node_state,
+            roles=roles,
+            os_image=os_info.get('operatingSystem', 'N/A'),
+            kernel=os_info.get('kernelVersion', 'N/A'),
+            cpu_count=cpu_info.get('count', cap.get('cpu', 'N/A')),
+            cpu_capacity=cap.get('cpu', ''),
+            cpu_requested=req.get('cpu', ''),
+            memory_capacity=cap.get('memory', ''),
+            memory_requested=req.get('memory', ''),
+            allocatable_cpu=alloc.get('cpu', ''),
+            allocatable_memory=alloc.get('memory', ''),
+            conditions=conditions,
+            is_down=node_state.lower() not in ('active', 'running'),
+        )
+
+    def _node_parser(self):
+        """_parse_node, prefixing cluster IDs with this endpoint's name if it has one."""
+        if not self.name:
+            return self._parse_node
+        prefix = f'{self.name}:'
+
+        def parse(n):
+            node = self._parse_node(n)
+            node.cluster_id = intern_str(prefix + node.cluster_id)
+            return node
+        return parse
+
+    def iter_nodes(self, cluster_id=None):
+        """Yield node summaries page by page, optionally for one cluster only."""
+        params = {'clusterId': self.rancher_id(cluster_id)} if cluster_id else None
+        return self.iter_collection('/v3/nodes', params=params, parse=self._node_parser())
+
+    def _cached_cluster_nodes(self, cluster_id):
+        """Return (nodes, fetched_at) for one cluster through the inventory cache."""
+        return self.cache.get(
+            ('nodes', cluster_id), lambda: list(self.iter_nodes(cluster_id)), self.nodes_ttl
+        )
 
     def get_cluster_nodes(self, cluster_id):
         """
-        Return a list of node summaries for a specific cluster.
+        Return a list of node summaries for a specific cluster (cached; treat as read-only).
         Each entry has: name, state, roles, os_image, cpu, memory, conditions
         """
-        data = self._get('/v3/nodes', params={'clusterId': cluster_id})
-        nodes = []
-        for n in data.get('data', []):
-            info = n.get('info', {})
-            os_info = info.get('os', {})
-            cpu_info = info.get('cpu', {})
-            mem_info = info.get('memory', {})
-            cap = n.get('capacity', {})
-            req = n.get('requested', {})
-            alloc = n.get('allocatable', {})
-
-            roles = []
-            if n.get('controlPlane'):
-                roles.append('control-plane')
-            if n.get('etcd'):
-                roles.append('etcd')
-            if n.get('worker'):
-                roles.append('worker')
-
-            node_state = n.get('state', 'unknown')
-            conditions = n.get('conditions', [])
-
-            nodes.append({
-                'name': n.get('nodeName', n.get('requestedHostname', 'unknown')),
-                'state': node_state,
-                'roles': roles,
-                'os_image': os_info.get('operatingSystem', 'N/A'),
-                'kernel': os_info.get('kernelVersion', 'N/A'),
-                'cpu_count': cpu_info.get('count', cap.get('cpu', 'N/A')),
-                'cpu_capacity': cap.get('cpu', ''),
-                'cpu_requested': req.get('cpu', ''),
-                'memory_capacity': cap.get('memory', ''),
-                'memory_requested': req.get('memory', ''),
-                'allocatable_cpu': alloc.get('cpu', ''),
-                'allocatable_memory': alloc.get('memory', ''),
-                'conditions': conditions,
-                'is_down': node_state.lower() not in ('active', 'running'),
-            })
-        return nodes
+        return self._cached_cluster_nodes(cluster_id)[0]
+
+    def _build_node_index(self):
+        """List every node in one paginated stream, grouped by cluster ID."""
+        index = {}
+        for node in self.iter_nodes():
+            index.setdefault(node.cluster_id, []).append(node)
+        return index
+
+    def _cached_node_index(self):
+        """Return (node_index, fetched_at) through the inventory cache."""
+        return self.cache.get('node_index', self._build_node_index, self.nodes_ttl)
+
+    def get_node_index(self):
+        """
+        List every node in one paginated /v3/nodes stream and group the
+        summaries by cluster ID: {cluster_id: [node, ...]} (cached; treat as read-only).
+        """
+        return self._cached_node_index()[0]
+
+    def fetch_inventory(self):
+        """
+        Fetch all clusters and the bulk node index straight from Rancher,
+        bypassing the cache and then refreshing it with the result.
+        Returns (clusters, node_index, fetched_at).
+        """
+        fetched_at = time.time()
+        clusters = list(self.iter_clusters())
+        node_index = self._build_node_index()
+        self.cache.put('clusters', clusters, self.clusters_ttl)
+        self.cache.put('node_index', node_index, self.nodes_ttl)
+        return clusters, node_index, fetched_at
+
+    def _fan_out(self, cluster_ids):
+        """
+        Fetch nodes for several clusters concurrently, at most
+        ``max_concurrency`` requests in flight at a time.
+        Yields (cluster_id, nodes, fetched_at, error) as each cluster completes.
+        """
+        cluster_ids = list(cluster_ids)
+        if not cluster_ids:
+            return
+
+        workers = min(self.max_concurrency, len(cluster_ids))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rancher-nodes')
+        futures = {pool.submit(self._cached_cluster_nodes, cid): cid for cid in cluster_ids}
+        pending = dict(futures)
+        try:
+            for future in as_completed(futures, timeout=self.fanout_timeout):
+                cid = pending.pop(future)
+                try:
+                    nodes, fetched_at = future.result()
+                    yield cid, nodes, fetched_at, None
+                except Exception as e:
+                    yield cid, [], None, str(e)
+        except FuturesTimeout:
+            for future, cid in pending.items():
+                if future.done() and not future.exception():
+                    nodes, fetched_at = future.result()
+                    yield cid, nodes, fetched_at, None
+                elif future.done():
+                    yield cid, [], None, str(future.exception())
+                else:
+                    yield cid, [], None, f'timed out after {self.fanout_timeout:g}s'
+        finally:
+            # Don't block the caller on stragglers; queued requests are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_nodes_for_clusters(self, cluster_ids):
+        """
+        Fetch nodes for several clusters concurrently.
+        Yields (cluster_id, nodes, error) as each cluster completes; error is
+        None on success, otherwise a short reason and nodes is an empty list.
+        Clusters still pending after ``fanout_timeout`` seconds are yielded
+        as timed out.
+        """
+        for cid, nodes, _, error in self._fan_out(cluster_ids):
+            yield cid, nodes, error
+
+    def iter_node_batches(self, cluster_ids):
+        """
+        Stream the nodes of several clusters as (cluster_id, nodes, error)
+        batches; a cluster may span several batches, and one with no nodes
+        may not appear at all. For ``bulk_nodes_threshold`` clusters or more
+        the nodes come from one paginated /v3/nodes listing, a batch per run
+        of same-cluster nodes as the pages arrive (other clusters' nodes are
+        skipped); smaller lookups fan out via iter_nodes_for_clusters.
+        If the bulk listing fails, clusters it hadn't reached are fanned
+        out; those it had are yielded again with the error, as their nodes
+        may be incomplete.
+        """
+        cluster_ids = list(cluster_ids)
+        if len(cluster_ids) < self.bulk_nodes_threshold:
+            yield from self.iter_nodes_for_clusters(cluster_ids)
+            return
+
+        wanted = set(cluster_ids)
+        seen = set()
+        batch, batch_cid = [], None
+        error = None
+        try:
+            for node in self.iter_nodes():
+                cid = node.cluster_id
+                if cid not in wanted:
+                    continue
+                if cid != batch_cid:
+                    if batch:
+                        yield batch_cid, batch, None
+                    batch, batch_cid = [], cid
+                    seen.add(cid)
+                batch.append(node)
+        except Exception as e:
+            error = str(e)
+        if batch:
+            yield batch_cid, batch, None
+        if error is not None:
+            for cid in seen:
+                yield cid, [], f'node listing interrupted: {error}'
+            yield from self.iter_nodes_for_clusters(c for c in cluster_ids if c not in seen)
+
+    def get_nodes_for_clusters(self, cluster_ids):
+        """
+        Fetch nodes for several clusters.
+        Returns (nodes_by_cluster, errors): errors maps cluster ID to the reason
+        its node listing failed or timed out.
+
+        For ``bulk_nodes_threshold`` clusters or more, all nodes are listed in
+        one paginated stream via get_node_index(); smaller lookups (or a failed
+        bulk listing) fan out one concurrent request per cluster.
+        """
+        nodes_by_cluster, errors, _ = self._nodes_for_clusters(cluster_ids)
+        return nodes_by_cluster, errors
+
+    def _nodes_for_clusters(self, cluster_ids):
+        """
+        Implementation of get_nodes_for_clusters that also returns when the
+        oldest node listing used was fetched (None if none succeeded).
+        """
+        cluster_ids = list(cluster_ids)
+        if len(cluster_ids) >= self.bulk_nodes_threshold:
+            try:
+                index, fetched_at = self._cached_node_index()
+                return {cid: index.get(cid, []) for cid in cluster_ids}, {}, fetched_at
+            except Exception:
+                pass
+
+        nodes_by_cluster = {}
+        errors = {}
+        oldest = None
+        for cid, nodes, fetched_at, error in self._fan_out(cluster_ids):
+            nodes_by_cluster[cid] = nodes
+            if error:
+                errors[cid] = error
+            elif oldest is None or fetched_at < oldest:
+                oldest = fetched_at
+        return nodes_by_cluster, errors, oldest
+
+    def _match_clusters(self, cluster_id=None, cluster_name=None):
+        """Return (matching clusters, fetched_at) for an ID, a partial name, or all."""
+        all_clusters, clusters_at = self._cached_clusters()
+        if cluster_name:
+            name_lower = cluster_name.lower()
+            matches = [c for c in all_clusters if name_lower in c.name.lower()]
+        elif cluster_id:
+            matches = [c for c in all_clusters if c.id == cluster_id]
+        else:
+            matches = all_clusters
+        return matches, clusters_at
+
+    def iter_cluster_summary(self, cluster_id=None, cluster_name=None):
+        """
+        Streaming variant of get_cluster_summary: yields each ClusterSummary
+        as soon as that cluster's nodes arrive (completion order, not Rancher
+        order), always fanning out one node request per cluster.
+        """
+        matches, clusters_at = self._match_clusters(cluster_id, cluster_name)
+        by_id = {c.id: c for c in matches}
+        for cid, nodes, nodes_at, error in self._fan_out(by_id):
+            yield ClusterSummary(
+                by_id[cid],
+                nodes,
+                nodes_error=error,
+                data_age_seconds=_age_seconds(clusters_at, nodes_at),
+            )
 
     def get_cluster_summary(self, cluster_id=None, cluster_name=None):
         """
         Return a complete cluster view: cluster info + nodes.
         Accepts either a cluster ID or a partial name to search.
         Returns a list because name search may match multiple clusters.
+        Node listings are fetched concurrently; a cluster whose nodes could
+        not be fetched carries the reason in ``nodes_error``.
+        ``data_age_seconds`` is the age of the oldest cached data used.
         """
-        if cluster_name:
-            matches = self.get_cluster_by_name(cluster_name)
-        elif cluster_id:
-            all_clusters = self.get_all_clusters()
-            matches = [c for c in all_clusters if c['id'] == cluster_id]
+        matches, clusters_at = self._match_clusters(cluster_id, cluster_name)
+        nodes_by_cluster, errors, nodes_at = self._nodes_for_clusters(
+            c.id for c in matches
+        )
+        data_age = _age_seconds(clusters_at, nodes_at)
+
+        return [
+            ClusterSummary(
+                cluster,
+                nodes_by_cluster.get(cluster.id, []),
+                nodes_error=errors.get(cluster.id),
+                data_age_seconds=data_age,
+            )
+            for cluster in matches
+        ]
+
+    def _statistics_inputs(self):
+        """
+        What get_statistics aggregates:
+        (clusters, nodes_by_cluster, errors, clusters_at, nodes_at).
+        """
+        clusters, clusters_at = self._cached_clusters()
+        cached_index = self.cache.peek('node_index')
+        if cached_index is not None:
+            index, nodes_at = cached_index
+            nodes_by_cluster = {c.id: index.get(c.id, []) for c in clusters}
+            errors = {}
         else:
-            matches = self.get_all_clusters()
+            missing = [c.id for c in clusters if c.node_count is None]
+            nodes_by_cluster, errors, nodes_at = self._nodes_for_clusters(missing)
+            for cid in errors:
+                nodes_by_cluster.pop(cid, None)
+        return clusters, nodes_by_cluster, errors, clusters_at, nodes_at
+
+    def get_statistics(self):
+        """
+        Return aggregate stats (see resource_utils.fleet_statistics) computed
+        from cluster metadata. Node totals use each cluster's nodeCount; nodes
+        are only listed for clusters missing it. If the bulk node index is
+        already cached it is used instead, which also fills in down_nodes.
+        """
+        try:
+            clusters, nodes_by_cluster, errors, clusters_at, nodes_at = self._statistics_inputs()
+            stats = fleet_statistics(clusters, nodes_by_cluster)
+            stats['failed_clusters'] = sorted(errors)
+            stats['data_age_seconds'] = _age_seconds(clusters_at, nodes_at)
+            return stats
+        except Exception as e:
+            return {'error': str(e), 'total_clusters': 0, 'total_nodes': 0}
+
+
+def _age_seconds(*fetched_at):
+    """Seconds since the oldest of the given fetch timestamps (None entries ignored)."""
+    stamps = [t for t in fetched_at if t is not None]
+    if not stamps:
+        return None
+    return round(max(0.0, time.time() - min(stamps)), 1)
 
+
+# ── Federation ────────────────────────────────────────────────────────────────
+
+class FederatedRancherClient:
+    """
+    Several Rancher management servers behind the RancherClient interface.
+
+    Each endpoint is a named RancherClient with its own session, inventory
+    cache and circuit breaker; records are tagged with the endpoint name
+    (see RancherClient). Every fleet-wide lookup asks all endpoints at once
+    and merges what comes back, so it takes as long as the slowest endpoint
+    that answers rather than the sum of them. An endpoint that fails, or
+    misses its deadline, is left out of that answer and listed by
+    failed_endpoints() until it answers again. Lookups by cluster ID go to
+    the one endpoint owning the ID.
+
+    The conditional-GET page cache and transfer stats are shared by all
+    endpoints, so snapshot refreshes and exports report totals as before.
+    """
+
+    def __init__(self, clients, pages=None):
+        names = [c.name for c in clients]
+        if not clients or not all(names):
+            raise ValueError('Every federated Rancher endpoint needs a name')
+        if len(set(names)) != len(names):
+            raise ValueError(f'Duplicate Rancher endpoint names: {names}')
+        if any(':' in name for name in names):
+            raise ValueError(f"Rancher endpoint names can't contain ':': {names}")
+        self.clients = list(clients)
+        self.by_name = {c.name: c for c in self.clients}
+        self.pages = pages if pages is not None else PageCache(max_entries=RANCHER_CONDITIONAL_PAGES)
+        self.transfer = TransferStats()
+        for client in self.clients:
+            client.pages = self.pages
+            client.transfer = self.transfer
+        self._errors = {}   # endpoint name -> why it was left out of the latest answer
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, endpoints, pages=None):
+        """Build from RANCHER_ENDPOINTS-style dicts (name, url, token, timeout, verify_ssl)."""
+        return cls([
+            RancherClient(
+                base_url=e['url'],
+                api_token=e.get('token', RANCHER_API_TOKEN),
+                name=e.get('name'),
+                verify_ssl=e.get('verify_ssl', RANCHER_VERIFY_SSL),
+                deadline=float(e.get('timeout', RANCHER_ENDPOINT_TIMEOUT)),
+            )
+            for e in endpoints
+        ], pages)
+
+    @property
+    def endpoints(self):
+        """The per-endpoint RancherClients."""
+        return self.clients
+
+    def failed_endpoints(self):
+        """[{'name', 'url', 'error'}] for endpoints missing from the latest answers."""
+        with self._lock:
+            errors = dict(self._errors)
+        return [
+            {'name': name, 'url': self.by_name[name].base_url, 'error': error}
+            for name, error in sorted(errors.items())
+        ]
+
+    def client_for(self, cluster_id):
+        """The endpoint client owning a '<name>:<id>' cluster ID, or None."""
+        name, sep, _ = cluster_id.partition(':')
+        return self.by_name.get(name) if sep else None
+
+    def _record(self, clients, errors):
+        """Note which of the asked endpoints answered and which failed."""
+        with self._lock:
+            for client in clients:
+                if client.name in errors:
+                    self._errors[client.name] = errors[client.name]
+                else:
+                    self._errors.pop(client.name, None)
+
+    @staticmethod
+    def _timed_out(client):
+        return f'{client.name}: timed out after {client.deadline:g}s'
+
+    def _each(self, call, clients=None):
+        """
+        Run call(client) for every endpoint (or the given ones) in parallel.
+        Returns ([(client, result), ...] in endpoint order, {name: error}).
+        Each endpoint is waited for until its own deadline; calls still
+        running then are left to finish in the background (warming that
+        endpoint's cache) and reported as timed out.
+        """
+        clients = self.clients if clients is None else list(clients)
+        if not clients:
+            return [], {}
+        pool = ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix='rancher-federation')
+        started = time.monotonic()
+        futures = [(client, pool.submit(call, client)) for client in clients]
         results = []
-        for cluster in matches:
-            cid = cluster['id']
-            try:
-                nodes = self.get_cluster_nodes(cid)
-            except Exception:
-                nodes = []
-
-            down_nodes = [n for n in nodes if n['is_down']]
-
-            summary = {
-                **cluster,
-                'nodes': nodes,
-                'total_nodes': len(nodes),
-                'down_nodes': len(down_nodes),
-                'down_node_names': [n['name'] for n in down_nodes],
-            }
-            results.append(summary)
+        errors = {}
+        try:
+            for client, future in futures:
+                remaining = None
+                if client.deadline is not None:
+                    remaining = max(0.0, started + client.deadline - time.monotonic())
+                try:
+                    results.append((client, future.result(timeout=remaining)))
+                except FuturesTimeout:
+                    errors[client.name] = self._timed_out(client)
+                except Exception as e:
+                    errors[client.name] = f'{client.name}: {e}'
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._record(clients, errors)
+        return results, errors
+
+    def _each_required(self, call, clients=None):
+        """_each, raising RuntimeError when no endpoint answered."""
+        results, errors = self._each(call, clients)
+        if errors and not results:
+            raise RuntimeError('No Rancher endpoint answered: ' + '; '.join(errors.values()))
         return results
 
+    def _merge_streams(self, stream, clients=None):
+        """
+        Yield the items of stream(client) for every endpoint (or the given
+        ones) as they arrive, each endpoint's iterator drained by its own
+        thread. Endpoints still streaming at their deadline are cut off and
+        reported; raises RuntimeError if no endpoint got to the end.
+        """
+        clients = self.clients if clients is None else list(clients)
+        if not clients:
+            return
+        items = queue.Queue()
+        done = object()
+
+        def drain(client):
+            try:
+                for item in stream(client):
+                    items.put((client, item))
+                items.put((client, done))
+            except Exception as e:
+                items.put((client, e))
+
+        for client in clients:
+            threading.Thread(
+                target=drain, args=(client,), name=f'rancher-federation-{client.name}', daemon=True,
+            ).start()
+
+        started = time.monotonic()
+        pending = {client.name for client in clients}
+        errors = {}
+        while pending:
+            deadlines = [
+                started + c.deadline for c in clients if c.name in pending and c.deadline is not None
+            ]
+            try:
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                client, item = items.get(timeout=timeout)
+            except queue.Empty:
+                now = time.monotonic()
+                for c in clients:
+                    if c.name in pending and c.deadline is not None and started + c.deadline <= now:
+                        pending.discard(c.name)
+                        errors[c.name] = self._timed_out(c)
+                continue
+            if client.name not in pending:
+                continue    # past its deadline
+            if item is done:
+                pending.discard(client.name)
+            elif isinstance(item, Exception):
+                pending.discard(client.name)
+                errors[client.name] = f'{client.name}: {item}'
+            else:
+                yield item
+        self._record(clients, errors)
+        if len(errors) == len(clients):
+            raise RuntimeError('No Rancher endpoint answered: ' + '; '.join(errors.values()))
+
+    def _group(self, cluster_ids):
+        """{client: [cluster IDs it owns]} (IDs of no known endpoint are dropped)."""
+        groups = {}
+        for cid in cluster_ids:
+            client = self.client_for(cid)
+            if client is not None:
+                groups.setdefault(client, []).append(cid)
+        return groups
+
+    # ── Clusters and nodes ────────────────────────────────────────────────────
+
+    def get_all_clusters(self):
+        """Clusters of every endpoint that answered, in endpoint order."""
+        results = self._each_required(lambda c: c.get_all_clusters())
+        return [cluster for _, clusters in results for cluster in clusters]
+
+    def get_cluster_by_name(self, name):
+        """Find clusters on any endpoint whose name contains the keyword."""
+        name_lower = name.lower()
+        return [c for c in self.get_all_clusters() if name_lower in c.name.lower()]
+
+    def get_cluster_nodes(self, cluster_id):
+        """Node summaries of one cluster, from the endpoint owning its ID."""
+        client = self.client_for(cluster_id)
+        return client.get_cluster_nodes(cluster_id) if client is not None else []
+
+    def get_node_index(self):
+        """{cluster_id: [node, ...]} merged across endpoints."""
+        index = {}
+        for _, endpoint_index in self._each_required(lambda c: c.get_node_index()):
+            index.update(endpoint_index)
+        return index
+
+    def fetch_inventory(self):
+        """
+        RancherClient.fetch_inventory on every endpoint at once. An endpoint
+        that fails keeps contributing its last cached listings (if still
+        servable) rather than dropping out of the snapshot; it is still
+        reported by failed_endpoints(). ``fetched_at`` is the oldest used.
+        """
+        results, errors = self._each(lambda c: c.fetch_inventory())
+        if not results:
+            raise RuntimeError('No Rancher endpoint answered: ' + '; '.join(errors.values()))
+        answered = {client.name: result for client, result in results}
+        clusters = []
+        node_index = {}
+        oldest = None
+        for client in self.clients:
+            if client.name in answered:
+                endpoint_clusters, endpoint_index, fetched_at = answered[client.name]
+            else:
+                cached_clusters = client.cache.peek('clusters')
+                cached_index = client.cache.peek('node_index')
+                if cached_clusters is None or cached_index is None:
+                    continue
+                endpoint_clusters, endpoint_index = cached_clusters[0], cached_index[0]
+                fetched_at = min(cached_clusters[1], cached_index[1])
+            clusters.extend(endpoint_clusters)
+            node_index.update(endpoint_index)
+            oldest = fetched_at if oldest is None else min(oldest, fetched_at)
+        return clusters, node_index, oldest
+
+    def iter_nodes_for_clusters(self, cluster_ids):
+        """
+        RancherClient.iter_nodes_for_clusters across endpoints: every
+        endpoint fans out over its own clusters at the same time. Clusters of
+        an endpoint that failed or missed its deadline are yielded with that
+        error.
+        """
+        return self._stream_groups(cluster_ids, lambda c, ids: c.iter_nodes_for_clusters(ids))
+
+    def iter_node_batches(self, cluster_ids):
+        """
+        RancherClient.iter_node_batches across endpoints, each streaming its
+        own clusters (bulk listing or fan-out) at the same time. Every
+        cluster of an endpoint that failed or missed its deadline is yielded
+        with that error, as its nodes may be incomplete.
+        """
+        return self._stream_groups(
+            cluster_ids, lambda c, ids: c.iter_node_batches(ids), partial=True,
+        )
+
+    def _stream_groups(self, cluster_ids, stream, partial=False):
+        """
+        Merge stream(client, its cluster IDs) of every endpoint owning some
+        of the clusters. Clusters of failed endpoints are yielded with the
+        endpoint's error: those not yielded yet, or with ``partial`` all of them.
+        """
+        groups = self._group(cluster_ids)
+        seen = set()
+        try:
+            for cid, nodes, error in self._merge_streams(lambda c: stream(c, groups[c]), groups):
+                seen.add(cid)
+                yield cid, nodes, error
+        except RuntimeError:
+            pass    # every endpoint failed; their clusters are reported below
+        failed = {e['name']: e['error'] for e in self.failed_endpoints()}
+        for client, ids in groups.items():
+            if client.name in failed:
+                for cid in ids:
+                    if partial or cid not in seen:
+                        yield cid, [], failed[client.name]
+
+    def get_nodes_for_clusters(self, cluster_ids):
+        """
+        RancherClient.get_nodes_for_clusters across endpoints, each endpoint
+        looking up its own clusters in parallel with the others.
+        Returns (nodes_by_cluster, errors).
+        """
+        groups = self._group(cluster_ids)
+        results, failed = self._each(lambda c: c.get_nodes_for_clusters(groups[c]), groups)
+        nodes_by_cluster = {}
+        errors = {}
+        for _, (endpoint_nodes, endpoint_errors) in results:
+            nodes_by_cluster.update(endpoint_nodes)
+            errors.update(endpoint_errors)
+        for client, ids in groups.items():
+            if client.name in failed:
+                for cid in ids:
+                    nodes_by_cluster[cid] = []
+                    errors[cid] = failed[client.name]
+        return nodes_by_cluster, errors
+
+    def get_cluster_summary(self, cluster_id=None, cluster_name=None):
+        """
+        RancherClient.get_cluster_summary across endpoints: a cluster ID goes
+        to its endpoint; a name search or the full listing asks all of them
+        in parallel. Each summary carries its own endpoint's data age.
+        """
+        if cluster_id:
+            client = self.client_for(cluster_id)
+            return client.get_cluster_summary(cluster_id=cluster_id) if client is not None else []
+        results = self._each_required(lambda c: c.get_cluster_summary(cluster_name=cluster_name))
+        return [summary for _, summaries in results for summary in summaries]
+
+    def iter_cluster_summary(self, cluster_id=None, cluster_name=None):
+        """
+        RancherClient.iter_cluster_summary across endpoints: summaries of all
+        endpoints interleaved in completion order.
+        """
+        if cluster_id:
+            client = self.client_for(cluster_id)
+            return iter(client.iter_cluster_summary(cluster_id=cluster_id) if client is not None else ())
+        return self._merge_streams(lambda c: c.iter_cluster_summary(cluster_name=cluster_name))
+
     def get_statistics(self):
-        """Return aggregate stats: total clusters and total nodes."""
+        """
+        RancherClient.get_statistics over the merged clusters of every
+        endpoint that answered, plus ``failed_endpoints``.
+        """
         try:
-            clusters = self.get_all_clusters()
-            total_clusters = len(clusters)
-            total_nodes = 0
-            active_clusters = 0
-            for c in clusters:
-                cid = c['id']
-                try:
-                    nodes = self.get_cluster_nodes(cid)
-                    total_nodes += len(nodes)
-                except Exception:
-                    pass
-                if c.get('state', '').lower() == 'active':
-                    active_clusters += 1
-            return {
-                'total_clusters': total_clusters,
-                'active_clusters': active_clusters,
-                'total_nodes': total_nodes,
-            }
+            results = self._each_required(lambda c: c._statistics_inputs())
+            clusters = []
+            nodes_by_cluster = {}
+            errors = {}
+            stamps = []
+            for _, (endpoint_clusters, endpoint_nodes, endpoint_errors, clusters_at, nodes_at) in results:
+                clusters.extend(endpoint_clusters)
+                nodes_by_cluster.update(endpoint_nodes)
+                errors.update(endpoint_errors)
+                stamps += [clusters_at, nodes_at]
+
+            stats = fleet_statistics(clusters, nodes_by_cluster)
+            stats['failed_clusters'] = sorted(errors)
+            stats['failed_endpoints'] = self.failed_endpoints()
+            stats['data_age_seconds'] = _age_seconds(*stamps)
+            return stats
         except Exception as e:
             return {'error': str(e), 'total_clusters': 0, 'total_nodes': 0}
 
 
+def create_rancher_client(pages=None):
+    """
+    A new client for the configured Rancher server(s), federated if
+    RANCHER_ENDPOINTS is set, optionally on a given conditional-GET PageCache.
+    """
+    if RANCHER_ENDPOINTS:
+        return FederatedRancherClient.from_config(RANCHER_ENDPOINTS, pages)
+    return RancherClient(pages=pages)
+
+
 # Singleton
-rancher_client = RancherClient()
+rancher_client = create_rancher_client()
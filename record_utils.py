@@ -0,0 +1,279 @@
+"""
+Compact record types for clusters and nodes.
+Slotted classes instead of per-node dicts, with frequently repeated strings
+(states, OS images, kernels, quantities) interned so a large cached fleet
+shares one copy of each. Records are turned into JSON-ready dicts only at
+the response boundary via to_dict().
+"""
+import base64
+import bisect
+import json
+import sys
+
+_ROLE_TUPLES = {}
+
+
+def intern_str(value):
+    """Intern strings so equal values share memory; other types pass through."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_roles(control_plane, etcd, worker):
+    """Shared, immutable roles tuple for a combination of node role flags."""
+    key = (bool(control_plane), bool(etcd), bool(worker))
+    roles = _ROLE_TUPLES.get(key)
+    if roles is None:
+        roles = tuple(
+            role for role, flag in zip(('control-plane', 'etcd', 'worker'), key) if flag
+        )
+        _ROLE_TUPLES[key] = roles
+    return roles
+
+
+class ClusterRecord:
+    """
+    One Rancher cluster (see RancherClient._parse_cluster). ``source`` names
+    the Rancher endpoint it came from when several are federated.
+    """
+
+    _FIELDS = (
+        'id', 'name', 'state', 'provider', 'k8s_version', 'node_count', 'conditions',
+        'cpu_capacity', 'cpu_requested', 'memory_capacity', 'memory_requested',
+        'allocatable_cpu', 'allocatable_memory',
+    )
+    __slots__ = _FIELDS + ('source',)
+
+    def __init__(self, id, name, state, provider, k8s_version, node_count, conditions,
+                 cpu_capacity, cpu_requested, memory_capacity, memory_requested,
+                 allocatable_cpu, allocatable_memory, source=None):
+        self.id = id
+        self.name = name
+        self.state = intern_str(state)
+        self.provider = intern_str(provider)
+        self.k8s_version = intern_str(k8s_version)
+        self.node_count = node_count
+        self.conditions = conditions
+        self.cpu_capacity = intern_str(cpu_capacity)
+        self.cpu_requested = intern_str(cpu_requested)
+        self.memory_capacity = intern_str(memory_capacity)
+        self.memory_requested = intern_str(memory_requested)
+        self.allocatable_cpu = intern_str(allocatable_cpu)
+        self.allocatable_memory = intern_str(allocatable_memory)
+        self.source = intern_str(source)
+
+    def to_dict(self):
+        """
+        JSON-ready dict with the same keys as the old cluster summary dicts;
+        source is only included when set.
+        """
+        data = {field: getattr(self, field) for field in self._FIELDS}
+        if self.source is not None:
+            data['source'] = self.source
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict()."""
+        return cls(**data)
+
+
+class NodeRecord:
+    """One Rancher node (see RancherClient._parse_node)."""
+
+    _FIELDS = (
+        'name', 'cluster_id', 'state', 'roles', 'os_image', 'kernel', 'cpu_count',
+        'cpu_capacity', 'cpu_requested', 'memory_capacity', 'memory_requested',
+        'allocatable_cpu', 'allocatable_memory', 'conditions', 'is_down',
+    )
+    __slots__ = _FIELDS + ('utilization_pct',)
+
+    def __init__(self, name, cluster_id, state, roles, os_image, kernel, cpu_count,
+                 cpu_capacity, cpu_requested, memory_capacity, memory_requested,
+                 allocatable_cpu, allocatable_memory, conditions, is_down,
+                 utilization_pct=None):
+        self.name = name
+        self.cluster_id = intern_str(cluster_id)
+        self.state = intern_str(state)
+        self.roles = roles
+        self.os_image = intern_str(os_image)
+        self.kernel = intern_str(kernel)
+        self.cpu_count = intern_str(cpu_count)
+        self.cpu_capacity = intern_str(cpu_capacity)
+        self.cpu_requested = intern_str(cpu_requested)
+        self.memory_capacity = intern_str(memory_capacity)
+        self.memory_requested = intern_str(memory_requested)
+        self.allocatable_cpu = intern_str(allocatable_cpu)
+        self.allocatable_memory = intern_str(allocatable_memory)
+        self.conditions = conditions
+        self.is_down = is_down
+        self.utilization_pct = utilization_pct
+
+    def with_utilization(self, pct):
+        """Copy of this node annotated with a utilization percentage."""
+        copy = NodeRecord.__new__(NodeRecord)
+        for field in self.__slots__:
+            setattr(copy, field, getattr(self, field))
+        copy.utilization_pct = pct
+        return copy
+
+    def to_dict(self):
+        """JSON-ready dict; utilization_pct is only included when set."""
+        data = {field: getattr(self, field) for field in self._FIELDS}
+        data['roles'] = list(self.roles)
+        if self.utilization_pct is not None:
+            data['utilization_pct'] = self.utilization_pct
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict()."""
+        roles = data['roles']
+        return cls(**{
+            **data,
+            'roles': intern_roles('control-plane' in roles, 'etcd' in roles, 'worker' in roles),
+        })
+
+
+class ClusterSummary:
+    """
+    A cluster plus its nodes and node health counts. Cluster fields are read
+    through to the shared ClusterRecord (summary.name, summary.state, ...)
+    rather than copied into every summary.
+    """
+
+    __slots__ = (
+        'cluster', 'nodes', 'total_nodes', 'down_nodes', 'down_node_names',
+        'nodes_error', 'data_age_seconds', 'utilization_pct',
+        'nodes_matched', 'nodes_next', 'nodes_query',
+    )
+
+    def __init__(self, cluster, nodes, nodes_error=None, data_age_seconds=None):
+        self.cluster = cluster
+        self.nodes = nodes
+        down = [n.name for n in nodes if n.is_down]
+        self.total_nodes = len(nodes)
+        self.down_nodes = len(down)
+        self.down_node_names = down
+        self.nodes_error = nodes_error
+        self.data_age_seconds = data_age_seconds
+        self.utilization_pct = None
+        # Set on node_page() copies: the rest of the node list is paginated
+        self.nodes_matched = None
+        self.nodes_next = None
+        self.nodes_query = None
+
+    def __getattr__(self, name):
+        # Only called for names not in __slots__: the cluster's own fields
+        if name == 'cluster':
+            raise AttributeError(name)
+        return getattr(self.cluster, name)
+
+    def _copy(self):
+        copy = ClusterSummary.__new__(ClusterSummary)
+        for field in self.__slots__:
+            setattr(copy, field, getattr(self, field))
+        return copy
+
+    def with_nodes(self, nodes):
+        """Copy showing only the given nodes; totals still describe the whole cluster."""
+        copy = self._copy()
+        copy.nodes = nodes
+        return copy
+
+    def with_utilization(self, pct):
+        """Copy annotated with a utilization percentage."""
+        copy = self._copy()
+        copy.utilization_pct = pct
+        return copy
+
+    def node_page(self, limit, query=None):
+        """
+        Copy carrying only the first ``limit`` of its nodes (by name), plus
+        how many there are and a cursor for the rest (see page_nodes). With
+        ``query``, the nodes are the cluster's matches for that node search.
+        """
+        # An empty page needs no sort: its cursor starts at the first name
+        nodes = sort_nodes(self.nodes) if limit else self.nodes
+        page, next_cursor = page_nodes(nodes, limit=limit)
+        copy = self._copy()
+        copy.nodes = page
+        copy.nodes_matched = len(self.nodes)
+        copy.nodes_next = next_cursor
+        copy.nodes_query = query
+        return copy
+
+    def to_dict(self):
+        """JSON-ready dict in the shape of the old {**cluster, 'nodes': ...} summaries."""
+        data = self.cluster.to_dict()
+        data.update(
+            nodes=[n.to_dict() for n in self.nodes],
+            total_nodes=self.total_nodes,
+            down_nodes=self.down_nodes,
+            down_node_names=self.down_node_names,
+            nodes_error=self.nodes_error,
+        )
+        if self.data_age_seconds is not None:
+            data['data_age_seconds'] = self.data_age_seconds
+        if self.utilization_pct is not None:
+            data['utilization_pct'] = self.utilization_pct
+        if self.nodes_matched is not None:
+            data.update(
+                nodes_matched=self.nodes_matched,
+                nodes_next=self.nodes_next,
+                nodes_query=self.nodes_query,
+            )
+        return data
+
+
+# ── Node pagination ───────────────────────────────────────────────────────────
+
+def sort_nodes(nodes):
+    """Nodes in page order (by name)."""
+    return sorted(nodes, key=_node_key)
+
+
+def _node_key(node):
+    return node.name
+
+
+def encode_cursor(after):
+    """Opaque cursor for the page after node name ``after`` (None: first page)."""
+    return base64.urlsafe_b64encode(json.dumps({'after': after}).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Node name a cursor continues after (None for the first page); ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor.encode()))['after']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if after is not None and not isinstance(after, str):
+        raise ValueError('Invalid cursor')
+    return after
+
+
+def page_nodes(nodes, cursor=None, limit=50):
+    """
+    Keyset page of name-sorted nodes: up to ``limit`` nodes after the
+    cursor's node name, and the cursor of the following page (None at the
+    end). Pages stay consistent when nodes come and go between requests.
+    """
+    after = decode_cursor(cursor)
+    start = 0 if after is None else bisect.bisect_right(nodes, after, key=_node_key)
+    page = nodes[start:start + limit]
+    if start + limit < len(nodes):
+        last = page[-1].name if page else after
+        return page, encode_cursor(last)
+    return page, None
+
+
+RECORD_TYPES = (ClusterRecord, NodeRecord, ClusterSummary)
+
+
+def to_json_ready(value):
+    """json.dumps default hook: serialize records, reject anything else."""
+    if isinstance(value, RECORD_TYPES):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
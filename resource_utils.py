@@ -0,0 +1,226 @@
+"""
+Kubernetes resource quantity parsing and fleet-wide aggregates.
+Rancher reports CPU and memory as quantity strings ("16", "3500m", "64Gi");
+these helpers turn them into numbers for server-side math.
+"""
+import heapq
+import re
+from array import array
+
+# Binary and decimal SI suffixes from k8s.io/apimachinery resource.Quantity
+_SUFFIXES = {
+    'n': 1e-9, 'u': 1e-6, 'm': 1e-3, '': 1.0,
+    'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12, 'P': 1e15, 'E': 1e18,
+    'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60,
+}
+_QUANTITY_RE = re.compile(r'^\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)\s*([a-zA-Z]*)\s*$')
+
+GIB = 2 ** 30
+
+
+def parse_quantity(value):
+    """
+    Parse a Kubernetes quantity into a float in base units
+    (cores for CPU, bytes for memory). Returns None for empty or
+    unparseable values.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _QUANTITY_RE.match(str(value))
+    if not m or m.group(2) not in _SUFFIXES:
+        return None
+    return float(m.group(1)) * _SUFFIXES[m.group(2)]
+
+
+def _add(total, value):
+    """Accumulate a parsed quantity, ignoring missing values."""
+    parsed = parse_quantity(value)
+    return total + parsed if parsed is not None else total
+
+
+def fleet_statistics(clusters, nodes_by_cluster=None):
+    """
+    Aggregate stats for a list of cluster records (or summaries).
+
+    Node totals come from the listed nodes where ``nodes_by_cluster`` has the
+    cluster, otherwise from the cluster's ``node_count``. ``down_nodes`` needs
+    the node list of every cluster and is None when any is missing.
+    CPU is in cores and memory in GiB, summed from cluster-level fields.
+    """
+    nodes_by_cluster = nodes_by_cluster or {}
+    total_nodes = 0
+    down_nodes = 0
+    down_known = True
+    active_clusters = 0
+    cpu = {'capacity': 0.0, 'requested': 0.0, 'allocatable': 0.0}
+    memory = {'capacity': 0.0, 'requested': 0.0, 'allocatable': 0.0}
+    providers = {}
+    k8s_versions = {}
+
+    for c in clusters:
+        nodes = nodes_by_cluster.get(c.id)
+        if nodes is not None:
+            total_nodes += len(nodes)
+            down_nodes += sum(1 for n in nodes if n.is_down)
+        else:
+            total_nodes += c.node_count or 0
+            down_known = False
+
+        if c.state.lower() == 'active':
+            active_clusters += 1
+
+        cpu['capacity'] = _add(cpu['capacity'], c.cpu_capacity)
+        cpu['requested'] = _add(cpu['requested'], c.cpu_requested)
+        cpu['allocatable'] = _add(cpu['allocatable'], c.allocatable_cpu)
+        memory['capacity'] = _add(memory['capacity'], c.memory_capacity)
+        memory['requested'] = _add(memory['requested'], c.memory_requested)
+        memory['allocatable'] = _add(memory['allocatable'], c.allocatable_memory)
+
+        provider = c.provider or 'unknown'
+        providers[provider] = providers.get(provider, 0) + 1
+        version = c.k8s_version or 'N/A'
+        k8s_versions[version] = k8s_versions.get(version, 0) + 1
+
+    return {
+        'total_clusters': len(clusters),
+        'active_clusters': active_clusters,
+        'total_nodes': total_nodes,
+        'down_nodes': down_nodes if down_known else None,
+        'cpu_cores': {k: round(v, 2) for k, v in cpu.items()},
+        'memory_gib': {k: round(v / GIB, 1) for k, v in memory.items()},
+        'providers': providers,
+        'k8s_versions': k8s_versions,
+    }
+
+
+# ── Columnar utilization engine ───────────────────────────────────────────────
+
+RESOURCES = ('cpu', 'memory')
+
+
+def _pct(requested, capacity):
+    """Requested as a percentage of capacity, or None without capacity."""
+    return round(requested / capacity * 100, 1) if capacity > 0 else None
+
+
+class ResourceTable:
+    """
+    Node resources of a whole fleet in parallel typed arrays, one row per
+    node. Quantities are parsed once when the table is built; aggregates are
+    single passes over the numeric columns instead of per-node dict lookups.
+    Missing quantities are stored as 0.
+    """
+
+    def __init__(self, summaries):
+        self.cluster_names = [s.name for s in summaries]
+        self._cluster_utilization = None
+        self.node_names = []
+        self.node_cluster = array('l')
+        # Row of each cluster's first node, to map a row back to summary.nodes
+        self.first_row = array('l')
+        self.columns = {
+            f'{res}_{field}': array('d')
+            for res in RESOURCES for field in ('capacity', 'requested', 'allocatable')
+        }
+        columns = self.columns
+        for pos, s in enumerate(summaries):
+            self.first_row.append(len(self.node_names))
+            for n in s.nodes:
+                self.node_names.append(n.name)
+                self.node_cluster.append(pos)
+                columns['cpu_capacity'].append(parse_quantity(n.cpu_capacity) or 0.0)
+                columns['cpu_requested'].append(parse_quantity(n.cpu_requested) or 0.0)
+                columns['cpu_allocatable'].append(parse_quantity(n.allocatable_cpu) or 0.0)
+                columns['memory_capacity'].append(parse_quantity(n.memory_capacity) or 0.0)
+                columns['memory_requested'].append(parse_quantity(n.memory_requested) or 0.0)
+                columns['memory_allocatable'].append(parse_quantity(n.allocatable_memory) or 0.0)
+
+    def __len__(self):
+        return len(self.node_names)
+
+    def fleet_utilization(self):
+        """Fleet-wide requested/capacity percentages and overcommitted node counts."""
+        result = {}
+        for res in RESOURCES:
+            cap = self.columns[f'{res}_capacity']
+            req = self.columns[f'{res}_requested']
+            alloc = self.columns[f'{res}_allocatable']
+            result[f'{res}_pct'] = _pct(sum(req), sum(cap))
+            result[f'{res}_overcommitted_nodes'] = sum(
+                1 for r, a in zip(req, alloc) if a > 0 and r > a
+            )
+        return result
+
+    def cluster_utilization(self):
+        """
+        Per-cluster requested/capacity percentages from the node columns,
+        in one pass per resource. Returns a list aligned with the summaries.
+        Computed once per table.
+        """
+        if self._cluster_utilization is not None:
+            return self._cluster_utilization
+        n_clusters = len(self.cluster_names)
+        result = [{} for _ in range(n_clusters)]
+        for res in RESOURCES:
+            cap_sums = array('d', bytes(8 * n_clusters))
+            req_sums = array('d', bytes(8 * n_clusters))
+            for pos, cap, req in zip(
+                self.node_cluster, self.columns[f'{res}_capacity'], self.columns[f'{res}_requested']
+            ):
+                cap_sums[pos] += cap
+                req_sums[pos] += req
+            for pos in range(n_clusters):
+                result[pos][f'{res}_pct'] = _pct(req_sums[pos], cap_sums[pos])
+        self._cluster_utilization = result
+        return result
+
+    def top_clusters(self, resource, limit=10):
+        """[(summary position, pct), ...] for the clusters under the most pressure."""
+        key = f'{resource}_pct'
+        ranked = (
+            (pos, u[key]) for pos, u in enumerate(self.cluster_utilization())
+            if u[key] is not None
+        )
+        return heapq.nlargest(limit, ranked, key=lambda item: item[1])
+
+    def top_nodes(self, resource, limit=10):
+        """
+        [(node row, pct), ...] for the nodes with the highest requested vs
+        allocatable ratio (capacity when allocatable is unknown); values over
+        100 mean the node is overcommitted.
+        """
+        cap = self.columns[f'{resource}_capacity']
+        req = self.columns[f'{resource}_requested']
+        alloc = self.columns[f'{resource}_allocatable']
+        ranked = (
+            (row, r / (a or c) * 100)
+            for row, (r, a, c) in enumerate(zip(req, alloc, cap))
+            if (a or c) > 0
+        )
+        return [
+            (row, round(pct, 1))
+            for row, pct in heapq.nlargest(limit, ranked, key=lambda item: item[1])
+        ]
+
+
+def rank_utilization(summaries, table, intent, resource, limit=10):
+    """
+    Answer a 'top_clusters' / 'top_nodes' query from a ResourceTable built
+    over ``summaries``. Clusters come back as summaries with
+    ``utilization_pct``; nodes are grouped under their cluster (in rank order
+    of each cluster's busiest node) with ``utilization_pct`` on each node.
+    """
+    if intent == 'top_clusters':
+        return [
+            summaries[pos].with_utilization(pct)
+            for pos, pct in table.top_clusters(resource, limit)
+        ]
+
+    groups = {}
+    for row, pct in table.top_nodes(resource, limit):
+        pos = table.node_cluster[row]
+        node = summaries[pos].nodes[row - table.first_row[pos]]
+        groups.setdefault(pos, []).append(node.with_utilization(pct))
+    return [summaries[pos].with_nodes(nodes) for pos, nodes in groups.items()]
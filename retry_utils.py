@@ -0,0 +1,104 @@
+"""
+Retry and circuit-breaker helpers for Rancher API calls.
+Transient failures (connection errors, timeouts, 429/502/503/504) are
+retried with capped exponential backoff and full jitter; a circuit breaker
+stops calling an unhealthy Rancher for a while so requests fail fast.
+"""
+import random
+import threading
+import time
+
+# Responses worth retrying: throttling and gateway/availability errors
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """
+    Seconds to sleep before retry number ``attempt`` (0-based): a random
+    value in [0, min(cap, base * 2**attempt)] ("full jitter"), or a numeric
+    Retry-After header if the server sent a longer one (still capped).
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    try:
+        return max(delay, min(cap, float(retry_after)))
+    except (TypeError, ValueError):
+        return delay
+
+
+def is_server_failure(status):
+    """True for statuses that say Rancher (or its proxy) is unhealthy, not the request."""
+    return status == 429 or status >= 500
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Rancher while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed:    calls go through; ``threshold`` failures in a row open it.
+    open:      calls are refused for ``reset_seconds``.
+    half-open: one trial call is let through; success closes the breaker,
+               failure opens it again. A trial that never reports back
+               (e.g. a cancelled task) is replaced after ``reset_seconds``.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, threshold=5, reset_seconds=30.0):
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._reset_due():
+                return self.HALF_OPEN
+            return self._state
+
+    def _reset_due(self):
+        return time.monotonic() - self._opened_at >= self.reset_seconds
+
+    def allow(self):
+        """True if a call may go to Rancher now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == self.OPEN and self._reset_due():
+                self._state = self.HALF_OPEN
+                self._trial_started = None
+            if self._state == self.HALF_OPEN and (
+                self._trial_started is None or now - self._trial_started >= self.reset_seconds
+            ):
+                self._trial_started = now
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial call through (0 when closed)."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_started = None
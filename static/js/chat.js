@@ -11,6 +11,7 @@ const chatMessages = document.getElementById('chatMessages');
 const statsElements = {
     clusters: document.getElementById('clusterCount'),
     nodes: document.getElementById('nodeCount'),
+    down: document.getElementById('downCount'),
 };
 
 // State
@@ -19,6 +20,7 @@ let isProcessing = false;
 // ==================== Initialization ====================
 document.addEventListener('DOMContentLoaded', () => {
     loadStatistics();
+    subscribeToEvents();
     chatInput.focus();
 });
 
@@ -47,10 +49,17 @@ async function handleUserMessage() {
     try {
         const response = await fetch('/api/chat', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/x-ndjson' },
             body: JSON.stringify({ message }),
         });
 
+        // Streamed answers render cluster by cluster as they arrive
+        const contentType = response.headers.get('Content-Type') || '';
+        if (response.ok && contentType.includes('application/x-ndjson')) {
+            await streamBotMessage(response, typingId);
+            return;
+        }
+
         const data = await response.json();
         removeTypingIndicator(typingId);
 
@@ -83,18 +92,77 @@ function addUserMessage(text) {
     scrollToBottom();
 }
 
-function addBotMessage(data) {
-    const div = document.createElement('div');
-    div.className = 'message bot-message';
+// Render markdown-lite bold (**text**)
+function formatMessage(text) {
+    return escapeHtml(text).replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>');
+}
 
-    // Render markdown-lite bold (**text**)
-    const messageHtml = escapeHtml(data.message).replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>');
-    let content = `<div class="message-text">${messageHtml}</div>`;
+function addBotMessage(data) {
+    let content = `<div class="message-text">${formatMessage(data.message)}</div>`;
 
     if (data.results && data.results.length > 0) {
         content += renderClusterResults(data.results);
     }
+    if (data.suggestions && data.suggestions.length > 0) {
+        content += renderSuggestions(data.suggestions);
+    }
+
+    const element = appendBotMessage(content);
+    if (data.count === 1) expandSingleCluster(element);
+}
+
+/**
+ * Read an NDJSON /api/chat stream: 'cluster' lines are appended to the
+ * results grid as they arrive, the 'done' line fills in the summary text.
+ */
+async function streamBotMessage(response, typingId) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let messageText = null;
+    let grid = null;
+
+    const handleEvent = (event) => {
+        if (event.type === 'cluster') {
+            if (!grid) {
+                removeTypingIndicator(typingId);
+                const content = appendBotMessage(
+                    '<div class="message-text">Loading clusters…</div><div class="results-grid"></div>'
+                );
+                messageText = content.querySelector('.message-text');
+                grid = content.querySelector('.results-grid');
+            }
+            grid.insertAdjacentHTML('beforeend', renderClusterCard(event.cluster));
+            scrollToBottom();
+        } else if (event.type === 'done') {
+            removeTypingIndicator(typingId);
+            if (messageText) {
+                messageText.innerHTML = formatMessage(event.message);
+                if (event.count === 1) expandSingleCluster(grid);
+            } else {
+                addBotMessage(event);
+            }
+        } else if (event.type === 'error') {
+            removeTypingIndicator(typingId);
+            addErrorMessage(event.error || 'An error occurred');
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+    }
+    if (buffer.trim()) handleEvent(JSON.parse(buffer));
+    removeTypingIndicator(typingId);
+}
 
+function appendBotMessage(content) {
+    const div = document.createElement('div');
+    div.className = 'message bot-message';
     div.innerHTML = `
         <div class="message-avatar">
             <svg viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
@@ -109,6 +177,7 @@ function addBotMessage(data) {
 
     chatMessages.appendChild(div);
     scrollToBottom();
+    return div.querySelector('.message-content');
 }
 
 function addErrorMessage(text) {
@@ -139,24 +208,25 @@ function stateBadge(state) {
             </span>`;
 }
 
+// Parse Kubernetes resource strings like "4" (cores), "8000m", "16Gi", "32768Mi"
+function parseCPU(v) {
+    if (!v) return 0;
+    if (v.endsWith('m')) return parseFloat(v) / 1000;
+    return parseFloat(v);
+}
+
+function parseMem(v) {
+    if (!v) return 0;
+    if (v.endsWith('Ki')) return parseFloat(v) / (1024 * 1024);
+    if (v.endsWith('Mi')) return parseFloat(v) / 1024;
+    if (v.endsWith('Gi')) return parseFloat(v);
+    if (v.endsWith('Ti')) return parseFloat(v) * 1024;
+    return parseFloat(v) / (1024 * 1024 * 1024);
+}
+
 function resourceBar(label, requested, capacity) {
     if (!capacity) return '';
 
-    // Parse Kubernetes resource strings like "4" (cores), "8000m", "16Gi", "32768Mi"
-    const parseCPU = v => {
-        if (!v) return 0;
-        if (v.endsWith('m')) return parseFloat(v) / 1000;
-        return parseFloat(v);
-    };
-    const parseMem = v => {
-        if (!v) return 0;
-        if (v.endsWith('Ki')) return parseFloat(v) / (1024 * 1024);
-        if (v.endsWith('Mi')) return parseFloat(v) / 1024;
-        if (v.endsWith('Gi')) return parseFloat(v);
-        if (v.endsWith('Ti')) return parseFloat(v) * 1024;
-        return parseFloat(v) / (1024 * 1024 * 1024);
-    };
-
     const isMem = label.toLowerCase().includes('mem');
     const parse = isMem ? parseMem : parseCPU;
     const rVal = parse(requested);
@@ -194,6 +264,8 @@ function renderNodeRow(node) {
             <div class="node-meta">
                 <span class="node-role">${escapeHtml(roles)}</span>
                 <span class="node-state" style="color:${stateColor};">${escapeHtml(node.state)}</span>
+                ${node.utilization_pct != null
+            ? `<span class="node-state">${node.utilization_pct}% requested</span>` : ''}
             </div>
             ${resourceBar('CPU', node.cpu_requested, node.cpu_capacity)}
             ${resourceBar('Memory', node.memory_requested, node.memory_capacity)}
@@ -201,58 +273,223 @@ function renderNodeRow(node) {
 }
 
 function renderClusterResults(results) {
-    let html = '<div class="results-grid">';
-
-    results.forEach(cluster => {
-        const hasDownNodes = cluster.down_nodes > 0;
-        const totalNodes = cluster.total_nodes ?? cluster.nodes?.length ?? 'N/A';
-        const downNodes = cluster.down_nodes ?? 0;
-
-        html += `
-            <div class="result-card ${hasDownNodes ? 'card-warning' : ''}">
-                <div class="result-card-header">
-                    <div class="result-card-title">🖥️ ${escapeHtml(cluster.name)}</div>
-                    ${stateBadge(cluster.state)}
+    return `<div class="results-grid">${results.map(renderClusterCard).join('')}</div>`;
+}
+
+function renderClusterCard(cluster) {
+    const hasDownNodes = cluster.down_nodes > 0;
+    const totalNodes = cluster.total_nodes ?? cluster.nodes?.length ?? 'N/A';
+    const downNodes = cluster.down_nodes ?? 0;
+
+    return `
+        <div class="result-card ${hasDownNodes ? 'card-warning' : ''}">
+            <div class="result-card-header">
+                <div class="result-card-title">🖥️ ${escapeHtml(cluster.name)}</div>
+                ${stateBadge(cluster.state)}
+            </div>
+            <div class="result-card-body">
+
+                <!-- Cluster meta -->
+                ${cluster.source ? `
+                <div class="result-card-row">
+                    <span class="result-card-label">Rancher:</span>
+                    <span class="result-card-value">${escapeHtml(cluster.source)}</span>
+                </div>` : ''}
+                <div class="result-card-row">
+                    <span class="result-card-label">Provider:</span>
+                    <span class="result-card-value">${escapeHtml(cluster.provider || 'N/A')}</span>
+                </div>
+                <div class="result-card-row">
+                    <span class="result-card-label">K8s Version:</span>
+                    <span class="result-card-value">${escapeHtml(cluster.k8s_version || 'N/A')}</span>
                 </div>
-                <div class="result-card-body">
-
-                    <!-- Cluster meta -->
-                    <div class="result-card-row">
-                        <span class="result-card-label">Provider:</span>
-                        <span class="result-card-value">${escapeHtml(cluster.provider || 'N/A')}</span>
-                    </div>
-                    <div class="result-card-row">
-                        <span class="result-card-label">K8s Version:</span>
-                        <span class="result-card-value">${escapeHtml(cluster.k8s_version || 'N/A')}</span>
-                    </div>
-                    <div class="result-card-row">
-                        <span class="result-card-label">Nodes:</span>
-                        <span class="result-card-value">
-                            ${totalNodes} total
-                            ${hasDownNodes
-                ? `<span style="color:#ef4444; font-weight:600;"> — ⚠️ ${downNodes} DOWN</span>`
-                : '<span style="color:#22c55e;"> — all healthy</span>'}
-                        </span>
-                    </div>
-
-                    <!-- Cluster-level CPU / Memory -->
-                    ${resourceBar('CPU', cluster.cpu_requested, cluster.cpu_capacity)}
-                    ${resourceBar('Memory', cluster.memory_requested, cluster.memory_capacity)}
-
-                    <!-- Node detail rows -->
-                    ${cluster.nodes && cluster.nodes.length > 0 ? `
-                        <div class="nodes-section">
-                            <div class="nodes-section-title">Nodes</div>
-                            ${cluster.nodes.map(renderNodeRow).join('')}
-                        </div>` : ''}
+                <div class="result-card-row">
+                    <span class="result-card-label">Nodes:</span>
+                    <span class="result-card-value">
+                        ${totalNodes} total
+                        ${hasDownNodes
+            ? `<span style="color:#ef4444; font-weight:600;"> — ⚠️ ${downNodes} DOWN</span>`
+            : '<span style="color:#22c55e;"> — all healthy</span>'}
+                    </span>
                 </div>
-            </div>`;
-    });
 
-    html += '</div>';
-    return html;
+                ${cluster.utilization_pct != null ? `
+                <div class="result-card-row">
+                    <span class="result-card-label">Pressure:</span>
+                    <span class="result-card-value">${cluster.utilization_pct}% of node capacity requested</span>
+                </div>` : ''}
+
+                <!-- Cluster-level CPU / Memory -->
+                ${resourceBar('CPU', cluster.cpu_requested, cluster.cpu_capacity)}
+                ${resourceBar('Memory', cluster.memory_requested, cluster.memory_capacity)}
+
+                <!-- Node detail rows; further pages load on demand -->
+                ${cluster.nodes && cluster.nodes.length > 0 ? `
+                    <div class="nodes-section">
+                        <div class="nodes-section-title">Nodes</div>
+                        <div class="nodes-inline">${cluster.nodes.map(renderNodeRow).join('')}</div>
+                        ${cluster.nodes_next ? renderNodesToggle(cluster) : ''}
+                    </div>` : cluster.nodes_next ? `
+                    <div class="nodes-section">${renderNodesToggle(cluster)}</div>` : ''}
+            </div>
+        </div>`;
+}
+
+// ==================== Paged Node Lists ====================
+/**
+ * Chat answers carry cluster summaries only (node searches: the first page
+ * of matches). A cluster's nodes are fetched page by page from
+ * /api/clusters/<id>/nodes when its list is opened, and only the rows in
+ * view are in the DOM, so a 5,000-node cluster scrolls like a 5-node one.
+ */
+const NODE_ROW_HEIGHT = 34;     // px, must match .virtual-node-row
+const NODE_LIST_ROWS = 10;      // visible rows before the list scrolls
+const NODE_LIST_OVERSCAN = 10;  // rows rendered above/below the viewport
+const NODE_PAGE_SIZE = 100;
+
+function renderNodesToggle(cluster) {
+    const query = cluster.nodes_query || '';
+    const label = query ? `Show all ${cluster.nodes_matched} matching nodes` : `Show nodes (${cluster.nodes_matched})`;
+    return `<button type="button" class="nodes-toggle"
+                data-cluster="${escapeHtml(cluster.id)}"
+                data-query="${escapeHtml(query)}"
+                data-total="${cluster.nodes_matched}">${escapeHtml(label)}</button>`;
+}
+
+function nodeUsagePct(requested, capacity, parse) {
+    const cap = parse(capacity);
+    return cap ? `${Math.min(100, Math.round((parse(requested) / cap) * 100))}%` : '–';
+}
+
+function renderCompactNodeRow(node, index) {
+    const top = index * NODE_ROW_HEIGHT;
+    if (!node) {
+        return `<div class="virtual-node-row node-placeholder" style="top:${top}px;">Loading…</div>`;
+    }
+    const roles = (node.roles || []).join(', ') || 'worker';
+    return `
+        <div class="virtual-node-row ${node.is_down ? 'node-down' : ''}" style="top:${top}px;">
+            <span class="virtual-node-name">${node.is_down ? '🔴' : '🟢'} ${escapeHtml(node.name)}</span>
+            <span class="node-state" style="color:${node.is_down ? '#ef4444' : '#22c55e'};">${escapeHtml(node.state)}</span>
+            <span class="node-role">${escapeHtml(roles)}</span>
+            <span class="virtual-node-usage">
+                CPU ${nodeUsagePct(node.cpu_requested, node.cpu_capacity, parseCPU)} ·
+                Mem ${nodeUsagePct(node.memory_requested, node.memory_capacity, parseMem)}
+            </span>
+        </div>`;
+}
+
+class VirtualNodeList {
+    constructor(container, clusterId, query, total) {
+        this.clusterId = clusterId;
+        this.query = query;
+        this.total = total;
+        this.nodes = [];
+        this.cursor = null;
+        this.done = false;
+        this.loading = false;
+
+        this.viewport = document.createElement('div');
+        this.viewport.className = 'virtual-node-list';
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-node-spacer';
+        this.viewport.appendChild(this.spacer);
+        container.appendChild(this.viewport);
+        this.resize();
+
+        let frame = null;
+        this.viewport.addEventListener('scroll', () => {
+            if (frame) return;
+            frame = requestAnimationFrame(() => {
+                frame = null;
+                this.render();
+            });
+        });
+        this.render();
+    }
+
+    resize() {
+        this.viewport.style.height = `${Math.min(this.total, NODE_LIST_ROWS) * NODE_ROW_HEIGHT + 2}px`;
+        this.spacer.style.height = `${this.total * NODE_ROW_HEIGHT}px`;
+    }
+
+    render() {
+        const first = Math.max(0, Math.floor(this.viewport.scrollTop / NODE_ROW_HEIGHT) - NODE_LIST_OVERSCAN);
+        const last = Math.min(this.total, first + NODE_LIST_ROWS + 2 * NODE_LIST_OVERSCAN);
+        let rows = '';
+        for (let i = first; i < last; i++) rows += renderCompactNodeRow(this.nodes[i], i);
+        this.spacer.innerHTML = rows;
+        if (last + NODE_LIST_OVERSCAN >= this.nodes.length) this.loadMore();
+    }
+
+    async loadMore() {
+        if (this.loading || this.done) return;
+        this.loading = true;
+        const params = new URLSearchParams({ limit: NODE_PAGE_SIZE });
+        if (this.cursor) params.set('cursor', this.cursor);
+        if (this.query) params.set('q', this.query);
+        try {
+            const response = await fetch(`/api/clusters/${encodeURIComponent(this.clusterId)}/nodes?${params}`);
+            const page = await response.json();
+            if (!response.ok) throw new Error(page.error || `HTTP ${response.status}`);
+            this.nodes.push(...page.nodes);
+            this.cursor = page.next_cursor;
+            this.done = !page.next_cursor;
+            // The inventory may have changed since the chat answer
+            this.total = this.done ? this.nodes.length : Math.max(page.total, this.nodes.length);
+            this.resize();
+        } catch (error) {
+            this.done = true;
+            this.total = this.nodes.length;
+            this.resize();
+            this.viewport.insertAdjacentHTML('afterend',
+                `<div class="nodes-error">Could not load nodes: ${escapeHtml(error.message)}</div>`);
+        } finally {
+            this.loading = false;
+        }
+        this.render();
+    }
 }
 
+function openNodeList(toggle) {
+    const section = toggle.closest('.nodes-section');
+    section.querySelector('.nodes-inline')?.remove();
+    toggle.remove();
+    new VirtualNodeList(section, toggle.dataset.cluster, toggle.dataset.query, Number(toggle.dataset.total));
+}
+
+// A lone cluster in an answer gets its node list opened right away
+function expandSingleCluster(element) {
+    const toggle = element?.querySelector('.nodes-toggle');
+    if (toggle && !element.querySelector('.nodes-inline')) openNodeList(toggle);
+}
+
+chatMessages.addEventListener('click', (e) => {
+    const toggle = e.target.closest('.nodes-toggle');
+    if (toggle) openNodeList(toggle);
+});
+
+// ==================== "Did you mean" Suggestions ====================
+
+function renderSuggestions(suggestions) {
+    const chips = suggestions.map(s => {
+        const query = s.kind === 'node' ? `node ${s.name}` : `cluster ${s.name}`;
+        const hint = s.kind === 'node' ? ` <span class="suggestion-hint">node in ${escapeHtml(s.cluster)}</span>` : '';
+        return `<button type="button" class="suggestion-chip" data-query="${escapeHtml(query)}">
+                    ${escapeHtml(s.name)}${hint}
+                </button>`;
+    }).join('');
+    return `<div class="suggestions">${chips}</div>`;
+}
+
+// Clicking a suggestion asks about it directly
+chatMessages.addEventListener('click', async (e) => {
+    const chip = e.target.closest('.suggestion-chip');
+    if (!chip || isProcessing) return;
+    chatInput.value = chip.dataset.query;
+    await handleUserMessage();
+});
+
 // ==================== Typing Indicator ====================
 function showTypingIndicator() {
     const id = 'typing-' + Date.now();
@@ -297,14 +534,52 @@ async function loadStatistics() {
         if (response.ok) {
             if (statsElements.clusters) statsElements.clusters.textContent = data.total_clusters ?? 0;
             if (statsElements.nodes) statsElements.nodes.textContent = data.total_nodes ?? 0;
+            // down_nodes is null until every cluster's node list is known
+            if (statsElements.down) statsElements.down.textContent = data.down_nodes ?? '-';
         }
     } catch (error) {
         console.error('Error loading statistics:', error);
         if (statsElements.clusters) statsElements.clusters.textContent = '?';
         if (statsElements.nodes) statsElements.nodes.textContent = '?';
+        if (statsElements.down) statsElements.down.textContent = '?';
     }
 }
 
+// ==================== Live Events ====================
+/**
+ * Follow /api/events (Server-Sent Events): each inventory change is shown
+ * as a short bot message and the stats bar is refreshed. EventSource
+ * reconnects by itself and resumes from the last event id it saw.
+ */
+function subscribeToEvents() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/api/events');
+    let statsTimer = null;
+
+    source.onmessage = (e) => {
+        const event = JSON.parse(e.data);
+        addEventMessage(event);
+        // Coalesce bursts of changes into one stats refresh
+        clearTimeout(statsTimer);
+        statsTimer = setTimeout(loadStatistics, 500);
+    };
+    source.onerror = () => {
+        // 503: live events disabled on the server, stop retrying
+        if (source.readyState === EventSource.CLOSED) source.close();
+    };
+}
+
+function addEventMessage(event) {
+    const kind = event.is_down ? 'event-down' : 'event-info';
+    const time = new Date(event.time * 1000).toLocaleTimeString();
+    appendBotMessage(`
+        <div class="message-text event-message ${kind}">
+            <span class="event-time">${escapeHtml(time)}</span>
+            ${formatMessage(event.message)}
+        </div>
+    `);
+}
+
 // ==================== Utility ====================
 function scrollToBottom() {
     chatMessages.scrollTop = chatMessages.scrollHeight;
@@ -0,0 +1,52 @@
+"""
+Tests for the Excel journal in excel_utils.
+Run with:  python -m pytest test_excel_utils.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import config
+
+# The Excel settings are commented out in config.py since the Rancher API
+# replaced the workbook; excel_utils still reads them at import
+config.EXCEL_FILE_PATH = os.path.join(config.BASE_DIR, 'data', 'servers.xlsx')
+config.EXCEL_SHEET_NAME = 'Servers'
+config.COLUMNS = {
+    'SERVER_NAME': 'Server/Node Name',
+    'APPLICATION': 'Cluster Name',
+    'ENVIRONMENT': 'Environment',
+    'RUN_AS': 'Run as',
+    'NOTES': 'Notes',
+}
+config.EXCEL_JOURNAL_COMPACT_ENTRIES = 0
+
+from excel_utils import ExcelDataManager  # noqa: E402
+
+
+class TestExcelJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manager = ExcelDataManager(os.path.join(self.tmp_dir, 'servers.xlsx'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_append_after_torn_line(self):
+        """A record appended after an interrupted write survives a re-read"""
+        self.assertTrue(self.manager.add_record('a1', 'app'))
+        with open(self.manager.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"Server/Node Name": "tor')
+        self.assertTrue(self.manager.add_record('b2', 'app'))
+
+        fresh = ExcelDataManager(self.manager.file_path)
+        self.assertEqual(len(fresh.search_by_server('a1')), 1)
+        self.assertEqual(len(fresh.search_by_server('b2')), 1)
+        self.assertEqual(fresh.get_statistics()['total_records'], 2)
+        self.assertEqual(fresh.compact(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()